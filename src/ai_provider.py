@@ -1,27 +1,31 @@
-import os
-from langchain_core.language_models import BaseChatModel
-from langchain_core.embeddings import Embeddings
+from typing import TYPE_CHECKING
 from src import config
 
-import requests
-# Optional imports to avoid hard crashes if dependencies are missing but not used
-ChatGoogleGenerativeAI = None
-GoogleGenerativeAIEmbeddings = None
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-except ImportError:
-    pass
-
-ChatOllama = None
-OllamaEmbeddings = None
-try:
-    from langchain_ollama import ChatOllama, OllamaEmbeddings
-except ImportError:
-    pass
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.embeddings import Embeddings
+
+# Provider SDKs are imported only when that provider is selected; importing
+# langchain_google_genai / langchain_ollama costs seconds of startup otherwise.
+
+def _import_gemini():
+    try:
+        from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+    except ImportError:
+        raise ImportError("langchain-google-genai is not installed. Please run: pip install langchain-google-genai")
+    return ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+
+def _import_ollama():
+    try:
+        from langchain_ollama import ChatOllama, OllamaEmbeddings
+    except ImportError:
+        raise ImportError("langchain-ollama is not installed. Please run: pip install langchain-ollama")
+    return ChatOllama, OllamaEmbeddings
 
 class AIProvider:
     @staticmethod
     def _is_ollama_reachable(base_url: str) -> bool:
+        import requests
         try:
             # Simple check to see if Ollama is running
             response = requests.get(base_url)
@@ -30,62 +34,88 @@ class AIProvider:
             return False
 
     @staticmethod
-    def get_llm(model_name: str = None) -> BaseChatModel:
+    def warm_up(chat: bool = True, embeddings: bool = True, background: bool = False) -> dict:
+        """
+        Preloads the configured Ollama chat/embedding models and keeps them resident
+        for config.OLLAMA_KEEP_ALIVE, so the first real request doesn't pay the model load.
+        No-op for non-Ollama providers. Returns load times per model (empty if background).
+        """
+        from src.ollama_native import warm_up
+        return warm_up(chat=chat, embeddings=embeddings, background=background)
+
+    @staticmethod
+    def get_llm(model_name: str = None, subsystem: str = "default") -> "BaseChatModel":
         """
         Returns an initialized LLM client based on config.AI_PROVIDER.
+        Every call made through the client is recorded by src.telemetry under `subsystem`.
         """
+        from src.telemetry.callbacks import TelemetryCallbackHandler
         provider = config.AI_PROVIDER
-        
+
         if provider == "ollama":
             # Optional: Check reachability or just let langchain fail if down
             if not AIProvider._is_ollama_reachable(config.OLLAMA_BASE_URL):
                  print(f"⚠️  WARNING: Ollama at {config.OLLAMA_BASE_URL} appears unreachable.")
-            
-            if ChatOllama is None:
-                raise ImportError("langchain-ollama is not installed. Please run: pip install langchain-ollama")
-            
+
+            ChatOllama, _ = _import_ollama()
+
+            if config.OLLAMA_PRELOAD:
+                AIProvider.warm_up(embeddings=False, background=True)
+
             model = model_name or config.OLLAMA_MODEL
             return ChatOllama(
                 model=model,
                 base_url=config.OLLAMA_BASE_URL,
-                temperature=0
+                temperature=0,
+                keep_alive=config.OLLAMA_KEEP_ALIVE,
+                callbacks=[TelemetryCallbackHandler(subsystem, model)]
             )
 
         elif provider == "gemini":
-            if not config.GOOGLE_API_KEY:
-                raise ValueError("AI_PROVIDER is 'gemini' but GOOGLE_API_KEY is missing.")
+            config.validate()
+            ChatGoogleGenerativeAI, _ = _import_gemini()
             # Use specific model if requested, else default from config
             model = model_name or config.GEMINI_MODEL
             return ChatGoogleGenerativeAI(
-                model=model, 
-                google_api_key=config.GOOGLE_API_KEY
+                model=model,
+                google_api_key=config.GOOGLE_API_KEY,
+                callbacks=[TelemetryCallbackHandler(subsystem, model)]
             )
-        
+
         else:
             raise ValueError(f"Unknown AI_PROVIDER: {provider}")
 
     @staticmethod
-    def get_embeddings() -> Embeddings:
+    def get_embeddings(subsystem: str = "default") -> "Embeddings":
         """
         Returns initialized Embeddings client based on config.EMBEDDING_PROVIDER.
+        The client is wrapped so that every call is recorded by src.telemetry under `subsystem`.
         """
+        from src.telemetry.callbacks import InstrumentedEmbeddings
         provider = config.EMBEDDING_PROVIDER
-        
+
         if provider == "gemini":
              if not config.GOOGLE_API_KEY:
                 raise ValueError("EMBEDDING_PROVIDER is 'gemini' but GOOGLE_API_KEY is missing.")
-             return GoogleGenerativeAIEmbeddings(
+             _, GoogleGenerativeAIEmbeddings = _import_gemini()
+             embeddings = GoogleGenerativeAIEmbeddings(
                  model=config.GEMINI_EMBEDDING_MODEL,
                  google_api_key=config.GOOGLE_API_KEY
              )
-        
+             return InstrumentedEmbeddings(embeddings, subsystem, config.GEMINI_EMBEDDING_MODEL)
+
         elif provider == "ollama":
-            if OllamaEmbeddings is None:
-                raise ImportError("langchain-ollama is not installed. Please run: pip install langchain-ollama")
-            return OllamaEmbeddings(
+            # Native /api/embed client: batched requests over one session, model kept resident.
+            from src.ollama_native import OllamaBatchEmbeddings
+            if config.OLLAMA_PRELOAD:
+                AIProvider.warm_up(chat=False, background=True)
+            embeddings = OllamaBatchEmbeddings(
                 model=config.OLLAMA_EMBEDDING_MODEL,
-                base_url=config.OLLAMA_BASE_URL
+                base_url=config.OLLAMA_BASE_URL,
+                batch_size=config.EMBED_BATCH_SIZE,
+                keep_alive=config.OLLAMA_KEEP_ALIVE
             )
-            
+            return InstrumentedEmbeddings(embeddings, subsystem, config.OLLAMA_EMBEDDING_MODEL)
+
         else:
             raise ValueError(f"Unknown EMBEDDING_PROVIDER: {provider}")
@@ -0,0 +1,84 @@
+"""
+Fused (one call) vs two-call daily note formatting on a sample of daily notes.
+
+Each note is formatted and tagged once with the two-call path (reformat, then
+TagSuggester.analyze_note) and once with the fused call, and the per-note wall
+time, LLM calls and prompt tokens are compared. Nothing is written to the vault.
+
+    python -m src.benchmarks.format_fused --sample 10
+"""
+import os
+import time
+import random
+import argparse
+
+from src.daily_report.formatter import DailyFormatter
+from src.vault import parse_note, parse_tags, snapshot_for
+
+
+def two_call(formatter, filename, all_files, content):
+    timing = {"calls": 0, "prompt_tokens": 0}
+    start = time.perf_counter()
+    body, ok = formatter.restructure(content, timing)
+    final_md = formatter.render_header(filename, all_files) + "\n" + body
+    metadata, note_body = parse_note(final_md)
+    current_tags = parse_tags(metadata, note_body)
+    vault_tags = formatter.vault_tags(final_md, current_tags)
+    result = formatter.tag_suggester.analyze_note(final_md, current_tags, vault_tags)
+    timing["calls"] += 1
+    timing["prompt_tokens"] += formatter.tag_suggester.estimate_note_tokens(final_md, current_tags, vault_tags)
+    timing["seconds"] = time.perf_counter() - start
+    timing["ok"] = ok and bool(result)
+    return timing
+
+
+def fused(formatter, filename, all_files, content):
+    timing = {"calls": 0, "prompt_tokens": 0}
+    start = time.perf_counter()
+    metadata, _ = parse_note(formatter.render_header(filename, all_files))
+    result = formatter.fused_note(content, parse_tags(metadata, content), timing)
+    timing["seconds"] = time.perf_counter() - start
+    timing["ok"] = bool(result)
+    return timing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fused and two-call daily note formatting.")
+    parser.add_argument("--sample", type=int, default=10, help="Number of daily notes to sample.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    formatter = DailyFormatter(workers=1)
+    all_files = formatter.get_daily_files()
+    files = list(all_files)
+    random.Random(args.seed).shuffle(files)
+    files = files[:args.sample]
+    if not files:
+        raise SystemExit(f"No daily notes in {formatter.daily_path}.")
+    formatter.init_clients()
+    if not (formatter.llm and formatter.tag_suggester and formatter.tag_suggester.llm):
+        raise SystemExit("Could not initialize LLM.")
+    print(f"Sampled {len(files)} daily notes.")
+
+    rows = []
+    print(f"{'Note':<16} {'2-call s':>9} {'Fused s':>8} {'2-call tok':>11} {'Fused tok':>10} {'Fused ok':>9}")
+    for filename in files:
+        path = os.path.join(formatter.daily_path, filename)
+        content = snapshot_for(path)[0].read(path)
+        a = two_call(formatter, filename, all_files, content)
+        b = fused(formatter, filename, all_files, content)
+        rows.append((a, b))
+        print(f"{filename:<16} {a['seconds']:>9.2f} {b['seconds']:>8.2f} {a['prompt_tokens']:>11} "
+              f"{b['prompt_tokens']:>10} {'yes' if b['ok'] else 'no':>9}")
+
+    two_s = sum(a["seconds"] for a, _ in rows)
+    fused_s = sum(b["seconds"] for _, b in rows)
+    two_tok = sum(a["prompt_tokens"] for a, _ in rows)
+    fused_tok = sum(b["prompt_tokens"] for _, b in rows)
+    if two_s and two_tok:
+        print(f"Fused uses {fused_s / two_s:.0%} of the wall time and {fused_tok / two_tok:.0%} of the prompt tokens "
+              f"({sum(1 for _, b in rows if b['ok'])}/{len(rows)} valid fused responses).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Cold vs warm latency benchmark for Ollama chat and embedding calls.
+
+Measures:
+  1. First chat call with the model unloaded (cold) and the call right after (warm).
+  2. First chat call after AIProvider.warm_up() preloaded the model.
+  3. Embedding N texts one request per text vs. batched /api/embed requests.
+
+Runs against the configured OLLAMA_BASE_URL, or against a local stub server that
+simulates model load time, keep-alive expiry and per-request overhead:
+
+    python -m src.benchmarks.ollama_warmup --stub
+    python -m src.benchmarks.ollama_warmup --texts 1000
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+from src import config
+
+
+def _parse_keep_alive(value, default: float = 300.0) -> float:
+    """Ollama keep_alive -> seconds (negative = forever)."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for suffix in ("ms", "s", "m", "h"):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * units[suffix]
+    return float(value)
+
+
+class StubOllama:
+    """
+    Minimal Ollama look-alike: /, /api/generate, /api/chat and /api/embed.
+    A request for a model that isn't resident sleeps `load_delay` first; models stay
+    resident for their keep_alive. Every request costs `request_overhead`, and each
+    embedded text `per_item` seconds.
+    """
+
+    def __init__(self, load_delay: float = 2.0, request_overhead: float = 0.02, per_item: float = 0.001, dim: int = 8):
+        self.load_delay = load_delay
+        self.request_overhead = request_overhead
+        self.per_item = per_item
+        self.dim = dim
+        self.resident: Dict[str, float] = {}  # model -> expiry (monotonic), inf = forever
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _touch(self, model: str, keep_alive):
+        ttl = _parse_keep_alive(keep_alive)
+        with self._lock:
+            self.requests += 1
+            expiry = self.resident.get(model)
+            loaded = expiry is not None and expiry > time.monotonic()
+        time.sleep(self.request_overhead)
+        if not loaded and ttl != 0:
+            time.sleep(self.load_delay)
+        with self._lock:
+            if ttl == 0:
+                self.resident.pop(model, None)
+            else:
+                self.resident[model] = float("inf") if ttl < 0 else time.monotonic() + ttl
+
+    def start(self) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type="application/json"):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._send("Ollama is running", "text/plain")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                model = payload.get("model", "")
+                stub._touch(model, payload.get("keep_alive"))
+                now = time.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+                if self.path == "/api/embed":
+                    texts = payload.get("input") or []
+                    if isinstance(texts, str):
+                        texts = [texts]
+                    time.sleep(stub.per_item * len(texts))
+                    vectors = [[float(len(t) % 7)] * stub.dim for t in texts]
+                    self._send(json.dumps({"model": model, "embeddings": vectors}))
+                elif self.path == "/api/chat":
+                    body = {
+                        "model": model, "created_at": now, "done": True, "done_reason": "stop",
+                        "message": {"role": "assistant", "content": "ok"},
+                        "prompt_eval_count": 1, "eval_count": 1,
+                    }
+                    if payload.get("stream", True):
+                        self._send(json.dumps(body) + "\n", "application/x-ndjson")
+                    else:
+                        self._send(json.dumps(body))
+                else:  # /api/generate
+                    self._send(json.dumps({"model": model, "created_at": now, "response": "", "done": True}))
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_benchmark(num_texts: int) -> Dict[str, float]:
+    from src import ollama_native
+    from src.ai_provider import AIProvider
+    from src.ollama_native import OllamaBatchEmbeddings
+
+    results: Dict[str, float] = {}
+
+    # 1. Cold vs warm chat
+    ollama_native.unload_model(config.OLLAMA_MODEL)
+    llm = AIProvider.get_llm(subsystem="benchmark")
+    results["chat_cold_s"] = _timed(lambda: llm.invoke("ping"))
+    results["chat_warm_s"] = _timed(lambda: llm.invoke("ping"))
+
+    # 2. Preloaded chat
+    ollama_native.unload_model(config.OLLAMA_MODEL)
+    results["chat_preload_s"] = _timed(lambda: AIProvider.warm_up(chat=True, embeddings=False))
+    results["chat_after_preload_s"] = _timed(lambda: llm.invoke("ping"))
+
+    # 3. Per-text vs batched embeddings (model warm for both)
+    texts = [f"Chunk {i}: some note content about topic {i % 17}." for i in range(num_texts)]
+    one_by_one = OllamaBatchEmbeddings(config.OLLAMA_EMBEDDING_MODEL, config.OLLAMA_BASE_URL,
+                                       batch_size=1, keep_alive=config.OLLAMA_KEEP_ALIVE)
+    batched = OllamaBatchEmbeddings(config.OLLAMA_EMBEDDING_MODEL, config.OLLAMA_BASE_URL,
+                                    batch_size=config.EMBED_BATCH_SIZE, keep_alive=config.OLLAMA_KEEP_ALIVE)
+    ollama_native.preload_model(config.OLLAMA_EMBEDDING_MODEL, "embedding")
+    results["embed_single_s"] = _timed(lambda: one_by_one.embed_documents(texts))
+    results["embed_batched_s"] = _timed(lambda: batched.embed_documents(texts))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Ollama cold vs warm latency and batched embedding throughput.")
+    parser.add_argument("--stub", action="store_true", help="Run against a local stub server instead of a real Ollama.")
+    parser.add_argument("--load-delay", type=float, default=2.0, help="Stub: simulated model load time (s).")
+    parser.add_argument("--texts", type=int, default=512, help="Number of texts to embed.")
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub:
+        stub = StubOllama(load_delay=args.load_delay)
+        os.environ.update({
+            "OLLAMA_BASE_URL": stub.start(),
+            "AI_PROVIDER": "ollama",
+            "EMBEDDING_PROVIDER": "ollama",
+        })
+    config.reload()
+    if config.AI_PROVIDER != "ollama":
+        print("AI_PROVIDER is not 'ollama'. Use --stub or configure Ollama.")
+        return
+
+    print(f"Benchmarking Ollama at {config.OLLAMA_BASE_URL} (keep_alive={config.OLLAMA_KEEP_ALIVE}, batch={config.EMBED_BATCH_SIZE})")
+    try:
+        r = run_benchmark(args.texts)
+    finally:
+        if stub:
+            stub.stop()
+
+    print(f"{'Chat, cold (model unloaded)':<36} {r['chat_cold_s']:>8.3f}s")
+    print(f"{'Chat, warm (second call)':<36} {r['chat_warm_s']:>8.3f}s")
+    print(f"{'Preload (warm_up)':<36} {r['chat_preload_s']:>8.3f}s")
+    print(f"{'Chat, first call after preload':<36} {r['chat_after_preload_s']:>8.3f}s")
+    print(f"{f'Embed {args.texts} texts, 1 per request':<36} {r['embed_single_s']:>8.3f}s")
+    print(f"{f'Embed {args.texts} texts, batched':<36} {r['embed_batched_s']:>8.3f}s")
+    if r["embed_batched_s"] > 0:
+        print(f"Batched embedding speedup: {r['embed_single_s'] / r['embed_batched_s']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
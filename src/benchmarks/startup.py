@@ -0,0 +1,131 @@
+"""
+Startup benchmark for the CLI entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for each
+entry point, reports the cumulative import time and the heaviest packages, and
+appends the results to .data/benchmarks/startup.jsonl so regressions show up
+as a delta against the previous run.
+
+    python -m src.benchmarks.startup
+    python -m src.benchmarks.startup --runs 5 --budget-ms 500
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import collections
+from pathlib import Path
+from typing import Dict, List
+
+ENTRY_POINTS = [
+    "src.rag.ingest",
+    "src.rag.query",
+    "src.tagging.auto_tag",
+    "src.daily_report.reporter",
+    "src.daily_report.formatter",
+    "src.telemetry",
+]
+
+HISTORY_FILE = Path(".data") / "benchmarks" / "startup.jsonl"
+
+
+def parse_importtime(stderr: str, module: str) -> Dict:
+    """Parses -X importtime output into the module's cumulative time and per-package self time (µs)."""
+    cumulative = 0
+    by_package = collections.Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cum_us, name = parts
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us)
+        if name == module:
+            cumulative = int(cum_us)
+    return {"cumulative_us": cumulative, "by_package": by_package}
+
+
+def measure(module: str, runs: int) -> Dict:
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, cwd=os.getcwd(),
+        )
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+            return {"module": module, "error": error}
+        parsed = parse_importtime(proc.stderr, module)
+        if best is None or parsed["cumulative_us"] < best["cumulative_us"]:
+            best = dict(parsed, wall_s=wall)
+    top = best["by_package"].most_common(5)
+    return {
+        "module": module,
+        "import_ms": round(best["cumulative_us"] / 1000, 1),
+        "wall_ms": round(best["wall_s"] * 1000, 1),
+        "top_packages": [[name, round(us / 1000, 1)] for name, us in top],
+    }
+
+
+def _git_head() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def load_previous() -> Dict[str, Dict]:
+    if not HISTORY_FILE.exists():
+        return {}
+    last = None
+    with open(HISTORY_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                last = line
+    if not last:
+        return {}
+    return {r["module"]: r for r in json.loads(last).get("results", [])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of each CLI entry point.")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="Modules to measure (default: all entry points).")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module; the fastest run is kept.")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Exit non-zero if any entry point exceeds this import time.")
+    parser.add_argument("--no-record", action="store_true", help="Do not append results to the history file.")
+    args = parser.parse_args()
+
+    previous = load_previous()
+    results: List[Dict] = []
+    print(f"{'Entry point':<30} {'Import ms':>10} {'Wall ms':>9} {'Δ ms':>8}  Heaviest packages")
+    for module in args.modules:
+        r = measure(module, args.runs)
+        results.append(r)
+        if "error" in r:
+            print(f"{module:<30} ERROR: {r['error']}")
+            continue
+        prev = previous.get(module, {}).get("import_ms")
+        delta = f"{r['import_ms'] - prev:+.1f}" if prev is not None else "-"
+        top = ", ".join(f"{name} {ms:.0f}" for name, ms in r["top_packages"])
+        print(f"{module:<30} {r['import_ms']:>10.1f} {r['wall_ms']:>9.1f} {delta:>8}  {top}")
+
+    if not args.no_record:
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": time.time(), "commit": _git_head(), "results": results}) + "\n")
+
+    if args.budget_ms is not None:
+        over = [r["module"] for r in results if "error" in r or r["import_ms"] > args.budget_ms]
+        if over:
+            print(f"Over budget ({args.budget_ms} ms): {', '.join(over)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
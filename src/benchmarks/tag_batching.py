@@ -0,0 +1,68 @@
+"""
+Per-note vs batched tag suggestion on a sample of vault notes.
+
+Runs the same notes through TagPipeline once with one prompt per note and once
+with multi-note prompts (TAG_BATCH_TOKENS), and reports LLM calls, prompt
+tokens and wall time for each. Nothing is written to the notes or the cache.
+
+    python -m src.benchmarks.tag_batching --sample 20 --folder Atomic
+"""
+import random
+import argparse
+from pathlib import Path
+
+from src import config
+from src.tagging.auto_tag import TagScanner, TagSuggester
+from src.tagging.pipeline import TagPipeline
+
+
+def run_mode(scanner, files, top_tags, workers, batch_tokens):
+    suggester = TagSuggester(subsystem="benchmark.tagging")
+    if not suggester.llm:
+        raise SystemExit("Could not initialize LLM.")
+    pipeline = TagPipeline(scanner, suggester, top_tags, workers=workers, batch_tokens=batch_tokens)
+    results = list(pipeline.run(files, ordered=False))
+    return {
+        "notes": len(results),
+        "failed": sum(1 for r in results if not r["result"]),
+        "calls": suggester.usage["calls"],
+        "prompt_tokens": suggester.usage["prompt_tokens"],
+        "retries": suggester.usage["batch_retries"],
+        "wall_s": pipeline.elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-note and batched tag suggestion.")
+    parser.add_argument("--sample", type=int, default=20, help="Number of notes to sample.")
+    parser.add_argument("--folder", default=None, help="Folder to sample from (relative to Vault root).")
+    parser.add_argument("--workers", type=int, default=config.TAG_WORKERS, help="Concurrent LLM calls in both modes.")
+    parser.add_argument("--batch-tokens", type=int, default=config.TAG_BATCH_TOKENS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scanner = TagScanner(config.VAULT_ABS_PATH)
+    scanner.build_index()
+    top_tags = scanner.get_top_tags(50)
+
+    if args.folder:
+        files = scanner.snapshot.files(folder=Path(config.VAULT_ABS_PATH) / args.folder)
+    else:
+        files = scanner.get_all_markdown_files()
+    random.Random(args.seed).shuffle(files)
+    files = files[:args.sample]
+    print(f"Sampled {len(files)} notes.")
+
+    per_note = run_mode(scanner, files, top_tags, args.workers, None)
+    batched = run_mode(scanner, files, top_tags, args.workers, args.batch_tokens)
+
+    print(f"{'Mode':<10} {'Notes':>6} {'Failed':>7} {'Calls':>6} {'Retries':>8} {'Prompt tok':>11} {'Wall s':>8}")
+    for name, r in (("per-note", per_note), ("batched", batched)):
+        print(f"{name:<10} {r['notes']:>6} {r['failed']:>7} {r['calls']:>6} {r['retries']:>8} {r['prompt_tokens']:>11} {r['wall_s']:>8.1f}")
+    if per_note["prompt_tokens"] and per_note["wall_s"]:
+        print(f"Batched uses {batched['prompt_tokens'] / per_note['prompt_tokens']:.0%} of the prompt tokens "
+              f"and {batched['wall_s'] / per_note['wall_s']:.0%} of the wall time.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,144 @@
+"""
+Settings are read from the environment (and .env) lazily, on first attribute access,
+and only once per process. Importing this module has no side effects:
+no .env parsing, no directory creation and no validation errors.
+Use `config.ensure_dirs()` before writing into the vault and
+`config.validate()` where provider credentials are actually required.
+"""
 import os
-from dotenv import load_dotenv
+import threading
 
-load_dotenv()
+_settings = None
+_lock = threading.Lock()
 
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-VAULT_PATH = os.getenv("VAULT_PATH", "./Notes")
-RAG_SOURCE_FOLDERS = os.getenv("RAG_SOURCE_FOLDERS", "Atomic").split(",")
-REPORTS_FOLDER = os.getenv("REPORTS_FOLDER", "Reports")
-CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
-OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
-GEMINI_EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "models/embedding-001")
+def _abs(base_dir, path):
+    return os.path.join(base_dir, path) if not os.path.isabs(path) else path
 
-# Providers: 'gemini' or 'ollama'
-AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini").lower()
-EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini").lower()
 
-# Construct absolute paths
-BASE_DIR = os.getcwd() # Assumption: running from root
-VAULT_ABS_PATH = os.path.join(BASE_DIR, VAULT_PATH) if not os.path.isabs(VAULT_PATH) else VAULT_PATH
-RAG_SOURCE_ABS_PATHS = [os.path.join(VAULT_ABS_PATH, folder.strip()) for folder in RAG_SOURCE_FOLDERS]
-REPORTS_ABS_PATH = os.path.join(VAULT_ABS_PATH, REPORTS_FOLDER)
+def _duration(value):
+    # Ollama accepts durations ("30m") or plain seconds (-1 = keep forever)
+    return int(value) if value.lstrip("-").isdigit() else value
 
-# Dual Vector DB Paths
-CHROMA_PATH_GEMINI = os.getenv("CHROMA_PATH_GEMINI", "./chroma_db_gemini")
-CHROMA_PATH_OLLAMA = os.getenv("CHROMA_PATH_OLLAMA", "./chroma_db_ollama")
 
-if EMBEDDING_PROVIDER == 'ollama':
-    _target_path = CHROMA_PATH_OLLAMA
-else:
-    _target_path = CHROMA_PATH_GEMINI
+def _load():
+    from dotenv import load_dotenv
+    load_dotenv()
 
-CHROMA_DB_ABS_PATH = os.path.join(BASE_DIR, _target_path) if not os.path.isabs(_target_path) else _target_path
+    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+    VAULT_PATH = os.getenv("VAULT_PATH", "./Notes")
+    RAG_SOURCE_FOLDERS = os.getenv("RAG_SOURCE_FOLDERS", "Atomic").split(",")
+    REPORTS_FOLDER = os.getenv("REPORTS_FOLDER", "Reports")
+    CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
+    OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+    OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
+    OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    # How long Ollama keeps models resident after a request (Ollama duration string, or -1 for forever)
+    OLLAMA_KEEP_ALIVE = _duration(os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+    # Load the chat/embedding models in the background as soon as a client is created
+    OLLAMA_PRELOAD = os.getenv("OLLAMA_PRELOAD", "false").lower() in ("1", "true", "yes")
+    # Texts per embedding request (Ollama /api/embed batches) and per Chroma write during ingest
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
 
-# Validation
-if AI_PROVIDER == 'gemini' and not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY not found in environment variables (required for Gemini).")
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    GEMINI_EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "models/embedding-001")
 
-# Ensure directories exist
-os.makedirs(REPORTS_ABS_PATH, exist_ok=True)
+    # Providers: 'gemini' or 'ollama'
+    AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini").lower()
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "gemini").lower()
+
+    # Construct absolute paths
+    BASE_DIR = os.getcwd() # Assumption: running from root
+    VAULT_ABS_PATH = _abs(BASE_DIR, VAULT_PATH)
+    RAG_SOURCE_ABS_PATHS = [os.path.join(VAULT_ABS_PATH, folder.strip()) for folder in RAG_SOURCE_FOLDERS]
+    REPORTS_ABS_PATH = os.path.join(VAULT_ABS_PATH, REPORTS_FOLDER)
+
+    # Dual Vector DB Paths
+    CHROMA_PATH_GEMINI = os.getenv("CHROMA_PATH_GEMINI", "./chroma_db_gemini")
+    CHROMA_PATH_OLLAMA = os.getenv("CHROMA_PATH_OLLAMA", "./chroma_db_ollama")
+
+    if EMBEDDING_PROVIDER == 'ollama':
+        _target_path = CHROMA_PATH_OLLAMA
+    else:
+        _target_path = CHROMA_PATH_GEMINI
+
+    CHROMA_DB_ABS_PATH = _abs(BASE_DIR, _target_path)
+
+    # Concurrent LLM calls in the tagging pipeline (CLI and GUI)
+    TAG_WORKERS = int(os.getenv("TAG_WORKERS", "4"))
+    # Prompt token budget per multi-note request in batched tagging mode (--batch)
+    TAG_BATCH_TOKENS = int(os.getenv("TAG_BATCH_TOKENS", "6000"))
+    # Nearest-neighbour tag propagation (--propagate): neighbours consulted and minimum vote share
+    TAG_PROPAGATION_K = int(os.getenv("TAG_PROPAGATION_K", "8"))
+    TAG_PROPAGATION_CONFIDENCE = float(os.getenv("TAG_PROPAGATION_CONFIDENCE", "0.5"))
+    # Vault tags offered per note, chosen by similarity (0 = the 50 most frequent tags)
+    TAG_VOCAB_SIZE = int(os.getenv("TAG_VOCAB_SIZE", "20"))
+
+    # Daily notes formatted concurrently
+    FORMAT_WORKERS = int(os.getenv("FORMAT_WORKERS", "4"))
+    # "fused" (sections and tags from one LLM call) or "two-call" (reformat, then tag)
+    FORMAT_MODE = os.getenv("FORMAT_MODE", "fused").lower()
+
+    # Daily reporter diff budgets (bytes): per file, total, and largest untracked file read
+    REPORT_DIFF_FILE_BYTES = int(os.getenv("REPORT_DIFF_FILE_BYTES", "4000"))
+    REPORT_DIFF_TOTAL_BYTES = int(os.getenv("REPORT_DIFF_TOTAL_BYTES", "15000"))
+    REPORT_DIFF_MAX_FILE_SIZE = int(os.getenv("REPORT_DIFF_MAX_FILE_SIZE", str(512 * 1024)))
+    # Map-reduce reports: diff bytes covered per file and in total, tokens per chunk, concurrent chunk summaries
+    REPORT_MAP_FILE_BYTES = int(os.getenv("REPORT_MAP_FILE_BYTES", str(64 * 1024)))
+    REPORT_MAP_TOTAL_BYTES = int(os.getenv("REPORT_MAP_TOTAL_BYTES", str(400 * 1024)))
+    REPORT_CHUNK_TOKENS = int(os.getenv("REPORT_CHUNK_TOKENS", "3000"))
+    REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "4"))
+    # Reduce diffs to meaningful added/removed lines before they reach the LLM
+    REPORT_COMPACT = os.getenv("REPORT_COMPACT", "true").lower() in ("1", "true", "yes")
+    # Per-commit summaries reused by range reports (--since / --range)
+    COMMIT_SUMMARY_PATH = os.getenv("COMMIT_SUMMARY_PATH", "./.data/commit_summaries")
+    COMMIT_SUMMARY_ABS_PATH = _abs(BASE_DIR, COMMIT_SUMMARY_PATH)
+
+    # Telemetry (per-call LLM/embedding records)
+    TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() in ("1", "true", "yes")
+    TELEMETRY_PATH = os.getenv("TELEMETRY_PATH", "./.data/telemetry")
+    TELEMETRY_ABS_PATH = _abs(BASE_DIR, TELEMETRY_PATH)
+    TELEMETRY_MAX_BYTES = int(os.getenv("TELEMETRY_MAX_BYTES", str(5 * 1024 * 1024)))
+    TELEMETRY_BACKUPS = int(os.getenv("TELEMETRY_BACKUPS", "3"))
+
+    # Span tracing (src.tracing): "1" for a trace in .data/traces, or a trace file path
+    PROFILE = os.getenv("PROFILE", "")
+
+    return {name: value for name, value in locals().items() if name.isupper()}
+
+
+def settings() -> dict:
+    """Returns all settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = _load()
+    return _settings
+
+
+def reload() -> dict:
+    """Forces settings to be re-read from the environment."""
+    global _settings
+    with _lock:
+        _settings = _load()
+    return _settings
+
+
+def __getattr__(name):
+    # PEP 562: module attribute access (config.VAULT_ABS_PATH) triggers the lazy load.
+    try:
+        return settings()[name]
+    except KeyError:
+        raise AttributeError(f"module 'src.config' has no attribute '{name}'") from None
+
+
+def validate():
+    """Raises if the selected chat provider is missing credentials."""
+    if settings()["AI_PROVIDER"] == 'gemini' and not settings()["GOOGLE_API_KEY"]:
+        raise ValueError("GOOGLE_API_KEY not found in environment variables (required for Gemini).")
+
+
+def ensure_dirs():
+    """Creates the vault output directories that writers expect to exist."""
+    os.makedirs(settings()["REPORTS_ABS_PATH"], exist_ok=True)
@@ -0,0 +1,215 @@
+"""
+Per-commit summary cache and range (weekly/monthly) reports.
+
+Every commit is summarized by the LLM once; the summary is stored by SHA in
+COMMIT_SUMMARY_ABS_PATH and reused by every later report covering that commit.
+A range report only summarizes the commits missing from the cache, then reduces
+the per-commit summaries into one ReportStructure.
+
+    python -m src.daily_report.reporter --since 2026-10-01
+    python -m src.daily_report.reporter --range v1.0..HEAD
+"""
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src import config
+from src import tracing
+from src.ai_provider import AIProvider
+from src.daily_report.git_manager import GitManager
+from src.daily_report.compaction import maybe_compact
+from src.telemetry import record_cache
+
+# Bump when COMMIT_PROMPT or the diff budgets change so cached summaries are regenerated.
+SUMMARY_VERSION = "2"
+
+COMMIT_PROMPT = (
+    "You are a helpful assistant for a developer. "
+    "Below is {part} of the changes in git commit {sha} (\"{subject}\", {date}).\n"
+    "List the meaningful changes as concise markdown bullet points. "
+    "Mention what changed and why it matters; skip formatting-only edits.\n\n"
+    "CHANGES:\n{diff}"
+)
+
+# Long ranges: groups of commit summaries are condensed before the final reduce
+CONDENSE_PROMPT = (
+    "You are a helpful assistant for a developer. "
+    "Below is part {part} of {parts} of the per-commit summaries for {source}, oldest first.\n"
+    "Condense them into concise markdown bullet points: merge related commits, keep the "
+    "important changes and their dates, and drop trivia.\n\n"
+    "COMMIT SUMMARIES:\n{diff}"
+)
+
+RANGE_PROMPT = (
+    "You are a helpful assistant for a developer. "
+    "Below are summaries of the {count} commits in {label}, oldest first. "
+    "Write one structured report covering the whole period: group related work, "
+    "highlight the most important changes and leave out trivia.\n\n"
+    "COMMIT SUMMARIES:\n{summaries}\n\n"
+    "{format_instructions}\n"
+    "Focus on the content and meaning of the changes. The summary should be concise but informative."
+)
+
+
+class CommitSummaryCache:
+    """
+    One JSON file per commit SHA and diff variant (compacted or raw, which give the
+    LLM different input): {sha, date, subject, summary, files, compact, version, created}.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or config.COMMIT_SUMMARY_ABS_PATH)
+
+    def _file(self, sha: str, compact: bool) -> Path:
+        return self.path / f"{sha}.{'compact' if compact else 'raw'}.json"
+
+    def get(self, sha: str, compact: bool) -> Optional[Dict]:
+        try:
+            with open(self._file(sha, compact), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            record_cache("commit_summaries", "daily.reporter", hit=False)
+            return None
+        hit = entry.get("version") == SUMMARY_VERSION
+        record_cache("commit_summaries", "daily.reporter", hit=hit)
+        return entry if hit else None
+
+    def put(self, entry: Dict):
+        self.path.mkdir(parents=True, exist_ok=True)
+        target = self._file(entry["sha"], entry["compact"])
+        tmp = target.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp, target)
+
+
+def _commit_chunks(manager: GitManager, commit: Dict, compact: Optional[bool] = None) -> List[str]:
+    from src.daily_report.reporter import pack_chunks, record_sections
+    records = manager.collect_commit_changes(commit["sha"], file_budget=config.REPORT_MAP_FILE_BYTES,
+                                             total_budget=config.REPORT_MAP_TOTAL_BYTES)
+    records = maybe_compact(records, compact, verbose=False)
+    commit["files"] = len(records)
+    return pack_chunks(record_sections(records), config.REPORT_CHUNK_TOKENS) or ["(no file changes)"]
+
+
+@tracing.traced("report.commit_summaries")
+def summarize_commits(manager: GitManager, commits: List[Dict], cache: Optional[CommitSummaryCache] = None,
+                      compact: Optional[bool] = None) -> List[Dict]:
+    """
+    Returns a summary entry per commit (same order), summarizing only uncached commits.
+    All chunks of all missing commits share one pool of REPORT_WORKERS LLM calls.
+    """
+    try:
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import StrOutputParser
+    except ImportError:
+        from langchain.prompts import ChatPromptTemplate
+        from langchain.schema.output_parser import StrOutputParser
+
+    cache = cache or CommitSummaryCache()
+    compact = config.REPORT_COMPACT if compact is None else compact
+    entries: Dict[str, Dict] = {}
+    missing = []
+    for commit in commits:
+        entry = cache.get(commit["sha"], compact)
+        if entry:
+            entries[commit["sha"]] = entry
+        else:
+            missing.append(commit)
+    print(f"{len(commits)} commits: {len(entries)} summaries cached, {len(missing)} to summarize.")
+
+    if missing:
+        tasks = []  # (commit, part label, chunk)
+        for commit in missing:
+            chunks = _commit_chunks(manager, commit, compact)
+            for i, chunk in enumerate(chunks):
+                part = "all" if len(chunks) == 1 else f"part {i + 1} of {len(chunks)}"
+                tasks.append((commit, part, chunk))
+
+        llm = AIProvider.get_llm(subsystem="daily.reporter.commit")
+        chain = ChatPromptTemplate.from_template(COMMIT_PROMPT) | llm | StrOutputParser()
+
+        def summarize(task):
+            commit, part, chunk = task
+            try:
+                return chain.invoke({"part": part, "sha": commit["sha"][:10], "subject": commit["subject"],
+                                     "date": commit["date"], "diff": chunk})
+            except Exception as e:
+                print(f"Error summarizing commit {commit['sha'][:10]}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, config.REPORT_WORKERS), thread_name_prefix="commit-summary") as pool:
+            results = list(pool.map(summarize, tasks))
+
+        parts: Dict[str, List[Optional[str]]] = {}
+        for (commit, _, _), text in zip(tasks, results):
+            parts.setdefault(commit["sha"], []).append(text)
+        for commit in missing:
+            texts = parts.get(commit["sha"], [])
+            if not texts or any(t is None for t in texts):
+                # Not cached: retried on the next report
+                entries[commit["sha"]] = {"sha": commit["sha"], "date": commit["date"], "subject": commit["subject"],
+                                          "summary": "(summary unavailable)"}
+                continue
+            entry = {
+                "sha": commit["sha"], "date": commit["date"], "subject": commit["subject"],
+                "summary": "\n".join(t.strip() for t in texts), "files": commit.get("files", 0),
+                "compact": compact, "version": SUMMARY_VERSION, "created": time.time(),
+            }
+            cache.put(entry)
+            entries[commit["sha"]] = entry
+
+    return [entries[c["sha"]] for c in commits]
+
+
+def generate_range_report(since: Optional[str] = None, rev_range: Optional[str] = None,
+                          compact: Optional[bool] = None) -> Optional[Dict]:
+    """Report over committed history, reduced from cached per-commit summaries."""
+    from src.daily_report.reporter import ReportStructure, pack_chunks, _summarize_chunks
+    try:
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import JsonOutputParser
+    except ImportError:
+        from langchain.prompts import ChatPromptTemplate
+        from langchain.output_parsers import JsonOutputParser
+
+    label = f"range {rev_range}" if rev_range else f"the period since {since}"
+    print(f"Generating report for {label}...")
+    try:
+        manager = GitManager()
+    except Exception as e:
+        print(f"Failed to initialize GitManager: {e}")
+        return None
+
+    commits = manager.list_commits(since=since, rev_range=rev_range)
+    if not commits:
+        print("No commits found in range.")
+        return None
+
+    try:
+        entries = summarize_commits(manager, commits, compact=compact)
+        sections = [(".", f"#### {e['date'][:10]} {e['subject']} ({e['sha'][:8]})\n{e['summary']}") for e in entries]
+        summaries = "\n\n".join(text for _, text in sections)
+
+        # Long periods: condense the commit summaries chunk-wise before the final reduce
+        if len(summaries) > config.REPORT_CHUNK_TOKENS * 4 * config.REPORT_WORKERS:
+            chunks = pack_chunks(sections, config.REPORT_CHUNK_TOKENS)
+            condensed = _summarize_chunks(chunks, label, prompt=CONDENSE_PROMPT)
+            summaries = "\n\n".join(f"### Part {i + 1}\n{s}" for i, s in enumerate(condensed))
+
+        parser = JsonOutputParser(pydantic_object=ReportStructure)
+        llm = AIProvider.get_llm(subsystem="daily.reporter.range")
+        chain = ChatPromptTemplate.from_template(RANGE_PROMPT) | llm | parser
+        with tracing.span("report.reduce", commits=len(commits)):
+            return chain.invoke({
+                "count": len(commits),
+                "label": label,
+                "summaries": summaries,
+                "format_instructions": parser.get_format_instructions()
+            })
+    except Exception as e:
+        print(f"Error generating range report with LLM: {e}")
+        return None
@@ -0,0 +1,217 @@
+"""
+Semantic diff compaction between GitManager and the reporter.
+
+Reduces every changed file to the added/removed lines that carry meaning:
+diff headers and context lines are dropped, whitespace-only edits and text that
+was only moved (same line removed in one place and added in another, including
+reordered frontmatter keys) cancel out, volatile frontmatter keys are ignored,
+and lines of new notes that merely repeat daily-report-template.md are removed.
+"""
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from src import config
+from src import tracing
+from src.daily_report.git_manager import format_changes
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "daily-report-template.md")
+
+# Frontmatter keys that change on every save and say nothing about the work
+VOLATILE_KEYS = ("modified", "updated", "last-modified", "date-modified", "modification-date", "mtime")
+
+HUNK_RE = re.compile(r'^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+TEMPLATER_RE = re.compile(r'<%.*?%>')
+KEY_RE = re.compile(r'^([A-Za-z0-9_\-]+)\s*:')
+
+
+def _norm(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _words(line: str) -> str:
+    return " ".join(re.findall(r'\w+', line.lower()))
+
+
+class Template:
+    """Lines of the daily note template; Templater tags (<% ... %>) match anything."""
+
+    def __init__(self, path: str = TEMPLATE_PATH):
+        self.exact, self.words, self.patterns = set(), set(), []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            norm = _norm(line)
+            if not norm:
+                continue
+            if TEMPLATER_RE.search(norm):
+                parts = TEMPLATER_RE.split(norm)
+                self.patterns.append(re.compile("^" + ".*".join(re.escape(p) for p in parts) + "$"))
+                continue
+            self.exact.add(norm)
+            if _words(norm):
+                self.words.add(_words(norm))
+
+    def matches(self, line: str) -> bool:
+        norm = _norm(line)
+        if norm in self.exact:
+            return True
+        # Headings and labels also match when decorated differently (emoji, extra spaces)
+        words = _words(norm)
+        if words and words in self.words:
+            return True
+        return any(p.match(norm) for p in self.patterns)
+
+
+_template: Optional[Template] = None
+
+
+def get_template() -> Template:
+    global _template
+    if _template is None:
+        _template = Template()
+    return _template
+
+
+def _changed_lines(record: Dict) -> List[Tuple[str, str, bool]]:
+    """(sign, text, in_frontmatter) for every added/removed line of a record."""
+    if record["untracked"]:
+        # New file: the whole content counts as added
+        result, inside = [], False
+        for number, text in enumerate(record["diff"].splitlines(), 1):
+            was = inside
+            inside = _frontmatter_state(inside, number, text)
+            result.append(("+", text, was or inside))
+        return result
+
+    result = []
+    old_no = new_no = 0
+    in_hunk = False
+    fm = {"-": False, "+": False}
+    for line in record["diff"].splitlines():
+        match = HUNK_RE.match(line)
+        if match:
+            old_no, new_no = int(match.group(1)) - 1, int(match.group(2)) - 1
+            in_hunk = True
+            continue
+        if not in_hunk or not line or line[0] not in " +-":
+            continue
+        sign, text = line[0], line[1:]
+        if sign == " ":
+            old_no += 1
+            new_no += 1
+            for side, number in (("-", old_no), ("+", new_no)):
+                fm[side] = _frontmatter_state(fm[side], number, text)
+            continue
+        number = old_no + 1 if sign == "-" else new_no + 1
+        if sign == "-":
+            old_no += 1
+        else:
+            new_no += 1
+        was = fm[sign]
+        fm[sign] = _frontmatter_state(was, number, text)
+        result.append((sign, text, was or fm[sign]))
+    return result
+
+
+def _frontmatter_state(inside: bool, number: int, text: str) -> bool:
+    if number == 1 and text.strip() == "---":
+        return True
+    if inside and text.strip() == "---":
+        return False
+    return inside
+
+
+def compact_record(record: Dict, template: Optional[Template] = None) -> Tuple[Dict, Counter]:
+    """Returns (compacted copy of the record, counts of dropped lines by reason)."""
+    template = template or get_template()
+    dropped = Counter()
+    compacted = dict(record)
+    if record["skipped"] or not record["diff"]:
+        return compacted, dropped
+    if not record["untracked"] and "\n@@ " not in "\n" + record["diff"]:
+        return compacted, dropped  # binary or mode-only change: keep git's summary line
+
+    changed = _changed_lines(record)
+    if record["status"] == "D":
+        # Deleted file: its old content is not news
+        dropped["deleted"] += len(changed)
+        compacted["diff"] = f"(file deleted, {len(changed)} lines)"
+        return compacted, dropped
+
+    is_note = record["path"].endswith(".md")
+    kept = []
+    for sign, text, in_fm in changed:
+        norm = _norm(text)
+        if not norm:
+            dropped["whitespace"] += 1
+            continue
+        key = KEY_RE.match(norm) if in_fm else None
+        if in_fm and (norm == "---" or (key and key.group(1).lower() in VOLATILE_KEYS)):
+            dropped["frontmatter"] += 1
+            continue
+        if is_note and sign == "+" and template.matches(text):
+            dropped["template"] += 1
+            continue
+        kept.append((sign, text, norm, in_fm))
+
+    # Lines removed in one place and added in another (moved text, reordered
+    # frontmatter, re-indented code) cancel out.
+    removed = Counter(norm for sign, _, norm, _ in kept if sign == "-")
+    added = Counter(norm for sign, _, norm, _ in kept if sign == "+")
+    common = removed & added
+    budget = {"-": Counter(common), "+": Counter(common)}
+    lines = []
+    for sign, text, norm, in_fm in kept:
+        if budget[sign][norm] > 0:
+            budget[sign][norm] -= 1
+            dropped["frontmatter" if in_fm else "moved"] += 1
+            continue
+        lines.append(f"{sign} {text.rstrip()}")
+
+    moved = dropped["moved"] // 2
+    if moved:
+        lines.append(f"({moved} line{'s' if moved != 1 else ''} moved or re-indented)")
+    if not lines:
+        lines.append("(only whitespace, formatting or moved lines changed)")
+    compacted["diff"] = "\n".join(lines)
+    return compacted, dropped
+
+
+@tracing.traced("report.compact")
+def compact_records(records: List[Dict]) -> Tuple[List[Dict], Dict]:
+    """
+    Compacts every record. Returns (records, stats) where stats holds the
+    before/after size of the rendered changes, their ratio and the dropped line counts.
+    """
+    template = get_template()
+    compacted, dropped = [], Counter()
+    for record in records:
+        new, counts = compact_record(record, template)
+        compacted.append(new)
+        dropped.update(counts)
+    before = len(format_changes(records))
+    after = len(format_changes(compacted))
+    stats = {"before": before, "after": after, "ratio": (after / before) if before else 1.0,
+             "dropped": dict(dropped)}
+    return compacted, stats
+
+
+def describe_stats(stats: Dict) -> str:
+    dropped = ", ".join(f"{n} {reason}" for reason, n in sorted(stats["dropped"].items())) or "nothing"
+    return (f"Compacted changes: {stats['before']} -> {stats['after']} chars "
+            f"({stats['ratio']:.0%} of original; dropped lines: {dropped}).")
+
+
+def maybe_compact(records: List[Dict], enabled: Optional[bool] = None, verbose: bool = True) -> List[Dict]:
+    """compact_records() if REPORT_COMPACT (or `enabled`) is on, else the records unchanged."""
+    if not (config.REPORT_COMPACT if enabled is None else enabled) or not records:
+        return records
+    compacted, stats = compact_records(records)
+    if verbose:
+        print(describe_stats(stats))
+    return compacted
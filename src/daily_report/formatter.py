@@ -1,59 +1,184 @@
 import os
-import glob
+import re
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, List, Optional, Set
+from pydantic import BaseModel, Field
 from src import config
+from src import tracing
 from src.ai_provider import AIProvider
+from src.tagging.apply import atomic_write, patch_frontmatter
+from src.telemetry import estimate_tokens
+from src.vault import parse_note, parse_tags, snapshot_for
 from pathlib import Path
-try:
-    from src.tagging.auto_tag import TagScanner, TagSuggester, apply_changes
-except ImportError as e:
-    print(f"DEBUG IMPORTERROR: {e}")
-    pass
-
-# Handle import differences just like in reporter.py
-try:
-    from langchain_core.prompts import ChatPromptTemplate
-except ImportError:
-    from langchain.prompts import ChatPromptTemplate
+
+JOURNAL_FILE = Path(".data/formatter_journal.json")
+# Stages recorded per note; a note is done once all are in the journal
+STAGES = ("formatted", "tagged")
+# "fused": one LLM call returns the sections and the tags; "two-call": reformat, then tag
+MODES = ("fused", "two-call")
+# The yesterday/tomorrow line rendered from the template
+LINKS_RE = re.compile(r'^> \[\[(.*?)\|Yesterday\]\] \| \[\[(.*?)\|Tomorrow\]\]', re.MULTILINE)
+
+
+class FormattedNote(BaseModel):
+    body: str = Field(description="The note reorganized as Markdown with '## Top Priorities', '## Tasks' and '## Notes' sections.")
+    topic_tags: List[str] = Field(description="3-5 topic tags, e.g. ['#python', '#meetings']")
+    maturity_tag: str = Field(description="Exactly one of '#seed', '#sprout', '#evergreen'")
+    maintenance_tag: Optional[str] = Field(default=None, description="'#for-review' or null")
+
+
+def _fused_prompt() -> str:
+    from src.tagging.auto_tag import TAG_RULES
+    return """
+            You are an expert Personal Knowledge Management assistant.
+
+            Do two things with the daily note below and return both in ONE JSON object.
+
+            A. Reorganize the note content into three sections:
+               1. Top Priorities (Important tasks)
+               2. Tasks (Todo items)
+               3. Notes (Journaling, thoughts, misc)
+               Keep the content strictly from the source. Do not invent info.
+               Put the result in "body" in Markdown format with ## Headers.
+
+            B. Tag the note.
+            Context:
+            - **Existing Vault Tags** (Prioritize these): {top_tags}
+            - **Current Note Tags**: {current_tags}
+            """ + TAG_RULES + """
+            {format_instructions}
+
+            NOTE CONTENT:
+            {content}
+            """
+
+
+class FormatJournal:
+    """
+    Manifest of the formatted daily notes: {filename: {"stages": [...], "source_hash",
+    "neighbours": [yesterday, tomorrow], "timing", "updated"}}. Saved atomically after
+    every stage so an interrupted run resumes where it stopped; the source hash and
+    neighbours tell which notes need the LLM again and which only new header links.
+    """
+
+    def __init__(self, path: Path = JOURNAL_FILE):
+        self.path = Path(path)
+        self.notes: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.notes = json.load(f).get("notes", {})
+        except (OSError, ValueError):
+            self.notes = {}
+
+    def __contains__(self, filename: str) -> bool:
+        with self._lock:
+            return filename in self.notes
+
+    def stages(self, filename: str) -> List[str]:
+        with self._lock:
+            return list(self.notes.get(filename, {}).get("stages", []))
+
+    def mark(self, filename: str, *stages: str, save: bool = True, **fields):
+        """Records completed stages and fields; save=False defers writing to save()."""
+        with self._lock:
+            entry = self.notes.setdefault(filename, {"stages": []})
+            entry["stages"] = [s for s in STAGES if s in entry["stages"] or s in stages]
+            entry.update(fields)
+            entry["updated"] = time.time()
+            if save:
+                self._save()
+
+    def get(self, filename: str) -> Dict:
+        with self._lock:
+            return dict(self.notes.get(filename, {}))
+
+    def reset(self, filename: str, save: bool = True):
+        """Forgets the completed stages (the note is formatted again from scratch)."""
+        with self._lock:
+            if filename in self.notes:
+                self.notes[filename]["stages"] = []
+                if save:
+                    self._save()
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"notes": self.notes}, f, indent=1)
+        os.replace(tmp, self.path)
+
 
 class DailyFormatter:
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, journal: Optional[FormatJournal] = None,
+                 mode: Optional[str] = None):
         self.daily_path = os.path.join(config.VAULT_ABS_PATH, "Daily")
         self.formatted_path = os.path.join(config.VAULT_ABS_PATH, "Daily-Formatted")
         self.template_path = os.path.join(config.BASE_DIR, "src", "daily_report", "daily-report-template.md")
-        
-        # Ensure output directory exists
-        os.makedirs(self.formatted_path, exist_ok=True)
-        
+        self.workers = max(1, workers or config.FORMAT_WORKERS)
+        self.journal = journal or FormatJournal()
+        self.mode = mode or config.FORMAT_MODE
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown format mode {self.mode!r}, expected one of {MODES}")
+
         # Load template
         with open(self.template_path, 'r', encoding='utf-8') as f:
             self.template_content = f.read()
 
+        # LLM and tagging clients are created by run() only if there is work to do
+        self.llm = None
+        self.tag_suggester = None
+        self.tag_scanner = None
+        self.tag_vocabulary = None
+        self.top_tags = []
+        self._clients_ready = False
+        self._tag_lock = threading.Lock()
+        # Per-note {"note", "mode", "seconds", "calls", "prompt_tokens"} of this run
+        self.timings: List[Dict] = []
+
+    @tracing.traced("format.init_clients")
+    def init_clients(self):
+        if self._clients_ready:
+            return
+        self._clients_ready = True
+
         # Initialize LLM
         try:
-             self.llm = AIProvider.get_llm()
+             self.llm = AIProvider.get_llm(subsystem="daily.formatter")
         except Exception as e:
             print(f"Error initializing LLM: {e}")
             self.llm = None
 
         # Initialize Tagging System
-        self.tag_suggester = None
         try:
             print("Initializing Tagging System...")
+            from src.tagging.auto_tag import TagScanner, TagSuggester
             self.tag_scanner = TagScanner(config.VAULT_ABS_PATH)
             self.tag_scanner.build_index()
             self.top_tags = self.tag_scanner.get_top_tags(50)
-            self.tag_suggester = TagSuggester()
+            from src.tagging.vocabulary import load_vocabulary
+            self.tag_vocabulary = load_vocabulary(self.tag_scanner)
+            self.tag_suggester = TagSuggester(subsystem="daily.formatter.tagging")
             print("Tagging System ready.")
         except Exception as e:
              print(f"Warning: Tagging system could not be initialized: {e}")
 
     def get_daily_files(self):
         """Returns a sorted list of daily note filenames (YYYY-MM-DD.md)."""
-        all_files = glob.glob(os.path.join(self.daily_path, "*.md"))
+        snapshot, folder = snapshot_for(self.daily_path)
+        all_files = snapshot.files(folder=folder or self.daily_path, recursive=False)
         valid_files = []
         for f in all_files:
-            basename = os.path.basename(f)
+            basename = f.name
             # Simple validation: matches YYYY-MM-DD.md format check
             try:
                 datetime.strptime(basename.replace(".md", ""), "%Y-%m-%d")
@@ -81,24 +206,125 @@ class DailyFormatter:
         
         return fmt(prev_file), fmt(next_file)
 
+    @tracing.traced("format.note")
     def process_note(self, filename, all_files):
-        print(f"Processing {filename}...")
-        
+        """Runs the stages of one note that the journal doesn't list as done yet."""
+        done = self.journal.stages(filename)
+        output_path = os.path.join(self.formatted_path, filename)
+        if "formatted" in done and not os.path.exists(output_path):
+            done = []  # output removed since: start over
+        start = time.perf_counter()
+        timing = {"note": filename, "mode": "two-call", "calls": 0, "prompt_tokens": 0}
+        # What the output is built from, recorded with the "formatted" stage
+        source = {"source_hash": self.source_hash(filename),
+                  "neighbours": list(self.get_smart_links(filename, all_files))}
+
+        if not done and self.mode == "fused" and self.tag_suggester:
+            if self.format_and_tag_note(filename, all_files, timing):
+                timing["mode"] = "fused"
+                self._record_timing(timing, start)
+                self.journal.mark(filename, *STAGES, timing=timing, **source)
+                return
+            print(f"Fused response for {filename} was invalid; falling back to two calls.")
+
+        if "formatted" not in done:
+            final_md, ok = self.format_note(filename, all_files, timing)
+            if not ok:
+                self.journal.mark(filename)  # fallback content written; retried on the next run
+                return
+            self.journal.mark(filename, "formatted", **source)
+        else:
+            print(f"Resuming {filename} (already formatted)...")
+            final_md = snapshot_for(output_path)[0].read(output_path)
+        if "tagged" not in done and self.tag_note(filename, final_md, timing):
+            self._record_timing(timing, start)
+            self.journal.mark(filename, "tagged", timing=timing)
+
+    def _record_timing(self, timing: Dict, start: float):
+        timing["seconds"] = round(time.perf_counter() - start, 3)
+        with self._tag_lock:
+            self.timings.append(timing)
+
+    @staticmethod
+    def _count_call(timing: Optional[Dict], response, prompt_text: str):
+        if timing is None:
+            return
+        usage = getattr(response, "usage_metadata", None) or {}
+        timing["calls"] += 1
+        timing["prompt_tokens"] += usage.get("input_tokens") or estimate_tokens(len(prompt_text))
+
+    def vault_tags(self, content: str, current_tags: Set[str]) -> List[str]:
+        if self.tag_vocabulary:
+            return self.tag_vocabulary.select(content, current_tags)
+        return self.top_tags
+
+    def fused_note(self, original_content: str, current_tags: Set[str], timing: Optional[Dict] = None) -> Optional[Dict]:
+        """One LLM call: reorganized body plus tags, validated. None if the response is unusable."""
+        if not self.llm:
+            return None
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import JsonOutputParser
+        from src.tagging.auto_tag import validate_result
+
+        parser = JsonOutputParser(pydantic_object=FormattedNote)
+        prompt = ChatPromptTemplate.from_template(_fused_prompt())
+        variables = {
+            "top_tags": ", ".join(self.vault_tags(original_content, current_tags)),
+            "current_tags": ", ".join(sorted(current_tags)),
+            "format_instructions": parser.get_format_instructions(),
+            "content": original_content,
+        }
+        try:
+            response = (prompt | self.llm).invoke(variables)
+            self._count_call(timing, response, prompt.format(**variables))
+            data = parser.parse(response.content)
+            note = FormattedNote(**data)
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            return None
+        result = {"body": note.body, "topic_tags": note.topic_tags,
+                  "maturity_tag": note.maturity_tag, "maintenance_tag": note.maintenance_tag}
+        if not note.body.strip() or not validate_result(result):
+            return None
+        return result
+
+    def format_and_tag_note(self, filename, all_files, timing: Optional[Dict] = None) -> bool:
+        """Fused mode: sections and tags from one call, written in one atomic pass. Returns True on success."""
+        from src.tagging.auto_tag import suggested_tag_set
+        print(f"Processing {filename} (fused)...")
         input_path = os.path.join(self.daily_path, filename)
         output_path = os.path.join(self.formatted_path, filename)
-        
-        # 1. Read Original Content
-        with open(input_path, 'r', encoding='utf-8') as f:
-            original_content = f.read()
 
-        # 2. Extract Date info
-        date_str = filename.replace(".md", "")
-        
-        # 3. Calculate Smart Links
-        yesterday_str, tomorrow_str = self.get_smart_links(filename, all_files)
-        
-        # 4. LLM Reformatting
+        original_content = snapshot_for(input_path)[0].read(input_path)
+        header = self.render_header(filename, all_files)
+        metadata, _ = parse_note(header)
+        current_tags = parse_tags(metadata, original_content)
+
+        result = self.fused_note(original_content, current_tags, timing)
+        if not result:
+            return False
+        new_tags = suggested_tag_set(result)
+        final_md = header + "\n" + result["body"]
+        if new_tags:
+            final_md = patch_frontmatter(final_md, new_tags)
+
+        atomic_write(Path(output_path), final_md)
+        with self._tag_lock:
+            self.tag_scanner.refresh_file(Path(output_path))
+        print(f"Saved to {output_path} with tags {new_tags}")
+        return True
+
+    def restructure(self, original_content, timing: Optional[Dict] = None):
+        """LLM call 1 (two-call mode): the note body reorganized into sections. Returns (body, ok)."""
+        ok = True
+        # LLM Reformatting
         if self.llm:
+            # Handle import differences just like in reporter.py
+            try:
+                from langchain_core.prompts import ChatPromptTemplate
+            except ImportError:
+                from langchain.prompts import ChatPromptTemplate
+
             try:
                 prompt = ChatPromptTemplate.from_template(
                     "You are a personal knowledge base assistant. "
@@ -140,15 +366,23 @@ class DailyFormatter:
                 
                 chain = prompt_simple | self.llm
                 result = chain.invoke({"content": original_content})
+                self._count_call(timing, result, prompt_simple.format(content=original_content))
                 structured_body = result.content
                 
             except Exception as e:
                 print(f"LLM Error: {e}")
+                ok = False
                 structured_body = original_content + "\n\n(Formatting failed, original content preserved)"
         else:
+            ok = False
             structured_body = original_content
+        return structured_body, ok
 
-        # 5. Assemble Final content
+    def render_header(self, filename, all_files):
+        """Frontmatter, title and yesterday/tomorrow links from the template, for the note's date."""
+        date_str = filename.replace(".md", "")
+        yesterday_str, tomorrow_str = self.get_smart_links(filename, all_files)
+        # Assemble the header
         # We need to manually inject the Frontmatter and Header from the template, 
         # because the LLM might mess up the Templater tags if we pass them through.
         
@@ -211,52 +445,175 @@ class DailyFormatter:
         else:
             # Fallback
             header_part = final_content
-            
-        final_md = header_part + "\n" + structured_body
+        return header_part
+
+    def format_note(self, filename, all_files, timing: Optional[Dict] = None):
+        """Stage 1 (two-call mode): writes the formatted note atomically. Returns (content, True if the LLM succeeded)."""
+        print(f"Processing {filename}...")
+        
+        input_path = os.path.join(self.daily_path, filename)
+        output_path = os.path.join(self.formatted_path, filename)
+        
+        # 1. Read Original Content
+        original_content = snapshot_for(input_path)[0].read(input_path)
+
+        # 2. LLM Reformatting
+        structured_body, ok = self.restructure(original_content, timing)
+
+        # 3. Header with Smart Links from the template
+        final_md = self.render_header(filename, all_files) + "\n" + structured_body
         
-        # Write Result
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(final_md)
+        # Write Result (temp file + rename: an interrupted run never leaves a partial note)
+        atomic_write(Path(output_path), final_md)
             
         print(f"Saved to {output_path}")
+        return final_md, ok
 
-        # 6. Auto-Tagging
-        if self.tag_suggester and self.tag_suggester.llm:
-            try:
-                print(f"Auto-tagging {filename}...")
-                out_p = Path(output_path)
-                current_tags = self.tag_scanner.parse_tags_from_file(out_p)
-                
-                # Analyze and get suggestions
-                result = self.tag_suggester.analyze_note(final_md, current_tags, self.top_tags)
+    def tag_note(self, filename, final_md, timing: Optional[Dict] = None) -> bool:
+        """Stage 2: auto-tags the formatted note. Returns True when done."""
+        if not (self.tag_suggester and self.tag_suggester.llm):
+            return False
+        output_path = os.path.join(self.formatted_path, filename)
+        try:
+            print(f"Auto-tagging {filename}...")
+            out_p = Path(output_path)
+            with self._tag_lock:
+                current_tags = self.tag_scanner.get_file_tags(out_p)
+            
+            # Analyze and get suggestions, offering the vault tags most relevant to this note
+            vault_tags = self.vault_tags(final_md, current_tags)
+            result = self.tag_suggester.analyze_note(final_md, current_tags, vault_tags)
+            if timing is not None:
+                timing["calls"] += 1
+                timing["prompt_tokens"] += self.tag_suggester.estimate_note_tokens(final_md, current_tags, vault_tags)
+            
+            if result:
+                from src.tagging.auto_tag import apply_changes, suggested_tag_set
+                new_tags = suggested_tag_set(result)
                 
-                if result:
-                    new_tags = set(result.get('topic_tags', []))
-                    if result.get('maturity_tag'):
-                        new_tags.add(result.get('maturity_tag'))
-                    if result.get('maintenance_tag'):
-                        new_tags.add(result.get('maintenance_tag'))
-                    
-                    if new_tags:
-                        apply_changes(out_p, new_tags, final_md)
-                        print(f"Applied tags: {new_tags}")
-            except Exception as e:
-                print(f"Error auto-tagging {filename}: {e}")
+                if new_tags:
+                    apply_changes(out_p, new_tags, final_md)
+                    with self._tag_lock:
+                        self.tag_scanner.refresh_file(out_p)
+                    print(f"Applied tags: {new_tags}")
+                return True
+        except Exception as e:
+            print(f"Error auto-tagging {filename}: {e}")
+        return False
+
+    def source_hash(self, filename) -> Optional[str]:
+        input_path = os.path.join(self.daily_path, filename)
+        entry = snapshot_for(input_path)[0].entry(input_path)
+        return entry["hash"] if entry else None
+
+    def _output_neighbours(self, filename) -> Optional[List[str]]:
+        output_path = os.path.join(self.formatted_path, filename)
+        content = snapshot_for(output_path)[0].read(output_path) or ""
+        match = LINKS_RE.search(content)
+        return [match.group(1), match.group(2)] if match else None
 
+    def pending(self, daily_files):
+        """
+        Compares the daily notes with the manifest. Returns (notes to format, notes whose
+        only change is their yesterday/tomorrow neighbours). Notes whose source content
+        changed are formatted again; outputs made before the manifest existed are adopted.
+        """
+        pending, relink = [], []
+        changed = False  # the manifest is written once, after all notes are compared
+        for f in daily_files:
+            formatted_file_path = os.path.join(self.formatted_path, f)
+            exists = os.path.exists(formatted_file_path)
+            source_hash = self.source_hash(f)
+            neighbours = list(self.get_smart_links(f, daily_files))
+            if exists and f not in self.journal:
+                self.journal.mark(f, *STAGES, save=False, source_hash=source_hash,
+                                  neighbours=self._output_neighbours(f))
+                changed = True
+            elif exists and "source_hash" not in self.journal.get(f):
+                # Journaled before source hashes were recorded
+                self.journal.mark(f, save=False, source_hash=source_hash, neighbours=self._output_neighbours(f))
+                changed = True
+            entry = self.journal.get(f)
+            done = entry.get("stages", [])
+            if done and exists and entry.get("source_hash") != source_hash:
+                print(f"{f} changed since it was formatted.")
+                self.journal.reset(f, save=False)
+                changed = True
+                pending.append(f)
+            elif not (all(stage in done for stage in STAGES) and exists):
+                pending.append(f)
+            elif entry.get("neighbours") != neighbours:
+                relink.append(f)
+        if changed:
+            self.journal.save()
+        return pending, relink
+
+    @tracing.traced("format.relink")
+    def relink(self, filename, all_files) -> bool:
+        """Rewrites only the yesterday/tomorrow links of a formatted note (no LLM call)."""
+        output_path = os.path.join(self.formatted_path, filename)
+        content = snapshot_for(output_path)[0].read(output_path)
+        yesterday_str, tomorrow_str = self.get_smart_links(filename, all_files)
+        if content is None or not LINKS_RE.search(content):
+            return False
+        updated = LINKS_RE.sub(lambda m: f"> [[{yesterday_str}|Yesterday]] | [[{tomorrow_str}|Tomorrow]]",
+                               content, count=1)
+        if updated != content:
+            atomic_write(Path(output_path), updated)
+            snapshot_for(output_path)[0].refresh_file(output_path)
+        self.journal.mark(filename, neighbours=[yesterday_str, tomorrow_str])
+        print(f"Updated links of {filename}: {yesterday_str} | {tomorrow_str}")
+        return True
 
     def run(self):
         daily_files = self.get_daily_files()
         print(f"Found {len(daily_files)} daily notes.")
-        
-        for f in daily_files:
-            # Check if file already exists in formatted folder
-            formatted_file_path = os.path.join(self.formatted_path, f)
-            if os.path.exists(formatted_file_path):
-                print(f"Skipping {f} - already formatted.")
-                continue
+        pending, relink = self.pending(daily_files)
+        print(f"{len(pending)} to process, {len(relink)} to relink, "
+              f"{len(daily_files) - len(pending) - len(relink)} up to date.")
+        for f in relink:
+            if not self.relink(f, daily_files):
+                self.journal.reset(f)  # header not recognized: format it again
+                pending.append(f)
+        if not pending:
+            return
+
+        os.makedirs(self.formatted_path, exist_ok=True)
+        self.init_clients()
+
+        def process(f):
+            try:
+                self.process_note(f, daily_files)
+            except Exception as e:
+                print(f"Error processing {f}: {e}")
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="formatter") as pool:
+            list(pool.map(process, pending))
+
+        if self.tag_scanner:
+            self.tag_scanner.save()
+        self.print_timings()
 
-            self.process_note(f, daily_files)
+    def print_timings(self):
+        """Per-mode averages of the notes completed in this run."""
+        if not self.timings:
+            return
+        print(f"{'Mode':<10} {'Notes':>6} {'Avg s':>7} {'Calls/note':>11} {'Prompt tok/note':>16}")
+        for mode in MODES:
+            rows = [t for t in self.timings if t["mode"] == mode]
+            if rows:
+                n = len(rows)
+                print(f"{mode:<10} {n:>6} {sum(t['seconds'] for t in rows) / n:>7.2f} "
+                      f"{sum(t['calls'] for t in rows) / n:>11.1f} {sum(t['prompt_tokens'] for t in rows) // n:>16}")
 
 if __name__ == "__main__":
-    formatter = DailyFormatter()
-    formatter.run()
+    arg_parser = argparse.ArgumentParser(description="Format daily notes into Daily-Formatted and auto-tag them.")
+    arg_parser.add_argument("--workers", type=int, default=config.FORMAT_WORKERS, help="Notes processed concurrently.")
+    arg_parser.add_argument("--mode", choices=MODES, default=config.FORMAT_MODE,
+                            help="One LLM call for sections and tags (fused), or reformat then tag (two-call).")
+    tracing.add_profile_argument(arg_parser)
+    args = arg_parser.parse_args()
+    tracing.configure(args.profile, "formatter")
+    formatter = DailyFormatter(workers=args.workers, mode=args.mode)
+    with tracing.span("format"):
+        formatter.run()
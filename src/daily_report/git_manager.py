@@ -1,6 +1,40 @@
 import git
 import os
+import re
+import subprocess
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional, Tuple
 from src import config
+from src import tracing
+
+# Generated / binary files: listed in the change set but their content is never read.
+SKIP_PATTERNS = (
+    "*.lock", "package-lock.json", "*.min.js", "*.min.css", "*.map", "*.pyc",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.pdf", "*.zip", "*.sqlite", "*.db",
+    ".obsidian/workspace*.json", ".obsidian/plugins/*",
+)
+# Untracked files are only read if they are text
+TEXT_EXTENSIONS = ('.md', '.txt', '.py', '.json', '.yaml', '.yml')
+DIFF_HEADER_RE = re.compile(r'^diff --git a/(.*) b/(.*?)\s*$')
+
+
+def _is_generated(path: str) -> bool:
+    return any(PurePosixPath(path).match(p) for p in SKIP_PATTERNS)
+
+
+def format_changes(records: List[Dict]) -> str:
+    """Renders collect_changes() records as the text sent to the LLM."""
+    parts = []
+    for r in records:
+        name = f"{r['old_path']} -> {r['path']}" if r["old_path"] else r["path"]
+        kind = "NEW FILE" if r["untracked"] else r["status"]
+        if r["skipped"]:
+            parts.append(f"--- {kind}: {name} (content skipped: {r['skipped']}) ---")
+            continue
+        note = " (truncated)" if r["truncated"] else ""
+        parts.append(f"--- {kind}: {name}{note} ---\n{r['diff'].rstrip()}")
+    return "\n\n".join(parts)
+
 
 class GitManager:
     def __init__(self, repo_path=None):
@@ -14,51 +48,220 @@ class GitManager:
             print(f"Error: {self.repo_path} is not a valid git repository.")
             raise
 
-    def get_current_changes(self):
-        """Returns the diff of current changes (staged and unstaged)."""
-        # Staged changes
+    @tracing.traced("git.status")
+    def _status(self) -> List[Dict]:
+        """One `git status --porcelain -z` call -> per-file records (diff not filled in)."""
+        out = self.repo.git.status("--porcelain=v1", "-z", "--untracked-files=all")
+        fields = out.split("\0")
+        records = []
+        i = 0
+        while i < len(fields):
+            field = fields[i]
+            i += 1
+            if len(field) < 4:
+                continue
+            xy, path = field[:2], field[3:]
+            old_path = None
+            if "R" in xy or "C" in xy:
+                old_path = fields[i]
+                i += 1
+            records.append({
+                "path": path,
+                "old_path": old_path,
+                "status": xy.strip() or xy,
+                "staged": xy[0] not in " ?",
+                "unstaged": xy[1] not in " ?",
+                "untracked": xy == "??",
+                "diff": "",
+                "bytes": 0,
+                "truncated": False,
+                "skipped": None,
+            })
+        return records
+
+    @tracing.traced("git.diff")
+    def _stream_diffs(self, git_args: List[str], records: Dict[str, Dict], file_budget: int,
+                      total_budget: int) -> Tuple[int, bool]:
+        """
+        Streams one git diff/show command and splits its output per file, keeping at
+        most `file_budget` bytes per file. The git process is stopped at the first line
+        that would go over `total_budget`. Returns (bytes used, budget exhausted).
+        """
+        excludes = [f":(exclude,glob)**/{p}" for p in SKIP_PATTERNS]
+        cmd = ["git", "-c", "core.quotepath=off", *git_args, "--no-color", "--no-ext-diff", "-M",
+               "--", ".", *excludes]
+        used = 0
+        file_used = 0
+        exhausted = False
+        current = None
+        chunks: List[bytes] = []
+
+        def finish():
+            if current is not None:
+                current["diff"] = b"".join(chunks).decode("utf-8", errors="replace")
+                current["bytes"] = file_used
+
+        proc = subprocess.Popen(cmd, cwd=self.repo.working_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
         try:
-            diff_staged = self.repo.git.diff("--cached")
-        except: 
-            diff_staged = ""
-            
-        # Unstaged changes
+            for line in proc.stdout:
+                if line.startswith(b"diff --git "):
+                    finish()
+                    chunks, file_used = [], 0
+                    match = DIFF_HEADER_RE.match(line.decode("utf-8", errors="replace"))
+                    current = records.get(match.group(2)) if match else None
+                if current is None or current["truncated"]:
+                    continue
+                if used + len(line) > total_budget:
+                    if not any(c.startswith(b"@@") for c in chunks):
+                        # Only the file's header lines fit: list it as skipped instead
+                        used -= file_used
+                        chunks, file_used = [], 0
+                    current["truncated"] = bool(chunks)
+                    exhausted = True
+                    break
+                if file_used + len(line) > file_budget:
+                    current["truncated"] = True
+                    continue
+                chunks.append(line)
+                file_used += len(line)
+                used += len(line)
+            finish()
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+        return used, exhausted
+
+    @tracing.traced("git.collect")
+    def collect_changes(self, file_budget: Optional[int] = None, total_budget: Optional[int] = None,
+                        max_file_size: Optional[int] = None) -> List[Dict]:
+        """
+        Current changes (staged, unstaged and untracked) as per-file records:
+        path, old_path, status, staged, unstaged, untracked, diff, bytes, truncated, skipped.
+
+        Each file contributes at most `file_budget` bytes of diff and all files together
+        at most `total_budget`; once the budget is used up nothing more is read and the
+        remaining files are listed with skipped="budget". Generated files (SKIP_PATTERNS)
+        and untracked files larger than `max_file_size` are listed but never read.
+        """
+        file_budget = file_budget or config.REPORT_DIFF_FILE_BYTES
+        total_budget = total_budget or config.REPORT_DIFF_TOTAL_BYTES
+        max_file_size = max_file_size or config.REPORT_DIFF_MAX_FILE_SIZE
+
+        records = self._status()
+        for record in records:
+            if _is_generated(record["path"]):
+                record["skipped"] = "generated"
+
+        tracked = {r["path"]: r for r in records if not r["untracked"] and not r["skipped"]}
+        # One `git diff HEAD` covers staged and unstaged changes
+        base = ["diff", "HEAD"] if self.repo.head.is_valid() else ["diff", "--cached"]
+        used, exhausted = self._stream_diffs(base, tracked, file_budget, total_budget) if tracked else (0, False)
+
+        for record in records:
+            if not record["untracked"] or record["skipped"]:
+                continue
+            if not record["path"].endswith(TEXT_EXTENSIONS):
+                record["skipped"] = "non-text"
+                continue
+            full_path = os.path.join(self.repo.working_dir, record["path"])
+            try:
+                size = os.path.getsize(full_path)
+            except OSError as e:
+                record["skipped"] = f"unreadable: {e}"
+                continue
+            if size > max_file_size:
+                record["skipped"] = "too large"
+                continue
+            if exhausted:
+                record["skipped"] = "budget"
+                continue
+            room = total_budget - used
+            with open(full_path, 'rb') as f:
+                data = f.read(min(file_budget, room))
+            record["diff"] = data.decode("utf-8", errors="replace")
+            record["bytes"] = len(data)
+            record["truncated"] = size > len(data)
+            used += len(data)
+            # Cut by the total budget rather than the per-file one: later files are not read
+            exhausted = size > room and room < file_budget
+
+        for record in records:
+            if not record["diff"] and not record["skipped"] and exhausted:
+                record["skipped"] = "budget"
+        return records
+
+    @tracing.traced("git.log")
+    def list_commits(self, since: Optional[str] = None, rev_range: Optional[str] = None) -> List[Dict]:
+        """Non-merge commits (sha, date, subject), oldest first, e.g. since="2026-10-01" or rev_range="A..B"."""
+        args = ["--no-merges", "--format=%H%x1f%aI%x1f%s"]
+        if since:
+            args.append(f"--since={since}")
+        args.append(rev_range or "HEAD")
         try:
-            diff_unstaged = self.repo.git.diff()
-        except:
-             diff_unstaged = ""
-        
-        # New untracked files
-        untracked = self.repo.untracked_files
-        
-        full_diff = ""
-        if diff_staged:
-            full_diff += "STAGED CHANGES:\n" + diff_staged + "\n\n"
-        if diff_unstaged:
-            full_diff += "UNSTAGED CHANGES:\n" + diff_unstaged + "\n\n"
-        if untracked:
-            full_diff += "UNTRACKED FILES:\n"
-            for file_path in untracked:
-                full_diff += f"\n--- NEW FILE: {file_path} ---\n"
-                try:
-                    full_path_abs = os.path.join(self.repo.working_dir, file_path)
-                    if file_path.endswith(('.md', '.txt', '.py', '.json', '.yaml', '.yml')):
-                        with open(full_path_abs, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            full_diff += content + "\n"
-                    else:
-                        full_diff += "(Skipped non-text file)\n"
-                except Exception as e:
-                    full_diff += f"(Error reading file: {e})\n"
-            
-        return full_diff
+            out = self.repo.git.log(*args)
+        except git.exc.GitCommandError as e:
+            print(f"Error listing commits: {e}")
+            return []
+        commits = []
+        for line in out.splitlines():
+            sha, date, subject = line.split("\x1f", 2)
+            commits.append({"sha": sha, "date": date, "subject": subject})
+        return list(reversed(commits))
+
+    @tracing.traced("git.collect_commit")
+    def collect_commit_changes(self, sha: str, file_budget: Optional[int] = None,
+                               total_budget: Optional[int] = None) -> List[Dict]:
+        """Per-file records (same shape as collect_changes()) for one commit."""
+        file_budget = file_budget or config.REPORT_DIFF_FILE_BYTES
+        total_budget = total_budget or config.REPORT_DIFF_TOTAL_BYTES
+        out = self.repo.git.diff_tree("--no-commit-id", "-r", "-z", "-M", "--root", "--name-status", sha)
+        fields = [f for f in out.split("\0") if f]
+        records = []
+        i = 0
+        while i < len(fields):
+            status = fields[i]
+            if status[0] in "RC":
+                old_path, path = fields[i + 1], fields[i + 2]
+                i += 3
+            else:
+                old_path, path = None, fields[i + 1]
+                i += 2
+            records.append({
+                "path": path, "old_path": old_path, "status": status[0],
+                "staged": False, "unstaged": False, "untracked": False,
+                "diff": "", "bytes": 0, "truncated": False,
+                "skipped": "generated" if _is_generated(path) else None,
+            })
+        readable = {r["path"]: r for r in records if not r["skipped"]}
+        if readable:
+            _, exhausted = self._stream_diffs(["show", "--format=", sha], readable, file_budget, total_budget)
+            for record in records:
+                if not record["diff"] and not record["skipped"] and exhausted:
+                    record["skipped"] = "budget"
+        return records
 
+    def get_current_changes(self):
+        """Returns the current changes (staged, unstaged and untracked) as one budgeted text."""
+        return format_changes(self.collect_changes())
+
+    @tracing.traced("git.commit")
     def commit_all(self, message):
         """Adds all changes and commits them."""
         # Add all, including untracked
         self.repo.git.add(A=True)
         return self.repo.index.commit(message)
 
+    @tracing.traced("git.commit")
+    def commit_files(self, paths, message):
+        """Stages and commits only the given files; other changes stay uncommitted. Returns the sha."""
+        rel = [os.path.relpath(os.path.abspath(p), self.repo.working_dir) for p in paths]
+        self.repo.git.add("--", *rel)
+        self.repo.git.commit("-m", message, "--", *rel)
+        return self.repo.head.commit.hexsha
+
+    @tracing.traced("git.show")
     def get_last_commit_diff(self):
         """Returns the diff of the last commit."""
         try:
@@ -1,79 +1,259 @@
 import os
+import re
 import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, List
-
-try:
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import JsonOutputParser
-except ImportError:
-    from langchain.prompts import ChatPromptTemplate
-    from langchain.output_parsers import JsonOutputParser
+from typing import Optional, Dict, List, Tuple
 
 from pydantic import BaseModel, Field
 from src.ai_provider import AIProvider
-from src.daily_report.git_manager import GitManager
+from src.daily_report.git_manager import GitManager, format_changes
+from src.daily_report.compaction import maybe_compact
+from src.telemetry import estimate_tokens
 from src import config
+from src import tracing
 
 class ReportStructure(BaseModel):
     summary: str = Field(description="The markdown summary content of the report. Use ## for section headers.")
     topic: str = Field(description="A short, relevant topic title for the report (3-5 words), e.g. 'Refactored Auth Logic'")
     tags: List[str] = Field(description="A list of relevant tags for the report, e.g. ['refactor', 'auth', 'bugfix']")
 
-def generate_report_content() -> Optional[Dict]:
+REPORT_PROMPT = (
+    "You are a helpful assistant for a developer. "
+    "Analyze the following git changes ({source}) and generate a structured report.\n\n"
+    "CHANGES:\n{diff}\n\n"
+    "{format_instructions}\n"
+    "Focus on the content and meaning of the changes. The summary should be concise but informative."
+)
+
+# Map step: one partial summary per chunk of files
+MAP_PROMPT = (
+    "You are a helpful assistant for a developer. "
+    "Below is part {part} of {parts} of today's git changes ({source}).\n"
+    "List the meaningful changes as concise markdown bullet points, grouped by file or folder. "
+    "Mention what changed and why it matters; skip formatting-only edits.\n\n"
+    "CHANGES:\n{diff}"
+)
+
+# Reduce step: partial summaries -> ReportStructure
+REDUCE_PROMPT = (
+    "You are a helpful assistant for a developer. "
+    "The git changes ({source}) were too large to read at once, so each part was summarized separately. "
+    "Combine these partial summaries into one structured report covering ALL of them.\n\n"
+    "PARTIAL SUMMARIES:\n{summaries}\n\n"
+    "{format_instructions}\n"
+    "Focus on the content and meaning of the changes. The summary should be concise but informative."
+)
+
+DIFF_SECTION_RE = re.compile(r'^diff --git a/.* b/(.*?)\s*$', re.MULTILINE)
+
+
+def _group_key(path: str) -> str:
+    """Files are chunked by top-level folder so related changes are summarized together."""
+    parts = path.replace("\\", "/").split("/")
+    return parts[0] if len(parts) > 1 else "."
+
+
+def record_sections(records: List[Dict]) -> List[Tuple[str, str]]:
+    """(group, text) per changed file, from GitManager.collect_changes()."""
+    return sorted(((_group_key(r["path"]), format_changes([r])) for r in records), key=lambda s: s[0])
+
+
+def diff_sections(diff_text: str) -> List[Tuple[str, str]]:
+    """(group, text) per file of a plain `git show`/`git diff` output."""
+    starts = [m.start() for m in DIFF_SECTION_RE.finditer(diff_text)]
+    if not starts:
+        return [(".", diff_text)]
+    sections = []
+    if diff_text[:starts[0]].strip():
+        sections.append((".", diff_text[:starts[0]]))  # commit header / stat
+    for begin, end in zip(starts, starts[1:] + [len(diff_text)]):
+        text = diff_text[begin:end]
+        sections.append((_group_key(DIFF_SECTION_RE.match(text).group(1)), text))
+    return sections
+
+
+def _split_section(text: str, max_chars: int) -> List[str]:
+    """Splits one file's section at line boundaries; later pieces repeat its header line."""
+    if len(text) <= max_chars:
+        return [text]
+    header, _, body = text.partition("\n")
+    cont = f"{header} (continued)"
+    room = max(1, max_chars - len(cont) - 1)
+    pieces, current, size = [], [header], len(header)
+    for line in body.splitlines():
+        while len(line) > room:  # a single overlong line (minified files)
+            pieces.append("\n".join(current))
+            pieces.append(f"{cont}\n{line[:room]}")
+            line = line[room:]
+            current, size = [cont], len(cont)
+        if size + len(line) + 1 > max_chars:
+            pieces.append("\n".join(current))
+            current, size = [cont], len(cont)
+        current.append(line)
+        size += len(line) + 1
+    if len(current) > 1:
+        pieces.append("\n".join(current))
+    return [p for p in pieces if p not in (header, cont)]
+
+
+def pack_chunks(sections: List[Tuple[str, str]], max_tokens: int) -> List[str]:
+    """
+    Packs sections (ordered by folder) into chunks of at most ~max_tokens each.
+    A section larger than a chunk is split across consecutive chunks.
+    """
+    max_chars = max_tokens * 4
+    chunks, current, size = [], [], 0
+    for _, section in sections:
+        for text in _split_section(section, max_chars):
+            if current and size + len(text) > max_chars:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(text)
+            size += len(text) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+@tracing.traced("report.map")
+def _summarize_chunks(chunks: List[str], source: str, prompt: str = MAP_PROMPT) -> List[str]:
+    """
+    Map step: summarizes all chunks concurrently (REPORT_WORKERS calls in flight).
+    `prompt` takes the same variables as MAP_PROMPT: part, parts, source, diff.
+    """
+    try:
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import StrOutputParser
+    except ImportError:
+        from langchain.prompts import ChatPromptTemplate
+        from langchain.schema.output_parser import StrOutputParser
+
+    llm = AIProvider.get_llm(subsystem="daily.reporter.map")
+    chain = ChatPromptTemplate.from_template(prompt) | llm | StrOutputParser()
+
+    def summarize(indexed):
+        i, chunk = indexed
+        try:
+            return chain.invoke({"part": i + 1, "parts": len(chunks), "source": source, "diff": chunk})
+        except Exception as e:
+            print(f"Error summarizing part {i + 1}: {e}")
+            # Keep the file names so the reduce step still knows these changed
+            headers = [l for l in chunk.splitlines() if l.startswith(("--- ", "diff --git"))]
+            return "Unsummarized changes:\n" + "\n".join(headers)
+
+    with ThreadPoolExecutor(max_workers=max(1, config.REPORT_WORKERS), thread_name_prefix="reporter") as pool:
+        return list(pool.map(summarize, enumerate(chunks)))
+
+
+def generate_report_content(mode: str = "auto", compact: Optional[bool] = None) -> Optional[Dict]:
+    """
+    mode: "single" sends the (budgeted) changes in one prompt; "map-reduce" summarizes
+    token-bounded chunks concurrently and reduces them into the report; "auto" uses a
+    single prompt when the changes fit in REPORT_DIFF_TOTAL_BYTES, map-reduce otherwise.
+    compact: reduce the changes to meaningful lines first (default: REPORT_COMPACT).
+    """
     print("Generating Summary Report...")
-    
+
     try:
         manager = GitManager()
     except Exception as e:
         print(f"Failed to initialize GitManager: {e}")
         return None
-    
-    # Get Changes
-    diff_text = manager.get_current_changes()
+
+    # Get Changes (per-file records, read within the REPORT_DIFF_* byte budgets;
+    # map-reduce can cover a much larger change set, and more of each file)
+    if mode == "single":
+        records = manager.collect_changes()
+    else:
+        records = manager.collect_changes(file_budget=config.REPORT_MAP_FILE_BYTES,
+                                          total_budget=config.REPORT_MAP_TOTAL_BYTES)
+    if records:
+        read = sum(r["bytes"] for r in records)
+        skipped = sum(1 for r in records if r["skipped"])
+        print(f"Collected {len(records)} changed files ({read} bytes read, {skipped} not read).")
+    records = maybe_compact(records, compact)
+    diff_text = format_changes(records)
     if not diff_text.strip():
         print("No current changes found. Checking last commit...")
         diff_text = manager.get_last_commit_diff()
+        sections = diff_sections(diff_text)
         source = "Last Commit"
     else:
+        sections = record_sections(records)
         source = "Current Working Directory"
 
     if not diff_text.strip():
         print("No changes found in git history to summarize.")
         return None
 
+    if mode == "auto":
+        mode = "single" if len(diff_text) <= config.REPORT_DIFF_TOTAL_BYTES else "map-reduce"
+
     # Summarize with LLM
     try:
-        llm = AIProvider.get_llm()
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import JsonOutputParser
+    except ImportError:
+        from langchain.prompts import ChatPromptTemplate
+        from langchain.output_parsers import JsonOutputParser
+
+    try:
         parser = JsonOutputParser(pydantic_object=ReportStructure)
-        
-        prompt = ChatPromptTemplate.from_template(
-            "You are a helpful assistant for a developer. "
-            "Analyze the following git changes ({source}) and generate a structured report.\n\n"
-            "CHANGES:\n{diff}\n\n"
-            "{format_instructions}\n"
-            "Focus on the content and meaning of the changes. The summary should be concise but informative."
-        )
-        
+
+        if mode == "map-reduce":
+            chunks = pack_chunks(sections, config.REPORT_CHUNK_TOKENS)
+            print(f"Map-reduce: {len(chunks)} chunks (~{estimate_tokens(len(diff_text))} tokens of changes).")
+            summaries = _summarize_chunks(chunks, source)
+            llm = AIProvider.get_llm(subsystem="daily.reporter.reduce")
+            chain = ChatPromptTemplate.from_template(REDUCE_PROMPT) | llm | parser
+            with tracing.span("report.reduce", parts=len(summaries)):
+                return chain.invoke({
+                    "summaries": "\n\n".join(f"### Part {i + 1}\n{s}" for i, s in enumerate(summaries)),
+                    "source": source,
+                    "format_instructions": parser.get_format_instructions()
+                })
+
+        llm = AIProvider.get_llm(subsystem="daily.reporter")
+        prompt = ChatPromptTemplate.from_template(REPORT_PROMPT)
+
         chain = prompt | llm | parser
-        
+
         # Truncate diff if too large to avoid context window issues
-        safe_diff = diff_text[:15000]
-        
-        result = chain.invoke({
-            "diff": safe_diff, 
-            "source": source,
-            "format_instructions": parser.get_format_instructions()
-        })
-        
+        safe_diff = diff_text[:config.REPORT_DIFF_TOTAL_BYTES]
+
+        with tracing.span("report.single", chars=len(safe_diff)):
+            result = chain.invoke({
+                "diff": safe_diff,
+                "source": source,
+                "format_instructions": parser.get_format_instructions()
+            })
+
         # Result should be a dict matching ReportStructure
         return result
-        
+
     except Exception as e:
         print(f"Error generating summary with LLM: {e}")
         return None
 
 if __name__ == "__main__":
-    report_data = generate_report_content()
+    arg_parser = argparse.ArgumentParser(description="Summarize current git changes.")
+    arg_parser.add_argument("--mode", choices=["auto", "single", "map-reduce"], default="auto",
+                            help="Single prompt, map-reduce over chunks, or pick by size (default).")
+    arg_parser.add_argument("--no-compact", action="store_true",
+                            help="Send raw diffs instead of the compacted changes.")
+    arg_parser.add_argument("--since", metavar="DATE", help="Report on the commits since DATE (e.g. 2026-10-01).")
+    arg_parser.add_argument("--range", metavar="A..B", dest="rev_range", help="Report on the commits in a git range.")
+    tracing.add_profile_argument(arg_parser)
+    args = arg_parser.parse_args()
+    tracing.configure(args.profile, "reporter")
+    with tracing.span("report"):
+        if args.since or args.rev_range:
+            from src.daily_report.commit_summaries import generate_range_report
+            report_data = generate_range_report(since=args.since, rev_range=args.rev_range,
+                                                compact=False if args.no_compact else None)
+        else:
+            report_data = generate_report_content(mode=args.mode, compact=False if args.no_compact else None)
     if report_data:
         print(json.dumps(report_data, indent=2))
@@ -6,6 +6,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from src import config
+from src import tracing
 from src.gui.storage import ChatManager, ReportManager
 from src.gui.tabs.chat import render_chat_tab
 from src.gui.tabs.report import render_report_tab
@@ -13,16 +14,20 @@ from src.gui.tabs.tagger import render_tagger_tab
 
 st.set_page_config(page_title="Obsidian AI Agent", page_icon="🧠", layout="wide")
 
+# PROFILE=1: spans of every rerun go to one trace, rewritten after each rerun
+tracing.configure(None, "gui")
+
 st.title("🧠 Obsidian AI Agent")
 
 # Sidebar for config/status
 with st.sidebar:
     st.header("Configuration")
-    st.text(f"Provider: {os.getenv('AI_PROVIDER', 'Not Set')}")
+    st.text(f"Provider: {config.AI_PROVIDER}")
     st.text(f"Vault: {config.VAULT_ABS_PATH}")
     
     if st.button("Refresh Config"):
-        st.experimental_rerun()
+        config.reload()
+        st.rerun()
 
 # Initialize Managers
 if "chat_manager" not in st.session_state:
@@ -39,13 +44,16 @@ if "active_report_path" not in st.session_state:
 # Tabs
 tab_chat, tab_report, tab_tagger = st.tabs(["💬 Chat (RAG)", "📅 Reports", "🏷️ Auto-Tagger"])
 
-with tab_chat:
-    render_chat_tab()
+try:
+    with tab_chat, tracing.span("gui.chat"):
+        render_chat_tab()
 
-with tab_report:
-    render_report_tab()
+    with tab_report, tracing.span("gui.reports"):
+        render_report_tab()
 
-with tab_tagger:
-    render_tagger_tab()
+    with tab_tagger, tracing.span("gui.tagger"):
+        render_tagger_tab()
+finally:
+    tracing.flush()
 
 
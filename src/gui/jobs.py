@@ -0,0 +1,307 @@
+"""
+Background tagger scans for the GUI.
+
+A scan runs TagPipeline in a worker thread, so the Streamlit script returns
+immediately and only polls the job. Every analyzed note is appended to
+SCANS_DIR/<id>.jsonl as it arrives and the job's progress to <id>.json, so
+reruns, navigating away or restarting the app don't lose the results: a scan
+that was interrupted can be reviewed as it is, or resumed (notes analyzed
+successfully are not analyzed again; failed ones are retried). Jobs are
+process-wide, shared by all sessions.
+"""
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src import config
+from src.gui.storage import DATA_DIR, _atomic_write
+
+SCANS_DIR = DATA_DIR / "tag_scans"
+# Finished scans kept on disk (the newest one is offered after a restart)
+KEEP_SCANS = 5
+# How often progress is written to <id>.json while a scan runs
+STATE_INTERVAL = 1.0
+
+RUNNING = "running"
+FINISHED = ("done", "cancelled", "failed", "interrupted")
+
+
+class ScanJob:
+    """
+    One tagger scan: state (status, counts, throughput) plus the analyzed notes.
+    Records have the keys of the review list: file, current, suggested, added,
+    removed, index, ok.
+    """
+
+    def __init__(self, job_id: str, folder: str = "", force: bool = False, local_maturity: bool = False,
+                 scans_dir: Path = SCANS_DIR):
+        self.scans_dir = Path(scans_dir)
+        self.state = {
+            "id": job_id, "folder": folder, "force": force, "local_maturity": local_maturity,
+            "status": "new", "message": "", "error": None,
+            "total": 0, "done": 0, "skipped": 0, "rate": 0.0,
+            "started_at": None, "finished_at": None,
+        }
+        self.records: List[Dict] = []
+        self.scanner = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pipeline = None
+
+    @property
+    def id(self) -> str:
+        return self.state["id"]
+
+    @property
+    def log_path(self) -> Path:
+        return self.scans_dir / f"{self.id}.jsonl"
+
+    @property
+    def state_path(self) -> Path:
+        return self.scans_dir / f"{self.id}.json"
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # --- Persistence ---
+
+    @classmethod
+    def load(cls, job_id: str, scans_dir: Path = SCANS_DIR) -> Optional["ScanJob"]:
+        """A scan from disk; one that was running when the app stopped becomes 'interrupted'."""
+        scans_dir = Path(scans_dir)
+        try:
+            with open(scans_dir / f"{job_id}.json", 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        job = cls(job_id, scans_dir=scans_dir)
+        job.state.update(state)
+        if job.state["status"] not in FINISHED:
+            job.state["status"] = "interrupted"
+            job.state["message"] = "Interrupted; resume to scan the remaining notes."
+        records: Dict[str, Dict] = {}
+        try:
+            with open(job.log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = _from_json(json.loads(line))
+                    except (ValueError, KeyError):
+                        break  # torn last line
+                    records[str(record["file"])] = record  # a retried note's latest result wins
+        except OSError:
+            pass
+        job.records = list(records.values())
+        job.state["done"] = len(job.records)
+        return job
+
+    def _save_state(self):
+        with self._lock:
+            text = json.dumps(self.state, indent=2)
+        self.scans_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.state_path, text)
+
+    def _append(self, log, record: Dict):
+        log.write(json.dumps(_to_json(record)) + "\n")
+        log.flush()
+
+    # --- Control ---
+
+    def start(self):
+        """Starts (or resumes) the scan in a background thread."""
+        if self.running:
+            return
+        self._cancelled.clear()
+        with self._lock:
+            self.state.update(status=RUNNING, message="Initializing scanner...", error=None,
+                              started_at=self.state["started_at"] or time.time(), finished_at=None)
+        self._save_state()
+        self._thread = threading.Thread(target=self._run, name=f"tag-scan-{self.id}", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Stops after the notes in flight (their results are recorded too); results so far are kept."""
+        self._cancelled.set()
+        pipeline = self._pipeline
+        if pipeline is not None:
+            pipeline.cancel()
+
+    def snapshot(self) -> Tuple[Dict, List[Dict]]:
+        """(state, notes with suggested changes in vault order), safe to call while running."""
+        with self._lock:
+            state = dict(self.state)
+            changes = [r for r in self.records if r["ok"] and (r["added"] or r["removed"])]
+        changes.sort(key=lambda r: r["index"])
+        return state, changes
+
+    # --- Worker ---
+
+    def _run(self):
+        from src.tagging.auto_tag import TagScanner, TagSuggester, TagCache
+        from src.tagging.pipeline import TagPipeline
+        from src.tagging.vocabulary import load_vocabulary
+
+        cache = None
+        try:
+            scanner = TagScanner(config.VAULT_ABS_PATH)
+            scanner.build_index()
+            self.scanner = scanner
+            suggester = TagSuggester()
+            if not suggester.llm:
+                raise RuntimeError("LLM not initialized. Check provider settings.")
+
+            folder = self.state["folder"]
+            if folder:
+                target_dir = Path(config.VAULT_ABS_PATH) / folder
+                if not target_dir.exists():
+                    raise RuntimeError(f"Folder '{folder}' does not exist.")
+                files = scanner.snapshot.files(folder=target_dir)
+            else:
+                files = scanner.get_all_markdown_files()
+
+            # Resume: notes analyzed successfully keep their results; failed ones are retried
+            with self._lock:
+                self.records = [r for r in self.records if r["ok"]]
+            processed = {str(r["file"]) for r in self.records}
+            remaining = [f for f in files if str(f) not in processed]
+            positions = {str(f): i for i, f in enumerate(files)}
+
+            maturity = None
+            if self.state["local_maturity"]:
+                from src.tagging.maturity import load_or_fit
+                maturity = load_or_fit(scanner)
+            cache = None if self.state["force"] else TagCache()
+            pipeline = TagPipeline(scanner, suggester, scanner.get_top_tags(50), cache=cache,
+                                   workers=config.TAG_WORKERS, maturity=maturity,
+                                   vocabulary=load_vocabulary(scanner))
+            self._pipeline = pipeline
+            with self._lock:
+                self.state.update(total=len(processed) + len(remaining), done=len(self.records), skipped=0,
+                                  message=f"Scanning {len(remaining)} notes...")
+            self._save_state()
+
+            saved_at = time.monotonic()
+            self.scans_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as log:
+                for item in ([] if self._cancelled.is_set() else pipeline.run(remaining, ordered=False)):
+                    if self._cancelled.is_set():
+                        pipeline.cancel()  # also when cancel() came before the pipeline started
+                    record = {
+                        "index": positions[str(item["file"])], "file": item["file"], "ok": bool(item["result"]),
+                        "current": item["current"], "suggested": item["suggested"],
+                        "added": item["added"], "removed": item["removed"],
+                    }
+                    self._append(log, record)
+                    with self._lock:
+                        self.records.append(record)
+                        self.state.update(done=len(self.records), skipped=pipeline.skipped,
+                                          rate=pipeline.notes_per_minute,
+                                          message=f"Analyzed {item['file'].name}")
+                    if time.monotonic() - saved_at >= STATE_INTERVAL:
+                        self._save_state()
+                        saved_at = time.monotonic()
+
+            with self._lock:
+                if self._cancelled.is_set():
+                    self.state.update(status="cancelled", message="Scan cancelled; results so far are kept.")
+                else:
+                    self.state.update(status="done", message="Scan complete.")
+        except Exception as e:
+            print(f"Tagger scan {self.id} failed: {e}")
+            with self._lock:
+                self.state.update(status="failed", error=str(e), message="Scan failed.")
+        finally:
+            self._pipeline = None
+            if cache is not None:
+                cache.close()
+            with self._lock:
+                self.state["finished_at"] = time.time()
+            self._save_state()
+
+
+def _to_json(record: Dict) -> Dict:
+    return {
+        "index": record["index"], "file": str(record["file"]), "ok": record["ok"],
+        "current": sorted(record["current"]), "suggested": sorted(record["suggested"]),
+        "added": sorted(record["added"]), "removed": sorted(record["removed"]),
+    }
+
+
+def _from_json(data: Dict) -> Dict:
+    return {
+        "index": data["index"], "file": Path(data["file"]), "ok": data["ok"],
+        "current": set(data["current"]), "suggested": set(data["suggested"]),
+        "added": set(data["added"]), "removed": set(data["removed"]),
+    }
+
+
+class ScanJobs:
+    """The current tagger scan of this process (at most one runs at a time)."""
+
+    def __init__(self, scans_dir: Path = SCANS_DIR):
+        self.scans_dir = Path(scans_dir)
+        self._lock = threading.Lock()
+        self._current: Optional[ScanJob] = None
+        self._loaded = False
+
+    def current(self) -> Optional[ScanJob]:
+        """The running or most recent scan, reloaded from disk after a restart."""
+        with self._lock:
+            if self._current is None and not self._loaded:
+                self._loaded = True
+                states = sorted(self.scans_dir.glob("*.json")) if self.scans_dir.exists() else []
+                if states:
+                    self._current = ScanJob.load(states[-1].stem, self.scans_dir)
+            return self._current
+
+    def start(self, folder: str = "", force: bool = False, local_maturity: bool = False) -> ScanJob:
+        with self._lock:
+            if self._current is not None and self._current.running:
+                return self._current
+            job_id = time.strftime("%Y%m%d-%H%M%S")
+            job = ScanJob(job_id, folder, force, local_maturity, scans_dir=self.scans_dir)
+            self._current = job
+            self._loaded = True
+            self._prune(keep=job_id)
+        job.start()
+        return job
+
+    def discard(self):
+        """Forgets the current scan (after its changes were applied or dismissed)."""
+        with self._lock:
+            job = self._current
+            if job is None or job.running:
+                return
+            self._current = None
+            for path in (job.state_path, job.log_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def _prune(self, keep: str):
+        if not self.scans_dir.exists():
+            return
+        old = [p.stem for p in sorted(self.scans_dir.glob("*.json")) if p.stem != keep]
+        for job_id in old[:max(0, len(old) - KEEP_SCANS + 1)]:
+            for suffix in (".json", ".jsonl"):
+                try:
+                    (self.scans_dir / f"{job_id}{suffix}").unlink()
+                except OSError:
+                    pass
+
+
+_jobs: Optional[ScanJobs] = None
+_jobs_lock = threading.Lock()
+
+
+def get_scan_jobs() -> ScanJobs:
+    """Process-wide scan jobs, so a scan outlives reruns and browser sessions."""
+    global _jobs
+    with _jobs_lock:
+        if _jobs is None:
+            _jobs = ScanJobs()
+        return _jobs
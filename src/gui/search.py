@@ -0,0 +1,134 @@
+"""
+Full-text search over chats and reports (SQLite FTS5 in SEARCH_DB), shared by the
+Chat and Reports tabs. Chats are indexed one row per message, so a saved turn only
+inserts its new messages; reports are indexed one row per file (title, tags and
+body) and re-indexed when their mtime changes. Results are ranked with bm25 and
+come with a highlighted snippet.
+"""
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+DATA_DIR = Path(".data")
+SEARCH_DB = DATA_DIR / "search.db"
+
+SNIPPET_TOKENS = 12
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_query(text: str) -> Optional[str]:
+    """User input -> FTS5 query: every word must match, the last one as a prefix."""
+    words = TOKEN_RE.findall(text)
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+class SearchIndex:
+    def __init__(self, db_path: Path = SEARCH_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chat_fts USING fts5("
+            " session_id UNINDEXED, title, content, tokenize='unicode61 remove_diacritics 2')"
+        )
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS report_fts USING fts5("
+            " filename UNINDEXED, title, tags, body, tokenize='unicode61 remove_diacritics 2')"
+        )
+        # Which version of each report is indexed
+        self.conn.execute("CREATE TABLE IF NOT EXISTS report_state (filename TEXT PRIMARY KEY, mtime_ns INTEGER)")
+        self.conn.commit()
+
+    # --- Chats ---
+
+    def add_chat_messages(self, session_id: str, title: str, messages: Iterable[Dict], replace: bool = False):
+        """Indexes messages of a chat; replace=True drops its previously indexed messages first."""
+        rows = [(session_id, title, m.get("content", "")) for m in messages if m.get("content")]
+        with self._lock:
+            if replace:
+                self.conn.execute("DELETE FROM chat_fts WHERE session_id = ?", (session_id,))
+            self.conn.executemany("INSERT INTO chat_fts (session_id, title, content) VALUES (?, ?, ?)", rows)
+            self.conn.commit()
+
+    def remove_chat(self, session_id: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM chat_fts WHERE session_id = ?", (session_id,))
+            self.conn.commit()
+
+    def chat_count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(DISTINCT session_id) FROM chat_fts").fetchone()[0]
+
+    def search_chats(self, text: str, limit: int = 20) -> List[Dict]:
+        """Best-matching chats: [{id, title, snippet, score}], best first (title matches weigh more)."""
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = ("SELECT session_id, title, snippet(chat_fts, 2, '**', '**', '…', ?), bm25(chat_fts, 0, 5.0, 1.0) AS score"
+               " FROM chat_fts WHERE chat_fts MATCH ? ORDER BY score LIMIT ?")
+        with self._lock:
+            rows = self.conn.execute(sql, (SNIPPET_TOKENS, query, limit * 5)).fetchall()
+        results, seen = [], set()
+        for session_id, title, snippet, score in rows:
+            if session_id in seen:
+                continue
+            seen.add(session_id)
+            results.append({"id": session_id, "title": title, "snippet": snippet, "score": score})
+            if len(results) >= limit:
+                break
+        return results
+
+    # --- Reports ---
+
+    def index_report(self, path: Path, title: str, tags: List[str], body: str, mtime_ns: Optional[int] = None):
+        filename = Path(path).name
+        with self._lock:
+            self.conn.execute("DELETE FROM report_fts WHERE filename = ?", (filename,))
+            self.conn.execute("INSERT INTO report_fts (filename, title, tags, body) VALUES (?, ?, ?, ?)",
+                              (filename, title, " ".join(tags), body))
+            self.conn.execute("INSERT OR REPLACE INTO report_state (filename, mtime_ns) VALUES (?, ?)",
+                              (filename, mtime_ns))
+            self.conn.commit()
+
+    def remove_report(self, filename: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM report_fts WHERE filename = ?", (filename,))
+            self.conn.execute("DELETE FROM report_state WHERE filename = ?", (filename,))
+            self.conn.commit()
+
+    def report_mtimes(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT filename, mtime_ns FROM report_state"))
+
+    def search_reports(self, text: str, limit: int = 20) -> List[Dict]:
+        """Best-matching reports: [{filename, title, snippet, score}], best first."""
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = ("SELECT filename, title, snippet(report_fts, 3, '**', '**', '…', ?),"
+               " bm25(report_fts, 0, 5.0, 3.0, 1.0) AS score"
+               " FROM report_fts WHERE report_fts MATCH ? ORDER BY score LIMIT ?")
+        with self._lock:
+            rows = self.conn.execute(sql, (SNIPPET_TOKENS, query, limit)).fetchall()
+        return [{"filename": f, "title": t, "snippet": s, "score": score} for f, t, s, score in rows]
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Process-wide search index (one SQLite connection shared by both tabs)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
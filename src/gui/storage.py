@@ -1,95 +1,395 @@
 import os
+import re
 import json
-import glob
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from src import config
+from src.gui.search import SearchIndex, get_search_index
 
 DATA_DIR = Path(".data")
 CHATS_DIR = DATA_DIR / "chats"
+CHATS_INDEX_DB = DATA_DIR / "chats.db"
+META_SUFFIX = ".meta.json"
+# Logs are compacted once they hold more dead records than this (and than live ones)
+COMPACT_MIN_DEAD = 20
 REPORTS_META_FILE = DATA_DIR / "reports_meta.json"
+# Report bodies kept in memory, and how often an unchanged folder is re-checked for in-place edits
+REPORT_CONTENT_CACHE_SIZE = 32
+CATALOG_RECHECK_SECONDS = 5
+REPORT_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+PREVIEW_CHARS = 50
+
+
+def _like_pattern(text: str) -> str:
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+class ChatIndex:
+    """
+    Chat metadata (title, timestamps, pin, preview) in SQLite, so the history list is
+    one paginated query instead of parsing every chat file. Kept up to date by
+    ChatManager on save, delete and pin; sync() picks up files changed outside the GUI.
+    """
+    def __init__(self, db_path: Path = CHATS_INDEX_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chats ("
+            " id TEXT PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " created_at TEXT, updated_at TEXT,"
+            " pinned INTEGER NOT NULL DEFAULT 0,"
+            " preview TEXT,"
+            " message_count INTEGER,"
+            " mtime_ns INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS chats_order ON chats (pinned DESC, updated_at DESC)")
+        self.conn.commit()
+
+    def upsert(self, meta: Dict, mtime_ns: Optional[int] = None):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO chats (id, title, created_at, updated_at, pinned, preview, message_count, mtime_ns)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (meta["id"], meta.get("title", "Untitled"), meta.get("created_at", ""), meta.get("updated_at", ""),
+                 int(bool(meta.get("pinned"))), meta.get("preview", ""), meta.get("message_count", 0), mtime_ns)
+            )
+            self.conn.commit()
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM chats WHERE id = ?", (session_id,))
+            self.conn.commit()
+
+    def mtimes(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            return dict(self.conn.execute("SELECT id, mtime_ns FROM chats"))
+
+    def _where(self, query: Optional[str]) -> Tuple[str, tuple]:
+        if not query:
+            return "", ()
+        return " WHERE title LIKE ? ESCAPE '\\'", (_like_pattern(query),)
+
+    def list(self, query: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Chats whose title contains `query` (case-insensitive), pinned first, then newest."""
+        where, params = self._where(query)
+        sql = ("SELECT id, title, updated_at, pinned, preview FROM chats" + where +
+               " ORDER BY pinned DESC, updated_at DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self.conn.execute(sql, params + (limit if limit is not None else -1, offset)).fetchall()
+        return [{"id": r[0], "title": r[1], "updated_at": r[2], "pinned": bool(r[3]), "preview": r[4]} for r in rows]
+
+    def count(self, query: Optional[str] = None) -> int:
+        where, params = self._where(query)
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chats" + where, params).fetchone()[0]
+
+
+def _message_hash(message: Dict) -> str:
+    return hashlib.blake2b(json.dumps(message, sort_keys=True).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _atomic_write(path: Path, text: str):
+    """Temp file + fsync + rename: readers see the old or the new file, never a torn one."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
 
 class ChatManager:
-    def __init__(self):
+    """
+    Chats are stored log-structured: `<id>.jsonl` gets one record appended per new
+    message, and `<id>.meta.json` holds the title, timestamps, pin and counts. Saving
+    a turn appends only the new messages; pinning rewrites only the small meta file.
+    Logs with dead records (a replaced history, a torn last line) are compacted in
+    the background.
+    """
+    def __init__(self, index: Optional[ChatIndex] = None, search: Optional[SearchIndex] = None):
         CHATS_DIR.mkdir(parents=True, exist_ok=True)
-        
+        self.index = index or ChatIndex()
+        self.search = search or get_search_index()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-compact")
+        self._migrate_legacy()
+        self.sync()
+        if self.index.count() and not self.search.chat_count():
+            # Chats saved before full-text search existed
+            for chat in self.index.list():
+                self._reindex(chat["id"])
+
+    def _reindex(self, session_id: str):
+        data = self.load_chat(session_id)
+        if data:
+            self.search.add_chat_messages(session_id, data.get("title", ""), data["messages"], replace=True)
+
+    @staticmethod
+    def _log_path(session_id: str) -> Path:
+        return CHATS_DIR / f"{session_id}.jsonl"
+
+    @staticmethod
+    def _meta_path(session_id: str) -> Path:
+        return CHATS_DIR / f"{session_id}{META_SUFFIX}"
+
+    def _lock(self, session_id: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(session_id, threading.Lock())
+
+    def _load_meta(self, session_id: str) -> Optional[Dict]:
+        try:
+            with open(self._meta_path(session_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, meta: Dict):
+        _atomic_write(self._meta_path(meta["id"]), json.dumps(meta))
+        self.index.upsert(meta, self._mtime_ns(meta["id"]))
+
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def _append(self, session_id: str, records: List[Dict]):
+        """Appends whole records with one write (O_APPEND) and fsyncs them."""
+        if not records:
+            return
+        fd = os.open(self._log_path(session_id), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, b"".join(self._encode(r) for r in records))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _read_log(self, session_id: str) -> Tuple[List[Dict], int]:
+        """Streams the log. Returns (live messages, records read incl. dead/torn ones)."""
+        messages: List[Dict] = []
+        records = 0
+        try:
+            with open(self._log_path(session_id), 'r', encoding='utf-8') as f:
+                for line in f:
+                    records += 1
+                    if not line.endswith("\n"):
+                        break  # torn last write
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("op") == "reset":
+                        messages = []
+                    else:
+                        messages.append(record.get("message", record))
+        except OSError:
+            pass
+        return messages, records
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
     def save_chat(self, session_id: str, messages: List[Dict], title: str = None):
-        """Saves a chat session."""
-        file_path = CHATS_DIR / f"{session_id}.json"
-        
-        # Load existing to preserve creation time/title if not provided
-        data = {
-            "id": session_id,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat(),
-            "title": title or "New Chat",
-            "pinned": False,
-            "messages": messages
-        }
-        
-        if file_path.exists():
-            try:
-                with open(file_path, 'r') as f:
-                    existing = json.load(f)
-                data['created_at'] = existing.get('created_at', data['created_at'])
-                data['pinned'] = existing.get('pinned', False)
-                if not title: 
-                    data['title'] = existing.get('title', "New Chat")
-            except:
-                pass
-        
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        """Saves a chat session: appends the messages not yet persisted."""
+        with self._lock(session_id):
+            now = datetime.now().isoformat()
+            meta = self._load_meta(session_id) or {
+                "id": session_id,
+                "created_at": now,
+                "title": "New Chat",
+                "pinned": False,
+                "message_count": 0,
+                "records": 0,
+                "log_bytes": 0,
+            }
+            if self._size(self._log_path(session_id)) != meta.get("log_bytes", 0):
+                # Interrupted between log and meta writes, or a torn last record: recover from the log
+                self._rewrite(session_id, meta)
+
+            count = meta.get("message_count", 0)
+            retitled = bool(title) and title != meta["title"] and count > 0
+            if len(messages) >= count and (count == 0 or _message_hash(messages[count - 1]) == meta.get("tail_hash")):
+                new = [{"message": m} for m in messages[count:]]
+                indexed = messages[count:]
+            else:
+                # History was replaced or edited: start over in the same log
+                new = [{"op": "reset"}] + [{"message": m} for m in messages]
+                indexed = None
+            self._append(session_id, new)
+            if indexed is None or retitled:
+                self.search.add_chat_messages(session_id, title or meta["title"], messages, replace=True)
+            else:
+                self.search.add_chat_messages(session_id, title or meta["title"], indexed)
+
+            meta["updated_at"] = now
+            if title:
+                meta["title"] = title
+            meta["message_count"] = len(messages)
+            meta["records"] = meta.get("records", 0) + len(new)
+            meta["log_bytes"] = self._size(self._log_path(session_id))
+            meta["tail_hash"] = _message_hash(messages[-1]) if messages else None
+            meta["preview"] = messages[-1]["content"][:PREVIEW_CHARS] if messages else ""
+            self._save_meta(meta)
+
+        if meta["records"] - meta["message_count"] > max(COMPACT_MIN_DEAD, meta["message_count"]):
+            self._compactor.submit(self.compact, session_id)
+
+    def _rewrite(self, session_id: str, meta: Dict) -> bool:
+        """Rewrites the log with only its live messages, atomically, and updates `meta` (not saved)."""
+        messages, records = self._read_log(session_id)
+        rewrite = records != len(messages)
+        if rewrite:
+            text = b"".join(self._encode({"message": m}) for m in messages).decode("utf-8")
+            _atomic_write(self._log_path(session_id), text)
+        meta["message_count"] = len(messages)
+        meta["records"] = len(messages)
+        meta["log_bytes"] = self._size(self._log_path(session_id))
+        meta["tail_hash"] = _message_hash(messages[-1]) if messages else None
+        return rewrite
+
+    def compact(self, session_id: str) -> bool:
+        """Drops dead records from a chat log. Returns True if the log was rewritten."""
+        with self._lock(session_id):
+            meta = self._load_meta(session_id)
+            if meta is None:
+                return False
+            rewritten = self._rewrite(session_id, meta)
+            self._save_meta(meta)
+            return rewritten
 
     def load_chat(self, session_id: str) -> Optional[Dict]:
-        file_path = CHATS_DIR / f"{session_id}.json"
-        if not file_path.exists():
+        meta = self._load_meta(session_id)
+        if meta is None:
             return None
+        messages, _ = self._read_log(session_id)
+        return {**meta, "messages": messages}
+
+    def _migrate_legacy(self):
+        """One-time conversion of `<id>.json` (whole session per file) to log + meta."""
+        migrated = 0
+        for path in CHATS_DIR.glob("*.json"):
+            if path.name.endswith(META_SUFFIX):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                session_id = data.get("id") or path.stem
+                messages = data.get("messages") or []
+                text = b"".join(self._encode({"message": m}) for m in messages).decode("utf-8")
+                _atomic_write(self._log_path(session_id), text)
+                meta = {
+                    "id": session_id,
+                    "created_at": data.get("created_at", ""),
+                    "updated_at": data.get("updated_at", ""),
+                    "title": data.get("title", "Untitled"),
+                    "pinned": data.get("pinned", False),
+                    "message_count": len(messages),
+                    "records": len(messages),
+                    "log_bytes": self._size(self._log_path(session_id)),
+                    "tail_hash": _message_hash(messages[-1]) if messages else None,
+                    "preview": messages[-1]["content"][:PREVIEW_CHARS] if messages else "",
+                }
+                self._save_meta(meta)
+                self.search.add_chat_messages(session_id, meta["title"], messages, replace=True)
+                path.rename(path.with_name(path.name + ".bak"))
+                migrated += 1
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Could not migrate chat {path}: {e}")
+        if migrated:
+            print(f"Migrated {migrated} chats to the append-only format.")
+
+    def sync(self) -> int:
+        """Indexes chats added or changed outside the GUI and drops deleted ones. Returns the changes."""
+        indexed = self.index.mtimes()
+        seen = set()
+        changed = 0
+        with os.scandir(CHATS_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith(META_SUFFIX):
+                    continue
+                session_id = entry.name[:-len(META_SUFFIX)]
+                seen.add(session_id)
+                mtime_ns = entry.stat().st_mtime_ns
+                if indexed.get(session_id) == mtime_ns:
+                    continue
+                meta = self._load_meta(session_id)
+                if meta:
+                    self.index.upsert(meta, mtime_ns)
+                    self._reindex(session_id)
+                    changed += 1
+        for session_id in set(indexed) - seen:
+            self.index.remove(session_id)
+            self.search.remove_chat(session_id)
+            changed += 1
+        return changed
+
+    def _mtime_ns(self, session_id: str) -> Optional[int]:
         try:
-            with open(file_path, 'r') as f:
-                return json.load(f)
-        except:
+            return self._meta_path(session_id).stat().st_mtime_ns
+        except OSError:
             return None
 
-    def list_chats(self) -> List[Dict]:
-        """Returns metadata for all chats, sorted by Pinned > Updated."""
-        chats = []
-        for f in CHATS_DIR.glob("*.json"):
-            try:
-                with open(f, 'r') as file:
-                    data = json.load(file)
-                    # Minimal metadata for list
-                    chats.append({
-                        "id": data["id"],
-                        "title": data.get("title", "Untitled"),
-                        "updated_at": data.get("updated_at", ""),
-                        "pinned": data.get("pinned", False),
-                        "preview": data["messages"][-1]["content"][:50] if data.get("messages") else ""
-                    })
-            except:
-                continue
-                
-        # Sort: Pinned (True > False), then Updated (Newest > Oldest)
-        chats.sort(key=lambda x: (not x["pinned"], x["updated_at"]), reverse=True)
-        return chats
+    def list_chats(self, query: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Returns metadata for chats (title filter, one page), sorted by Pinned > Updated."""
+        return self.index.list(query, limit, offset)
+
+    def count_chats(self, query: Optional[str] = None) -> int:
+        return self.index.count(query)
 
     def delete_chat(self, session_id: str):
-        file_path = CHATS_DIR / f"{session_id}.json"
-        if file_path.exists():
-            file_path.unlink()
+        with self._lock(session_id):
+            legacy = CHATS_DIR / f"{session_id}.json.bak"
+            for path in (self._log_path(session_id), self._meta_path(session_id), legacy):
+                if path.exists():
+                    path.unlink()
+        self.index.remove(session_id)
+        self.search.remove_chat(session_id)
+
+    def search_chats(self, text: str, limit: int = 20) -> List[Dict]:
+        """Chats ranked by full-text match on titles and messages, with a highlighted snippet."""
+        return self.search.search_chats(text, limit)
 
     def toggle_pin(self, session_id: str):
-        data = self.load_chat(session_id)
-        if data:
-            data['pinned'] = not data.get('pinned', False)
-            with open(CHATS_DIR / f"{session_id}.json", 'w') as f:
-                json.dump(data, f, indent=2)
+        with self._lock(session_id):
+            meta = self._load_meta(session_id)
+            if meta:
+                meta['pinned'] = not meta.get('pinned', False)
+                self._save_meta(meta)
+
 
 class ReportManager:
-    def __init__(self):
+    """
+    Reports folder with a cached catalog: one entry per report (stat, topic, tags,
+    date) parsed once and refreshed only when the folder's mtime or a file's mtime
+    changes, so listing, filtering and sorting don't touch the files. Bodies are
+    served from a small LRU cache keyed by mtime.
+    """
+    def __init__(self, search: Optional[SearchIndex] = None):
         self.reports_dir = Path(config.REPORTS_ABS_PATH)
         self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self.search = search or get_search_index()
+        self._lock = threading.RLock()
+        self._catalog: Dict[str, Dict] = {}
+        self._dir_mtime_ns: Optional[int] = None
+        self._checked_at = 0.0
+        self._contents: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
         
         # Load metadata (pins)
         self.meta = {}
@@ -99,36 +399,187 @@ class ReportManager:
                     self.meta = json.load(f)
             except:
                 self.meta = {}
+        self.sync_search()
+
+    # --- Catalog ---
+
+    def _parse_report(self, path: Path) -> Optional[Tuple[Dict, str]]:
+        """(catalog entry, body) for one report file, or None if it can't be read."""
+        from src.vault import parse_note
+        try:
+            stat = path.stat()
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError:
+            return None
+        try:
+            metadata, body = parse_note(content)
+        except Exception:
+            metadata, body = {}, content
+        tags = metadata.get("tags") or []
+        if isinstance(tags, str):
+            tags = tags.replace(",", " ").split()
+        created = str(metadata.get("creation-date") or "")
+        # Report date: frontmatter, else the YYYY-MM-DD filename prefix, else the mtime
+        match = REPORT_DATE_RE.match(created) or REPORT_DATE_RE.match(path.name)
+        date = match.group(0) if match else datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d')
+        entry = {
+            "filename": path.name,
+            "path": str(path),
+            "modified": stat.st_mtime,
+            "created": stat.st_ctime,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "topic": str(metadata.get("topic") or path.stem),
+            "tags": [str(t).lstrip("#") for t in tags],
+            "creation_date": created,
+            "date": date,
+        }
+        return entry, content
+
+    def _refresh(self, force: bool = False):
+        """
+        Re-scans the folder when its mtime changed (reports added, removed or replaced)
+        or every CATALOG_RECHECK_SECONDS (in-place edits); only files whose mtime or
+        size changed are parsed again.
+        """
+        with self._lock:
+            try:
+                dir_mtime_ns = self.reports_dir.stat().st_mtime_ns
+            except OSError:
+                self._catalog, self._dir_mtime_ns = {}, None
+                return
+            now = time.monotonic()
+            if (not force and dir_mtime_ns == self._dir_mtime_ns
+                    and now - self._checked_at < CATALOG_RECHECK_SECONDS):
+                return
+            catalog = {}
+            with os.scandir(self.reports_dir) as it:
+                for item in it:
+                    if not item.name.endswith(".md") or not item.is_file():
+                        continue
+                    stat = item.stat()
+                    old = self._catalog.get(item.name)
+                    if old and old["mtime_ns"] == stat.st_mtime_ns and old["size"] == stat.st_size:
+                        catalog[item.name] = old
+                        continue
+                    parsed = self._parse_report(Path(item.path))
+                    if parsed:
+                        catalog[item.name] = parsed[0]
+                        self._cache_content(item.name, parsed[0]["mtime_ns"], parsed[1])
+            for filename in set(self._contents) - set(catalog):
+                del self._contents[filename]
+            self._catalog = catalog
+            self._dir_mtime_ns = dir_mtime_ns
+            self._checked_at = now
+
+    def _update_entry(self, filename: str) -> Optional[Dict]:
+        """Re-reads one report into the catalog (after it was written here)."""
+        with self._lock:
+            parsed = self._parse_report(self.reports_dir / filename)
+            if not parsed:
+                self._catalog.pop(filename, None)
+                self._contents.pop(filename, None)
+                return None
+            self._catalog[filename] = parsed[0]
+            self._cache_content(filename, parsed[0]["mtime_ns"], parsed[1])
+            return parsed[0]
+
+    def _cache_content(self, filename: str, mtime_ns: int, content: str):
+        self._contents[filename] = (mtime_ns, content)
+        self._contents.move_to_end(filename)
+        while len(self._contents) > REPORT_CONTENT_CACHE_SIZE:
+            self._contents.popitem(last=False)
+
+    def list_tags(self) -> List[str]:
+        """Every tag used by a report, most used first."""
+        self._refresh()
+        counts: Dict[str, int] = {}
+        for entry in self._catalog.values():
+            for tag in entry["tags"]:
+                counts[tag] = counts.get(tag, 0) + 1
+        return sorted(counts, key=lambda t: (-counts[t], t))
+
+    # --- Search ---
+
+    def sync_search(self) -> int:
+        """(Re-)indexes reports added or changed since they were indexed; drops deleted ones."""
+        self._refresh(force=True)
+        indexed = self.search.report_mtimes()
+        changed = 0
+        for filename, entry in list(self._catalog.items()):
+            if indexed.get(filename) != entry["mtime_ns"]:
+                self._index_entry(entry)
+                changed += 1
+        for filename in set(indexed) - set(self._catalog):
+            self.search.remove_report(filename)
+            changed += 1
+        return changed
+
+    def index_report(self, filename: str):
+        """Indexes one report (title/topic, tags and body) for full-text search and updates the catalog."""
+        entry = self._update_entry(filename)
+        if not entry:
+            self.search.remove_report(filename)
+            return
+        self._index_entry(entry)
+
+    def _index_entry(self, entry: Dict):
+        from src.vault import parse_note
+        content = self.get_report_content(entry["filename"])
+        try:
+            _, body = parse_note(content)
+        except Exception:
+            body = content
+        self.search.index_report(Path(entry["path"]), entry["topic"], entry["tags"], body, entry["mtime_ns"])
+
+    def search_reports(self, text: str, limit: int = 20) -> List[Dict]:
+        """Reports ranked by full-text match on title, tags and body, with a highlighted snippet."""
+        return self.search.search_reports(text, limit)
 
     def _save_meta(self):
         REPORTS_META_FILE.parent.mkdir(parents=True, exist_ok=True)
         with open(REPORTS_META_FILE, 'w') as f:
             json.dump(self.meta, f, indent=2)
 
-    def list_reports(self) -> List[Dict]:
-        files = list(self.reports_dir.glob("*.md"))
+    def list_reports(self, tag: Optional[str] = None, since: Optional[str] = None,
+                     until: Optional[str] = None, sort: str = "modified") -> List[Dict]:
+        """
+        Catalog entries, pinned first. Filters by tag and by report date
+        (YYYY-MM-DD, inclusive); sort is "modified", "date" (newest first) or "topic".
+        """
+        self._refresh()
         reports = []
-        for f in files:
-            stat = f.stat()
-            is_pinned = self.meta.get(f.name, {}).get('pinned', False)
-            reports.append({
-                "filename": f.name,
-                "path": str(f),
-                "modified": stat.st_mtime,
-                "created": stat.st_ctime,
-                "pinned": is_pinned
-            })
-            
-        # Sort: Pinned > Modified
-        reports.sort(key=lambda x: (not x["pinned"], x["modified"]), reverse=True)
+        for entry in self._catalog.values():
+            if tag and tag not in entry["tags"]:
+                continue
+            if since and entry["date"] < since:
+                continue
+            if until and entry["date"] > until:
+                continue
+            reports.append(dict(entry, pinned=self.meta.get(entry["filename"], {}).get('pinned', False)))
+
+        if sort == "topic":
+            reports.sort(key=lambda x: (not x["pinned"], x["topic"].lower()))
+        else:
+            # Pinned > newest (by report date or mtime)
+            field = "date" if sort == "date" else "modified"
+            reports.sort(key=lambda x: (x["pinned"], x[field], x["modified"]), reverse=True)
         return reports
 
     def get_report_content(self, filename: str) -> str:
         path = self.reports_dir / filename
-        if path.exists():
-            with open(path, 'r') as f:
-                return f.read()
-        return ""
+        try:
+            stat = path.stat()
+        except OSError:
+            return ""
+        with self._lock:
+            cached = self._contents.get(filename)
+            if cached and cached[0] == stat.st_mtime_ns:
+                self._contents.move_to_end(filename)
+                return cached[1]
+            entry = self._update_entry(filename)
+            return self._contents[filename][1] if entry else ""
 
     def toggle_pin(self, filename: str):
         if filename not in self.meta:
@@ -140,6 +591,10 @@ class ReportManager:
         path = self.reports_dir / filename
         if path.exists():
             path.unlink()
+        self.search.remove_report(filename)
+        with self._lock:
+            self._catalog.pop(filename, None)
+            self._contents.pop(filename, None)
         if filename in self.meta:
             del self.meta[filename]
             self._save_meta()
@@ -2,6 +2,9 @@ import streamlit as st
 import uuid
 from src.rag.query import query_rag
 
+# Chats shown per page in the history list
+CHAT_PAGE_SIZE = 20
+
 def render_chat_tab():
     chat_manager = st.session_state.chat_manager
     
@@ -20,21 +23,50 @@ def render_chat_tab():
             st.session_state.messages = []
             st.rerun()
             
-        search_query = st.text_input("Search Chats", placeholder="Filter...")
+        search_query = st.text_input("Search Chats", placeholder="Search titles and messages...")
         
-        chats = chat_manager.list_chats()
         if search_query:
-            chats = [c for c in chats if search_query.lower() in c["title"].lower()]
-            
-        st.markdown("---")
-        for chat in chats:
-            label = f"{'📌 ' if chat['pinned'] else ''}{chat['title']}"
-            if st.button(label, key=f"chat_{chat['id']}", use_container_width=True):
-                st.session_state.active_chat_id = chat['id']
-                loaded = chat_manager.load_chat(chat['id'])
-                if loaded:
-                    st.session_state.messages = loaded['messages']
-                st.rerun()
+            # Full-text search over titles and messages, best matches first
+            st.markdown("---")
+            results = chat_manager.search_chats(search_query)
+            if not results:
+                st.caption("No matching chats.")
+            for chat in results:
+                if st.button(chat["title"], key=f"chat_hit_{chat['id']}", use_container_width=True):
+                    st.session_state.active_chat_id = chat['id']
+                    loaded = chat_manager.load_chat(chat['id'])
+                    if loaded:
+                        st.session_state.messages = loaded['messages']
+                    st.rerun()
+                st.caption(chat["snippet"])
+        else:
+            # One indexed query per rerun: this page of chats
+            total = chat_manager.count_chats()
+            pages = max(1, (total + CHAT_PAGE_SIZE - 1) // CHAT_PAGE_SIZE)
+            page = min(st.session_state.get("chat_page", 0), pages - 1)
+            chats = chat_manager.list_chats(limit=CHAT_PAGE_SIZE, offset=page * CHAT_PAGE_SIZE)
+
+            st.markdown("---")
+            if pages > 1:
+                p1, p2, p3 = st.columns([1, 2, 1])
+                with p1:
+                    if st.button("◀", key="chat_prev", disabled=page == 0):
+                        st.session_state.chat_page = page - 1
+                        st.rerun()
+                with p2:
+                    st.caption(f"Page {page + 1} of {pages} ({total} chats)")
+                with p3:
+                    if st.button("▶", key="chat_next", disabled=page >= pages - 1):
+                        st.session_state.chat_page = page + 1
+                        st.rerun()
+            for chat in chats:
+                label = f"{'📌 ' if chat['pinned'] else ''}{chat['title']}"
+                if st.button(label, key=f"chat_{chat['id']}", use_container_width=True):
+                    st.session_state.active_chat_id = chat['id']
+                    loaded = chat_manager.load_chat(chat['id'])
+                    if loaded:
+                        st.session_state.messages = loaded['messages']
+                    st.rerun()
 
     # Right: Chat Interface
     with col_chat:
@@ -7,6 +7,9 @@ from src import config
 from src.daily_report.reporter import generate_report_content
 from src.daily_report.git_manager import GitManager
 
+# Sort options of the report list -> ReportManager.list_reports(sort=...)
+REPORT_SORTS = {"Last modified": "modified", "Report date": "date", "Topic": "topic"}
+
 def render_report_tab():
     report_manager = st.session_state.report_manager
     
@@ -39,10 +42,29 @@ def render_report_tab():
 
         st.markdown("---")
         
-        search_rep = st.text_input("Search Reports", placeholder="Filter...")
-        reports = report_manager.list_reports()
+        search_rep = st.text_input("Search Reports", placeholder="Search titles, tags and content...")
         if search_rep:
-            reports = [r for r in reports if search_rep.lower() in r["filename"].lower()]
+            # Full-text search, best matches first
+            hits = report_manager.search_reports(search_rep)
+            if not hits:
+                st.caption("No matching reports.")
+            for hit in hits:
+                if st.button(hit["filename"], key=f"rep_hit_{hit['filename']}", use_container_width=True):
+                    st.session_state.active_report_path = hit["filename"]
+                    st.session_state.draft_report_data = None # Switch to view mode
+                    st.rerun()
+                st.caption(hit["snippet"])
+            reports = []
+        else:
+            f1, f2 = st.columns(2)
+            with f1:
+                tag_filter = st.selectbox("Tag", ["All tags"] + report_manager.list_tags(), key="rep_tag")
+            with f2:
+                sort_label = st.selectbox("Sort by", list(REPORT_SORTS), key="rep_sort")
+            reports = report_manager.list_reports(
+                tag=None if tag_filter == "All tags" else tag_filter,
+                sort=REPORT_SORTS[sort_label],
+            )
             
         for rep in reports:
             label = f"{'📌 ' if rep['pinned'] else ''}{rep['filename']}"
@@ -101,8 +123,10 @@ def render_report_tab():
                 report_path = os.path.join(config.REPORTS_ABS_PATH, preview_filename)
                 
                 try:
+                    config.ensure_dirs()
                     with open(report_path, 'w') as f:
                         f.write(final_file_content)
+                    report_manager.index_report(preview_filename)
                     
                     # Commit
                     git_mgr = GitManager()
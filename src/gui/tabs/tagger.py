@@ -1,103 +1,76 @@
 import streamlit as st
 from pathlib import Path
 from src import config
-from src.tagging.auto_tag import TagScanner, TagSuggester, TagCache, apply_changes
+from src.gui.jobs import get_scan_jobs, RUNNING
+from src.tagging.auto_tag import TagCache, topic_tags
+
+# How often the progress panel polls a running scan
+SCAN_REFRESH_SECONDS = 1.0
 
 def render_tagger_tab():
     st.header("Smart Auto-Tagging")
-    
+
+    jobs = get_scan_jobs()
+    job = jobs.current()
+    running = job is not None and job.running
+
     col1, col2 = st.columns([3, 1])
     with col1:
-        target_folder = st.text_input("Target Folder (optional, relative to Vault root)", placeholder="e.g., Drafts")
+        target_folder = st.text_input("Target Folder (optional, relative to Vault root)", placeholder="e.g., Drafts",
+                                      disabled=running)
     with col2:
-        force_scan = st.checkbox("Force Scan All", help="Ignore cache and rescan all files")
-
-    if st.button("Start Scan"):
-        st.write("Initializing Scanner...")
-        
-        # Setup similar to main() in auto_tag.py
-        scanner = TagScanner(config.VAULT_ABS_PATH)
-        scanner.build_index()
-        top_tags = scanner.get_top_tags(50)
-        
-        suggester = TagSuggester()
-        cache = TagCache()
-        
-        if not suggester.llm:
-            st.error("LLM not initialized. Check provider settings.")
-            st.stop()
-            
-        # Determine files
-        if target_folder:
-            target_dir = Path(config.VAULT_ABS_PATH) / target_folder
-            if not target_dir.exists():
+        force_scan = st.checkbox("Force Scan All", help="Ignore cache and rescan all files", disabled=running)
+        local_maturity = st.checkbox("Local Maturity", help="Assign maturity with the local classifier; skip the LLM for notes whose topics are unchanged",
+                                     disabled=running)
+
+    b1, b2, b3 = st.columns(3)
+    with b1:
+        if st.button("Start Scan", disabled=running, use_container_width=True):
+            if target_folder and not (Path(config.VAULT_ABS_PATH) / target_folder).exists():
                 st.error(f"Folder '{target_folder}' does not exist.")
-                st.stop()
-            files = list(target_dir.rglob("*.md"))
-        else:
-            files = scanner.get_all_markdown_files()
-            
-        st.info(f"Found {len(files)} files to scan.")
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        changes_preview = []
-        
-        for i, file_path in enumerate(files):
-            progress = (i + 1) / len(files)
-            progress_bar.progress(progress)
-            status_text.text(f"Processing {file_path.name}...")
-            
-            if not force_scan and not cache.should_process(file_path):
-                continue
-
-            current_tags = scanner.parse_tags_from_file(file_path)
-            
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            except:
-                continue
-
-            result = suggester.analyze_note(content, current_tags, top_tags)
-            
-            if result:
-                suggested_topics = set(result.get('topic_tags', []))
-                maturity_tag = result.get('maturity_tag')
-                maintenance_tag = result.get('maintenance_tag')
-                
-                new_tag_set = set(suggested_topics)
-                if maturity_tag: new_tag_set.add(maturity_tag)
-                if maintenance_tag: new_tag_set.add(maintenance_tag)
-                
-                added = new_tag_set - current_tags
-                removed = current_tags - new_tag_set
-                
-                if added or removed:
-                    changes_preview.append({
-                        "file": file_path,
-                        "current": current_tags,
-                        "suggested": new_tag_set,
-                        "added": added,
-                        "removed": removed,
-                        "content": content # needed for apply
-                    })
-
-        status_text.text("Scan complete.")
-        
-        if not changes_preview:
-            st.success("No changes suggested.")
-        else:
-            st.subheader(f"Suggested Changes ({len(changes_preview)})")
-            
-            # Store changes in session state to persist for the "Apply" button
-            st.session_state.tag_changes = changes_preview
-            
-    # Display and Apply Changes
-    if "tag_changes" in st.session_state and st.session_state.tag_changes:
-        
-        for change in st.session_state.tag_changes:
+            else:
+                # Runs in the background; this tab only polls its progress
+                jobs.start(target_folder, force_scan, local_maturity)
+                st.rerun()
+    with b2:
+        if running and st.button("Cancel Scan", use_container_width=True):
+            job.cancel()
+            st.rerun()
+    with b3:
+        resumable = job is not None and not running and job.state["status"] in ("cancelled", "interrupted", "failed")
+        if resumable and st.button("Resume Scan", use_container_width=True,
+                                   help="Scan the notes this scan hasn't analyzed yet"):
+            job.start()
+            st.rerun()
+
+    if job is not None:
+        _render_scan(running)
+
+def _render_scan(running: bool):
+    # Fragment: only this panel reruns while the scan is in progress
+    @st.fragment(run_every=SCAN_REFRESH_SECONDS if running else None)
+    def scan_panel():
+        job = get_scan_jobs().current()
+        if job is None:
+            return
+        if running and not job.running:
+            st.rerun()  # finished: re-enable the controls
+        state, changes = job.snapshot()
+
+        processed = state["done"] + state["skipped"]
+        st.progress(min(processed / state["total"], 1.0) if state["total"] else (1.0 if state["status"] != RUNNING else 0.0))
+        st.text(f"{state['message']}  |  {processed}/{state['total']} notes, "
+                f"{state['rate']:.1f} notes/min, {len(changes)} with suggested changes")
+        if state["error"]:
+            st.error(state["error"])
+
+        if not changes:
+            if state["status"] == "done":
+                st.success("No changes suggested.")
+            return
+
+        st.subheader(f"Suggested Changes ({len(changes)})")
+        for change in changes:
             with st.expander(f"{change['file'].name}"):
                 col_a, col_b = st.columns(2)
                 with col_a:
@@ -106,23 +79,49 @@ def render_tagger_tab():
                 with col_b:
                     st.markdown("**Suggested Tags**")
                     st.write(change['suggested'])
-                
+
                 st.markdown(f"**Added:** {', '.join(change['added'])}")
                 st.markdown(f"**Removed:** {', '.join(change['removed'])}")
 
-        if st.button("Apply All Changes"):
-            progress_bar_apply = st.progress(0)
-            
-            for i, change in enumerate(st.session_state.tag_changes):
-                apply_changes(change['file'], change['suggested'], change['content'])
-                
-                # Update cache
-                # We need to instantiate cache again or keep it
-                # For simplicity, just instantiate a temp one to update
-                temp_cache = TagCache() 
-                temp_cache.update(change['file'])
-                
-                progress_bar_apply.progress((i + 1) / len(st.session_state.tag_changes))
-            
-            st.success("All changes applied!")
-            st.session_state.tag_changes = [] # Clear
+        a1, a2 = st.columns(2)
+        with a1:
+            apply = st.button("Apply All Changes", disabled=job.running, use_container_width=True)
+        with a2:
+            if st.button("Discard Results", disabled=job.running, use_container_width=True):
+                get_scan_jobs().discard()
+                st.rerun()
+        if apply:
+            _apply_changes(changes, job.scanner)
+            get_scan_jobs().discard()
+
+    scan_panel()
+
+def _apply_changes(changes, scanner):
+    from src.tagging.apply import apply_batch
+
+    # Atomic writes in parallel, one rollback journal and one git commit for the batch
+    with st.spinner(f"Applying tags to {len(changes)} notes..."):
+        result = apply_batch([(c['file'], c['suggested']) for c in changes])
+
+    done = set(result['written'] + result['unchanged'])
+    with TagCache(batch_size=len(changes) + 1) as cache:
+        for change in changes:
+            if str(change['file']) in done:
+                cache.update(change['file'], topics=topic_tags(change['suggested']))
+
+    # Keep the tag index in sync with the rewritten files
+    if scanner:
+        scanner.apply_tag_changes(result['tags'])
+
+    if result['failed'] and not result['written']:
+        # A failed write rolls the whole batch back
+        st.error(f"Nothing was applied; the batch was rolled back. Failed: {result['failed']}")
+        return
+    if result['failed']:
+        st.warning(f"Applied {len(result['written'])} notes; not applied: {result['failed']}")
+    if result['commit_error']:
+        st.warning(f"Tags were written but not committed: {result['commit_error']}")
+    if result['commit']:
+        st.info(f"Committed as {result['commit'][:8]} (undo: python -m src.tagging.apply --rollback {result['journal']})")
+    if not result['failed']:
+        st.success("All changes applied!")
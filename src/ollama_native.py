@@ -0,0 +1,118 @@
+"""
+Direct helpers for the Ollama HTTP API that LangChain doesn't cover:
+model preloading with a keep-alive window and batched /api/embed calls.
+"""
+import time
+import threading
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from src import config
+
+_preloaded = set()
+_preload_lock = threading.Lock()
+
+
+def preload_model(model: str, kind: str = "chat", base_url: str = None, keep_alive: str = None,
+                  timeout: float = 300) -> float:
+    """
+    Loads `model` into Ollama's memory and keeps it resident for `keep_alive`.
+    Chat models are loaded with an empty /api/generate request, embedding models
+    with a one-word /api/embed request. Returns the time the request took (s).
+    """
+    import requests
+    base_url = (base_url or config.OLLAMA_BASE_URL).rstrip("/")
+    keep_alive = keep_alive or config.OLLAMA_KEEP_ALIVE
+    start = time.perf_counter()
+    if kind == "embedding":
+        payload = {"model": model, "input": "warm-up", "keep_alive": keep_alive}
+        response = requests.post(f"{base_url}/api/embed", json=payload, timeout=timeout)
+    else:
+        payload = {"model": model, "keep_alive": keep_alive, "stream": False}
+        response = requests.post(f"{base_url}/api/generate", json=payload, timeout=timeout)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def unload_model(model: str, kind: str = "chat", base_url: str = None):
+    """Evicts `model` from memory (keep_alive=0). Used to measure cold starts."""
+    import requests
+    base_url = (base_url or config.OLLAMA_BASE_URL).rstrip("/")
+    if kind == "embedding":
+        requests.post(f"{base_url}/api/embed", json={"model": model, "input": "", "keep_alive": 0}, timeout=60)
+    else:
+        requests.post(f"{base_url}/api/generate", json={"model": model, "keep_alive": 0, "stream": False}, timeout=60)
+    with _preload_lock:
+        _preloaded.discard((base_url, model))
+
+
+def warm_up(chat: bool = True, embeddings: bool = True, background: bool = False) -> Dict[str, float]:
+    """
+    Preloads the configured chat and/or embedding models (once per process).
+    With background=True the requests run on a daemon thread and this returns immediately.
+    """
+    base_url = config.OLLAMA_BASE_URL.rstrip("/")
+    targets = []
+    if chat and config.AI_PROVIDER == "ollama":
+        targets.append((config.OLLAMA_MODEL, "chat"))
+    if embeddings and config.EMBEDDING_PROVIDER == "ollama":
+        targets.append((config.OLLAMA_EMBEDDING_MODEL, "embedding"))
+
+    with _preload_lock:
+        targets = [(m, k) for m, k in targets if (base_url, m) not in _preloaded]
+        _preloaded.update((base_url, m) for m, _ in targets)
+
+    timings: Dict[str, float] = {}
+
+    def _run():
+        for model, kind in targets:
+            try:
+                timings[model] = preload_model(model, kind, base_url=base_url)
+                print(f"Preloaded Ollama {kind} model '{model}' in {timings[model]:.2f}s (keep_alive={config.OLLAMA_KEEP_ALIVE}).")
+            except Exception as e:
+                with _preload_lock:
+                    _preloaded.discard((base_url, model))
+                print(f"⚠️  WARNING: Could not preload Ollama model '{model}': {e}")
+
+    if background:
+        threading.Thread(target=_run, name="ollama-warm-up", daemon=True).start()
+    else:
+        _run()
+    return timings
+
+
+class OllamaBatchEmbeddings(Embeddings):
+    """
+    Embeddings client for Ollama's native batch endpoint (/api/embed with a list input).
+    Texts are sent `batch_size` at a time over a single keep-alive HTTP session,
+    and the model is kept resident for `keep_alive` between calls.
+    """
+
+    def __init__(self, model: str, base_url: str, batch_size: int = 256,
+                 keep_alive: Optional[str] = None, timeout: float = 600):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = max(1, batch_size)
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._http = None
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        if self._http is None:
+            import requests
+            self._http = requests.Session()
+        payload = {"model": self.model, "input": texts}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        response = self._http.post(f"{self.base_url}/api/embed", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed(texts[i:i + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
@@ -1,12 +1,21 @@
 import os
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
+import argparse
 from src import config
+from src import tracing
 from src.ai_provider import AIProvider
 
 def ingest_documents():
+    # Heavy imports are deferred so importing this module stays cheap.
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from langchain_chroma import Chroma
+    from src.vault import snapshot_for
+
     all_documents = []
+    refreshed = set()
+
+    # Start loading the (Ollama) embedding model while files are read and split.
+    AIProvider.warm_up(chat=False, background=True)
         
     for folder_path in config.RAG_SOURCE_ABS_PATHS:
         print(f"Loading documents from {folder_path}...")
@@ -15,12 +24,24 @@ def ingest_documents():
             print(f"Source path {folder_path} does not exist. Skipping.")
             continue
 
-        loader = DirectoryLoader(
-            folder_path, 
-            glob="**/*.md", 
-            loader_cls=TextLoader
-            )
-        documents = loader.load()
+        # Files, contents and parsed frontmatter come from the shared vault snapshot
+        snapshot, folder = snapshot_for(folder_path)
+        if snapshot.root not in refreshed:
+            snapshot.refresh()
+            refreshed.add(snapshot.root)
+        documents = []
+        with tracing.span("ingest.load", folder=folder_path) as load_span:
+            for path in snapshot.files(folder=folder):
+                content = snapshot.read(path)
+                entry = snapshot.entries.get(str(path))
+                if content is None or entry is None:
+                    continue
+                metadata = {'source': str(path)}
+                tags = entry['metadata'].get('tags')
+                if tags:
+                    metadata['tags'] = tags
+                documents.append(Document(page_content=content, metadata=metadata))
+            load_span.set(documents=len(documents))
         print(f"Loaded {len(documents)} documents from {folder_path}.")
         all_documents.extend(documents)
     
@@ -30,24 +51,9 @@ def ingest_documents():
         print("No documents found to ingest.")
         return
 
-    # Extract tags from frontmatter BEFORE splitting
-    import yaml
-    for doc in all_documents:
-        content = doc.page_content
-        if content.startswith("---"):
-            try:
-                end_idx = content.find("---", 3)
-                if end_idx != -1:
-                    frontmatter = content[3:end_idx]
-                    import yaml
-                    data = yaml.safe_load(frontmatter)
-                    if isinstance(data, dict) and 'tags' in data:
-                        doc.metadata['tags'] = data['tags']
-            except Exception as e:
-                print(f"Failed to parse frontmatter for {doc.metadata.get('source', 'unknown')}: {e}")
-
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = text_splitter.split_documents(all_documents)
+    with tracing.span("ingest.split", documents=len(all_documents)):
+        splits = text_splitter.split_documents(all_documents)
     
     for split in splits:
         source = split.metadata.get('source', '')
@@ -72,7 +78,7 @@ def ingest_documents():
 
 
     try:
-        embeddings = AIProvider.get_embeddings()
+        embeddings = AIProvider.get_embeddings(subsystem="rag.ingest")
     except Exception as e:
         print(f"Error initializing embeddings: {e}")
         return
@@ -80,7 +86,8 @@ def ingest_documents():
     if os.path.exists(config.CHROMA_DB_ABS_PATH):
         import shutil
         print(f"Clearing existing ChromaDB at {config.CHROMA_DB_ABS_PATH}...")
-        shutil.rmtree(config.CHROMA_DB_ABS_PATH)
+        with tracing.span("ingest.clear"):
+            shutil.rmtree(config.CHROMA_DB_ABS_PATH)
 
     print(f"Ingesting into ChromaDB at {config.CHROMA_DB_ABS_PATH}...")
     # Initialize Chroma and add documents. Using persist_directory specifically.
@@ -88,9 +95,21 @@ def ingest_documents():
         persist_directory=config.CHROMA_DB_ABS_PATH,
         embedding_function=embeddings
     )
-    vectorstore.add_documents(documents=splits)
+    # Large batches: one embedding request (Ollama /api/embed) and one Chroma write per batch.
+    batch_size = config.EMBED_BATCH_SIZE
+    for i in range(0, len(splits), batch_size):
+        batch = splits[i:i + batch_size]
+        # Self time of this span is the Chroma write; embedding shows up as nested "embed" spans
+        with tracing.span("chroma.add", chunks=len(batch)):
+            vectorstore.add_documents(documents=batch)
+        print(f"  Embedded {min(i + batch_size, len(splits))}/{len(splits)} chunks...")
     
     print("Ingestion complete.")
 
 if __name__ == "__main__":
-    ingest_documents()
+    arg_parser = argparse.ArgumentParser(description="Index the RAG source folders into ChromaDB.")
+    tracing.add_profile_argument(arg_parser)
+    args = arg_parser.parse_args()
+    tracing.configure(args.profile, "ingest")
+    with tracing.span("ingest"):
+        ingest_documents()
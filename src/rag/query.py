@@ -1,16 +1,18 @@
 import argparse
-import sys
-from langchain_chroma import Chroma
 from src.ai_provider import AIProvider
-from langchain_classic.chains import create_retrieval_chain
-from langchain_classic.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate
 from src import config
+from src import tracing
 
 def query_rag(query_text):
+    # Heavy imports are deferred so the CLI (and the GUI chat tab) start fast.
+    from langchain_chroma import Chroma
+    from langchain_classic.chains import create_retrieval_chain
+    from langchain_classic.chains.combine_documents import create_stuff_documents_chain
+    from langchain_core.prompts import ChatPromptTemplate
+
     try:
-        embeddings = AIProvider.get_embeddings()
-        llm = AIProvider.get_llm()
+        embeddings = AIProvider.get_embeddings(subsystem="rag.query")
+        llm = AIProvider.get_llm(subsystem="rag.query")
     except Exception as e:
         print(f"Provider Error: {e}")
         return "System configuration error."
@@ -40,14 +42,21 @@ def query_rag(query_text):
     question_answer_chain = create_stuff_documents_chain(llm, prompt)
     rag_chain = create_retrieval_chain(retriever, question_answer_chain)
 
-    response = rag_chain.invoke({"input": query_text})
+    # Retrieval (query embedding + Chroma search) and the LLM call appear as nested spans
+    with tracing.span("query.chain"):
+        response = rag_chain.invoke({"input": query_text})
     
     return response["answer"]
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        query_text = sys.argv[1]
-        answer = query_rag(query_text)
+    arg_parser = argparse.ArgumentParser(description="Ask a question about your notes.")
+    arg_parser.add_argument("query", nargs="?", help="The question.")
+    tracing.add_profile_argument(arg_parser)
+    args = arg_parser.parse_args()
+    tracing.configure(args.profile, "query")
+    if args.query:
+        with tracing.span("query"):
+            answer = query_rag(args.query)
         print(f"Answer: {answer}")
     else:
         print("Please provide a query.")
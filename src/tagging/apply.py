@@ -0,0 +1,308 @@
+"""
+Batch tag application: patches only the `tags` entry of each note's frontmatter,
+writes every file atomically (temp file + rename) on a thread pool, records one
+journal per batch for rollback and commits the batch as a single git commit.
+
+    python -m src.tagging.apply --list
+    python -m src.tagging.apply --rollback latest
+"""
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from src import tracing
+from src.vault import snapshot_for
+
+JOURNAL_DIR = Path(".data/tag_journal")
+
+FRONTMATTER_RE = re.compile(r'\A---[ \t]*\r?\n(.*?)(?:\r?\n)?^---[ \t]*\r?$', re.DOTALL | re.MULTILINE)
+TOP_LEVEL_KEY_RE = re.compile(r'^[^\s#-][^:]*:')
+
+
+def _hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _render_tags(tags: Set[str]) -> List[str]:
+    clean = sorted({t.strip().lstrip('#') for t in tags if t.strip().lstrip('#')})
+    rendered = yaml.safe_dump({"tags": clean}, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    return rendered.rstrip("\n").split("\n")
+
+
+def patch_frontmatter(content: str, tags: Set[str]) -> str:
+    """
+    Returns `content` with the frontmatter `tags` replaced by `tags`. Everything
+    else (other keys, their formatting and comments, the body) is kept byte for byte.
+    A frontmatter block is added if the note has none.
+    """
+    newline = "\r\n" if "\r\n" in content else "\n"
+    tag_lines = _render_tags(tags)
+
+    match = FRONTMATTER_RE.match(content)
+    if not match:
+        return "---" + newline + newline.join(tag_lines) + newline + "---" + newline + content
+
+    block = match.group(1)
+    if not block.strip():
+        return content[:match.start(1)] + newline.join(tag_lines) + newline + content[match.end(1):].lstrip("\r\n")
+    lines = block.split(newline)
+    start = next((i for i, l in enumerate(lines) if re.match(r'^tags\s*:', l)), None)
+    if start is None:
+        lines.extend(tag_lines)
+    else:
+        # The value ends at its last list item or indented line; comments and blank
+        # lines after it (before the next top-level key) are left in place
+        end = start + 1
+        for i in range(start + 1, len(lines)):
+            if TOP_LEVEL_KEY_RE.match(lines[i]):
+                break
+            if lines[i].startswith("-") or (lines[i][:1].isspace() and lines[i].strip()):
+                end = i + 1
+        lines[start:end] = tag_lines
+    return content[:match.start(1)] + newline.join(lines) + content[match.end(1):]
+
+
+def atomic_write(path: Path, text: str):
+    """Writes via a temp file in the same folder and os.replace(), so readers never see a partial note."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class ApplyJournal:
+    """
+    Write-ahead record of one batch: original and new content hash of every file,
+    plus the original content, saved before any note is touched.
+    """
+
+    def __init__(self, batch_id: Optional[str] = None, journal_dir: Path = JOURNAL_DIR):
+        self.batch_id = batch_id or time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.path = Path(journal_dir) / f"{self.batch_id}.json"
+        self.data = {"id": self.batch_id, "created": time.time(), "status": "pending", "commit": None, "files": []}
+
+    def add(self, file_path: Path, before: str, after: str):
+        self.data["files"].append({
+            "path": str(file_path), "before_hash": _hash(before), "after_hash": _hash(after), "before": before,
+        })
+
+    def save(self, status: Optional[str] = None):
+        if status:
+            self.data["status"] = status
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+    @classmethod
+    def load(cls, batch_id: str, journal_dir: Path = JOURNAL_DIR) -> "ApplyJournal":
+        if batch_id == "latest":
+            journals = list_journals(journal_dir)
+            if not journals:
+                raise FileNotFoundError(f"No tag journals in {journal_dir}")
+            batch_id = journals[0]["id"]
+        journal = cls(batch_id, journal_dir)
+        with open(journal.path, 'r', encoding='utf-8') as f:
+            journal.data = json.load(f)
+        return journal
+
+
+def list_journals(journal_dir: Path = JOURNAL_DIR) -> List[Dict]:
+    """Journal summaries, newest first."""
+    journals = []
+    for path in Path(journal_dir).glob("*.json"):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        journals.append({"id": data["id"], "created": data["created"], "status": data["status"],
+                         "commit": data.get("commit"), "files": len(data["files"])})
+    return sorted(journals, key=lambda j: -j["created"])
+
+
+@tracing.traced("git.commit")
+def _git_commit(paths: List[str], message: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Commits only `paths`. Returns (sha, None), (None, None) if the vault isn't a git
+    repository, or (None, error) if git refused the commit (ignored paths, a failing
+    hook, no user.name); the files stay written either way.
+    """
+    from src import config
+    try:
+        import git
+        from src.daily_report.git_manager import GitManager
+        manager = GitManager(config.VAULT_ABS_PATH)
+    except Exception as e:
+        print(f"Not committing tag changes: {e}")
+        return None, None
+    try:
+        return manager.commit_files(paths, message), None
+    except git.exc.GitCommandError as e:
+        # GitPython wraps stderr as "stderr: '...'"
+        error = (e.stderr or str(e)).strip().removeprefix("stderr:").strip().strip("'").strip()
+        print(f"Commit failed: {error}")
+        return None, error
+
+
+def _write_all(items: List[Tuple[Path, str]], workers: int) -> Dict[str, str]:
+    """Writes concurrently; returns {path: error} for failures."""
+    def write(item):
+        path, text = item
+        try:
+            atomic_write(path, text)
+            return None
+        except OSError as e:
+            return str(path), str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tag-apply") as pool:
+        return dict(r for r in pool.map(write, items) if r)
+
+
+@tracing.traced("tag.apply")
+def apply_batch(changes: List[Tuple[Path, Set[str]]], commit: bool = True, message: Optional[str] = None,
+                workers: int = 8) -> Dict:
+    """
+    Applies [(path, tags), ...] all-or-nothing: if any write fails, the files already
+    written are restored from the journal. Returns a dict with the journal id, written,
+    unchanged and failed files, the commit sha (if committed) or commit_error, and
+    `tags`: {path: (tags before, tags after)} of the written files, so tag indexes
+    built on the (already refreshed) vault snapshot can be adjusted.
+    """
+    journal = ApplyJournal()
+    written, unchanged, failed = [], [], {}
+    planned: List[Tuple[Path, str]] = []
+    old_tags: Dict[str, List[str]] = {}
+
+    for file_path, tags in changes:
+        snapshot, _ = snapshot_for(file_path)
+        before = snapshot.read(file_path)
+        if before is None:
+            failed[str(file_path)] = "unreadable"
+            continue
+        after = patch_frontmatter(before, tags)
+        if after == before:
+            unchanged.append(str(file_path))
+            continue
+        entry = snapshot.entry(file_path)
+        old_tags[str(file_path)] = list(entry["tags"]) if entry else []
+        journal.add(file_path, before, after)
+        planned.append((Path(file_path), after))
+
+    result = {"journal": journal.batch_id, "written": written, "unchanged": unchanged,
+              "failed": failed, "commit": None, "commit_error": None, "tags": {}}
+    if not planned:
+        return result
+
+    journal.save()
+    errors = _write_all(planned, workers)
+    if errors:
+        failed.update(errors)
+        print(f"{len(errors)} writes failed; rolling back batch {journal.batch_id}.")
+        rollback(journal, commit=False)
+        return result
+
+    written.extend(str(path) for path, _ in planned)
+    for path in written:
+        snapshot = snapshot_for(path)[0]
+        snapshot.refresh_file(path)
+        entry = snapshot.entries.get(os.path.abspath(path))
+        result["tags"][path] = (old_tags.get(path, []), list(entry["tags"]) if entry else [])
+    journal.save("applied")
+
+    if commit:
+        sha, error = _git_commit(written, message or f"Auto-tag {len(written)} notes (batch {journal.batch_id})")
+        if sha:
+            journal.data["commit"] = sha
+            journal.save("committed")
+            result["commit"] = sha
+        elif error:
+            journal.data["commit_error"] = error
+            journal.save("applied")
+            result["commit_error"] = error
+    return result
+
+
+def rollback(journal: ApplyJournal, commit: bool = True) -> Dict:
+    """
+    Restores the original content of every file in the batch that still has the
+    content the batch wrote; files edited since are left alone and reported.
+    """
+    restored, skipped = [], []
+    items = []
+    for entry in journal.data["files"]:
+        path = Path(entry["path"])
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                current = f.read()
+        except OSError:
+            current = None
+        if current is not None and _hash(current) == entry["before_hash"]:
+            continue  # never written, or already restored
+        if current is None or _hash(current) != entry["after_hash"]:
+            skipped.append(str(path))
+            continue
+        items.append((path, entry["before"]))
+
+    errors = _write_all(items, workers=8)
+    restored = [str(p) for p, _ in items if str(p) not in errors]
+    for path in restored:
+        snapshot_for(path)[0].refresh_file(path)
+    if skipped:
+        print(f"Left {len(skipped)} files that changed after the batch: {skipped}")
+
+    sha = error = None
+    if commit and journal.data.get("commit") and restored:
+        sha, error = _git_commit(restored, f"Revert auto-tag batch {journal.batch_id}")
+    journal.data["rollback_commit"] = sha
+    if error:
+        journal.data["rollback_commit_error"] = error
+    journal.save("rolled_back")
+    return {"restored": restored, "skipped": skipped, "failed": errors, "commit": sha, "commit_error": error}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or roll back tag apply batches.")
+    parser.add_argument("--list", action="store_true", help="List recorded batches.")
+    parser.add_argument("--rollback", metavar="ID", help="Restore the notes of a batch ('latest' for the newest).")
+    parser.add_argument("--no-commit", action="store_true", help="Don't commit the rollback.")
+    args = parser.parse_args()
+
+    if args.rollback:
+        journal = ApplyJournal.load(args.rollback)
+        result = rollback(journal, commit=not args.no_commit)
+        print(f"Restored {len(result['restored'])} notes from batch {journal.batch_id}"
+              + (f" (commit {result['commit'][:8]})." if result['commit'] else "."))
+        if result['commit_error']:
+            print(f"The restored notes were not committed: {result['commit_error']}")
+        return
+
+    for j in list_journals():
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(j["created"]))
+        commit = (j["commit"] or "")[:8]
+        print(f"{j['id']:<28} {created}  {j['status']:<12} {j['files']:>5} files  {commit}")
+
+
+if __name__ == "__main__":
+    main()
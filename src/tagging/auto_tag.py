@@ -1,127 +1,256 @@
 import os
 import re
-import glob
 import json
+import time
+import sqlite3
+import hashlib
+import threading
 import collections
 import argparse
 from typing import List, Dict, Set, Tuple, Optional
 from pathlib import Path
-import frontmatter # type: ignore
-from langchain_core.prompts import ChatPromptTemplate
 from src import config
+from src import tracing
 from src.ai_provider import AIProvider
+from src.telemetry import estimate_tokens, record_cache
+from src.vault import VaultSnapshot, get_snapshot, parse_note, parse_tags, snapshot_for
 
-# Regex for inline tags: #tag (alphanumeric, -, _, /)
-# Excludes #1 (headers) or # (empty)
-TAG_REGEX = re.compile(r'(?:^|[\s])#([a-zA-Z0-9_\-/]+)(?=[\s.,!?)]|$)')
-
-CACHE_FILE = Path(".auto_tag_cache.json")
+CACHE_FILE = Path(".auto_tag_cache.json")  # legacy, migrated into CACHE_DB
+CACHE_DB = Path(".auto_tag_cache.db")
+# Bump whenever the analyze_note prompt changes so cached notes get re-analyzed.
+PROMPT_VERSION = "1"
+# Accepted changes are written (and committed) once this many are queued, or this often
+APPLY_EVERY_NOTES = 20
+APPLY_EVERY_SECONDS = 30
 
 class TagCache:
-    def __init__(self):
-        self.cache = {}
-        if CACHE_FILE.exists():
+    """
+    Records which notes have already been analyzed, keyed by path + content hash
+    + PROMPT_VERSION, in a SQLite database (WAL mode, safe to share between the
+    CLI and the GUI). A note is re-processed when its content or the prompt changes;
+    touching a file (git checkout, sync tools) doesn't invalidate it.
+    It also keeps the topic tags the note was left with, so notes whose topics
+    the user hasn't touched since can skip the LLM (see TagPipeline maturity).
+    Writes are batched: call flush() (or use the cache as a context manager)
+    to commit pending updates.
+    """
+    def __init__(self, db_path: Path = CACHE_DB, batch_size: int = 50):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self._pending = 0
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tag_cache ("
+            " path TEXT PRIMARY KEY,"
+            " content_hash TEXT NOT NULL,"
+            " prompt_version TEXT NOT NULL,"
+            " size INTEGER, mtime_ns INTEGER,"
+            " processed_at REAL,"
+            " topics TEXT)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tag_cache)")}
+        if "topics" not in columns:
+            self.conn.execute("ALTER TABLE tag_cache ADD COLUMN topics TEXT")
+        self.conn.commit()
+        self._migrate_json()
+
+    def _migrate_json(self):
+        """One-time import of the legacy mtime-keyed JSON cache."""
+        if not CACHE_FILE.exists():
+            return
+        try:
+            with open(CACHE_FILE, 'r') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            legacy = {}
+        imported = 0
+        for str_path, last_mtime in legacy.items():
+            path = Path(str_path)
             try:
-                with open(CACHE_FILE, 'r') as f:
-                    self.cache = json.load(f)
-            except:
-                self.cache = {}
-
-    def should_process(self, file_path: Path) -> bool:
-        """Returns True if file is new or modified since last check."""
-        str_path = str(file_path)
-        if str_path not in self.cache:
+                # Only entries that were still up to date carry over
+                if path.stat().st_mtime <= last_mtime:
+                    self.update(path)
+                    imported += 1
+            except OSError:
+                continue
+        self.flush()
+        CACHE_FILE.rename(CACHE_FILE.with_name(CACHE_FILE.name + ".bak"))
+        print(f"Migrated {imported} entries from {CACHE_FILE} to {self.db_path}.")
+
+    @staticmethod
+    def content_hash(file_path: Path) -> str:
+        with open(file_path, 'rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+    def should_process(self, file_path: Path, content_hash: Optional[str] = None) -> bool:
+        """Returns True if file is new, its content changed or the prompt version changed."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT content_hash, prompt_version, size, mtime_ns FROM tag_cache WHERE path = ?",
+                (os.path.abspath(str(file_path)),)
+            ).fetchone()
+        if row is None or row[1] != PROMPT_VERSION:
+            record_cache("tag_cache", "tagging", hit=False)
             return True
-        
-        last_mtime = self.cache[str_path]
-        current_mtime = file_path.stat().st_mtime
-        
-        # Check if modified time is strictly greater (allowing for some float precision issues)
-        return current_mtime > last_mtime
 
-    def update(self, file_path: Path):
-        """Updates the cache with current mtime."""
-        self.cache[str(file_path)] = file_path.stat().st_mtime
-        self._save()
+        stored_hash, _, size, mtime_ns = row
+        if content_hash is None:
+            stat = file_path.stat()
+            if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                record_cache("tag_cache", "tagging", hit=True)
+                return False
+            content_hash = self.content_hash(file_path)
+
+        changed = content_hash != stored_hash
+        record_cache("tag_cache", "tagging", hit=not changed)
+        return changed
+
+    def get_topics(self, file_path: Path) -> Optional[Set[str]]:
+        """Topic tags recorded at the last update(), or None if unknown."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT topics FROM tag_cache WHERE path = ?", (os.path.abspath(str(file_path)),)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return set(json.loads(row[0]))
+
+    def update(self, file_path: Path, content_hash: Optional[str] = None, topics: Optional[Set[str]] = None):
+        """Marks the file's current content as processed (committed in batches).
+        `topics` replaces the recorded topic tags; None keeps the previous ones."""
+        stat = file_path.stat()
+        content_hash = content_hash or self.content_hash(file_path)
+        topics_json = json.dumps(sorted(topics)) if topics is not None else None
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO tag_cache (path, content_hash, prompt_version, size, mtime_ns, processed_at, topics)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE SET content_hash = excluded.content_hash,"
+                " prompt_version = excluded.prompt_version, size = excluded.size,"
+                " mtime_ns = excluded.mtime_ns, processed_at = excluded.processed_at,"
+                " topics = COALESCE(excluded.topics, tag_cache.topics)",
+                (os.path.abspath(str(file_path)), content_hash, PROMPT_VERSION, stat.st_size, stat.st_mtime_ns, time.time(), topics_json)
+            )
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._pending:
+                self.conn.commit()
+                self._pending = 0
+
+    def close(self):
+        self.flush()
+        self.conn.close()
 
-    def _save(self):
-        with open(CACHE_FILE, 'w') as f:
-            json.dump(self.cache, f, indent=2)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
 class TagScanner:
-    def __init__(self, vault_path: str):
+    """
+    Vault-wide tag index (tag -> files, tag -> count) over the shared VaultSnapshot,
+    which persists each file's stat, hash and parsed tags and re-reads only files
+    whose size/mtime changed. build_index() recomputes the counts from the snapshot
+    (cheap: no file is read again); refresh_file() and apply_tag_changes() adjust
+    them for single notes afterwards.
+    """
+    def __init__(self, vault_path: str, snapshot: Optional[VaultSnapshot] = None):
         self.vault_path = Path(vault_path)
+        self.snapshot = snapshot or get_snapshot(vault_path)
         self.tag_files: Dict[str, Set[str]] = collections.defaultdict(set)
         self.tag_counts: collections.Counter = collections.Counter()
+
+    @property
+    def entries(self) -> Dict[str, Dict]:
+        """path -> {"size", "mtime_ns", "hash", "tags", "metadata"}"""
+        return self.snapshot.entries
     
     def get_all_markdown_files(self) -> List[Path]:
-        return list(self.vault_path.rglob("*.md"))
+        return self.snapshot.files()
+
+    def parse_tags_from_text(self, text: str) -> Set[str]:
+        return parse_tags(*parse_note(text))
 
     def parse_tags_from_file(self, file_path: Path) -> Set[str]:
-        tags = set()
-        try:
-            post = frontmatter.load(file_path)
-            
-            # 1. Frontmatter tags
-            fm_tags = post.metadata.get('tags')
-            if fm_tags is None:
-                fm_tags = []
-            if isinstance(fm_tags, str):
-                # Handle comma separated or space separated string
-                fm_tags = [t.strip() for t in fm_tags.replace(',', ' ').split()]
-            
-            for t in fm_tags:
-                tags.add(f"#{t.strip('#')}")
-
-            # 2. Inline tags
-            content = post.content
-            inline_matches = TAG_REGEX.findall(content)
-            for t in inline_matches:
-                tags.add(f"#{t}")
-                
-        except Exception as e:
-            print(f"Error parsing {file_path}: {e}")
-            
-        return tags
+        entry = self.snapshot.entry(file_path)
+        return set(entry["tags"]) if entry else set()
+
+    def get_file_tags(self, file_path: Path) -> Set[str]:
+        """Tags of a file from the snapshot (re-parsed if it changed on disk)."""
+        return self.parse_tags_from_file(file_path)
+
+    def _add_tags(self, path: str, tags):
+        for t in tags:
+            self.tag_files[t].add(path)
+            self.tag_counts[t] += 1
+
+    def _remove_tags(self, path: str, tags):
+        for t in tags:
+            self.tag_files[t].discard(path)
+            self.tag_counts[t] -= 1
+            if self.tag_counts[t] <= 0:
+                del self.tag_counts[t]
+                self.tag_files.pop(t, None)
+
+    def refresh_file(self, file_path: Path, stat=None) -> bool:
+        """Re-indexes one file if it changed. Returns True if the index was modified."""
+        path = os.path.abspath(str(file_path))
+        old = self.entries.get(path)
+        old_tags = list(old["tags"]) if old else []
+        if not self.snapshot.refresh_file(path, stat):
+            return False
+        new = self.entries.get(path)
+        self._remove_tags(path, old_tags)
+        if new:
+            self._add_tags(path, new["tags"])
+        return True
+
+    def apply_tag_changes(self, tags: Dict[str, Tuple[List[str], List[str]]]):
+        """
+        Adjusts the index for notes rewritten by apply_batch(), whose result["tags"]
+        maps path -> (tags before, tags after). apply_batch already refreshed the
+        shared snapshot, so refresh_file() would see no change here.
+        """
+        for path, (old_tags, new_tags) in tags.items():
+            path = os.path.abspath(path)
+            self._remove_tags(path, old_tags)
+            self._add_tags(path, new_tags)
+
+    def forget_file(self, file_path: Path) -> bool:
+        path = os.path.abspath(str(file_path))
+        entry = self.entries.get(path)
+        if entry is None:
+            return False
+        self._remove_tags(path, entry["tags"])
+        return self.snapshot.forget(path)
 
+    @tracing.traced("tag.index")
     def build_index(self):
         print("Indexing vault tags...")
-        files = self.get_all_markdown_files()
-        for f in files:
-            tags = self.parse_tags_from_file(f)
-            for t in tags:
-                self.tag_files[t].add(str(f))
-                self.tag_counts[t] += 1
-        print(f"Indexed {len(self.tag_counts)} unique tags across {len(files)} files.")
+        changed, removed = self.snapshot.refresh()
+        self.tag_files = collections.defaultdict(set)
+        self.tag_counts = collections.Counter()
+        for path, entry in self.entries.items():
+            self._add_tags(path, entry["tags"])
+        print(f"Indexed {len(self.tag_counts)} unique tags across {len(self.entries)} files "
+              f"({len(changed)} updated, {len(removed)} removed).")
+
+    def save(self):
+        """Persists the snapshot (e.g. after refresh_file() calls for applied changes)."""
+        self.snapshot.flush()
 
     def get_top_tags(self, limit=100) -> List[str]:
         return [tag for tag, count in self.tag_counts.most_common(limit)]
 
-class TagSuggester:
-    def __init__(self):
-        try:
-            self.llm = AIProvider.get_llm()
-        except Exception as e:
-            print(f"Error initializing LLM: {e}")
-            self.llm = None
-        except Exception as e:
-            print(f"Error initializing Ollama: {e}")
-            self.llm = None
-
-    def analyze_note(self, content: str, current_tags: Set[str], top_tags: List[str]) -> Optional[Dict]:
-        if not self.llm:
-            return None
-
-        prompt = ChatPromptTemplate.from_template(
-            """
-            You are an expert Personal Knowledge Management assistant.
-            
-            Your task is to analyze a Markdown note and enforce tag consistency.
-            
-            Context:
-            - **Existing Vault Tags** (Prioritize these): {top_tags}
-            - **Current Note Tags**: {current_tags}
-            
+TAG_RULES = """
             Instructions:
             1. **Topics**: Suggest 3-5 relevant tags. PREFER existing tags from the list above if they match the concept. Only invent new tags for truly novel topics. Format as #tag.
             2. **Maturity**: Classify the note's status as ONE of:
@@ -130,7 +259,17 @@ class TagSuggester:
                - #evergreen (Polished, complete, authoritative)
                *Update Rule*: Check the content depth. If it's a #seed but has grown, promote it.
             3. **Quality**: If the note is effectively empty or extremely unstructured, add #for-review.
+            """
+
+ANALYZE_PROMPT = """
+            You are an expert Personal Knowledge Management assistant.
+            
+            Your task is to analyze a Markdown note and enforce tag consistency.
             
+            Context:
+            - **Existing Vault Tags** (Prioritize these): {top_tags}
+            - **Current Note Tags**: {current_tags}
+            """ + TAG_RULES + """
             Return a JSON object with this EXACT structure (no markdown formatting around it):
             {{
                 "topic_tags": ["#tag1", "#tag2"],
@@ -141,74 +280,207 @@ class TagSuggester:
             NOTE CONTENT:
             {content}
             """
-        )
-        
+
+# Several notes per request: the instructions and vault tags are sent once.
+BATCH_PROMPT = """
+            You are an expert Personal Knowledge Management assistant.
+            
+            Your task is to analyze SEVERAL Markdown notes and enforce tag consistency.
+            Analyze each note independently; do not mix content between notes.
+            
+            Context:
+            - **Existing Vault Tags** (Prioritize these): {top_tags}
+            - Each note lists its own **Current Note Tags**.
+            """ + TAG_RULES + """
+            Return ONE JSON object with one entry per NOTE ID, using this EXACT structure (no markdown formatting around it):
+            {{
+                "<note id>": {{
+                    "topic_tags": ["#tag1", "#tag2"],
+                    "maturity_tag": "#seed",
+                    "maintenance_tag": null or "#for-review"
+                }}
+            }}
+            
+            NOTES:
+            {notes}
+            """
+
+MATURITY_TAGS = {"#seed", "#sprout", "#evergreen"}
+# Tags that describe a note's state rather than its topic
+NON_TOPIC_TAGS = MATURITY_TAGS | {"#for-review", "#daily"}
+MAX_NOTE_CHARS = 4000
+
+def _extract_json(text: str):
+    text = text.strip()
+    # Find the JSON object using regex (greedy match between the outermost braces)
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if match:
+        return json.loads(match.group(0))
+    # Fallback to naive clean if no braces found (unlikely)
+    if text.startswith("```json"):
+        text = text[7:-3]
+    return json.loads(text)
+
+def validate_result(result) -> bool:
+    """Checks that an analyze result has the expected shape."""
+    if not isinstance(result, dict):
+        return False
+    topics = result.get('topic_tags')
+    if not isinstance(topics, list) or not all(isinstance(t, str) and t.startswith('#') for t in topics):
+        return False
+    if result.get('maturity_tag') not in MATURITY_TAGS:
+        return False
+    return result.get('maintenance_tag') in (None, "#for-review")
+
+class TagSuggester:
+    def __init__(self, subsystem: str = "tagging"):
+        try:
+            self.llm = AIProvider.get_llm(subsystem=subsystem)
+        except Exception as e:
+            print(f"Error initializing LLM: {e}")
+            self.llm = None
+        # calls, prompt_tokens, completion_tokens, batched_notes, batch_retries, per_note_prompt_tokens
+        self.usage = collections.Counter()
+        self._usage_lock = threading.Lock()
+
+    def _invoke(self, template: str, variables: Dict) -> str:
+        from langchain_core.prompts import ChatPromptTemplate
+        prompt = ChatPromptTemplate.from_template(template)
+        chain = prompt | self.llm
+        response = chain.invoke(variables)
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        prompt_tokens = usage.get("input_tokens") or estimate_tokens(len(prompt.format(**variables)))
+        completion_tokens = usage.get("output_tokens") or estimate_tokens(len(response.content))
+        with self._usage_lock:
+            self.usage["calls"] += 1
+            self.usage["prompt_tokens"] += prompt_tokens
+            self.usage["completion_tokens"] += completion_tokens
+        return response.content
+
+    @staticmethod
+    def _note_variables(content: str, current_tags: Set[str], top_tags: List[str]) -> Dict:
+        # truncate content if too long
+        return {
+            "top_tags": ", ".join(top_tags),
+            "current_tags": ", ".join(current_tags),
+            "content": content[:MAX_NOTE_CHARS]
+        }
+
+    def estimate_note_tokens(self, content: str, current_tags: Set[str], top_tags: List[str]) -> int:
+        """Prompt tokens the note would cost on its own (per-note mode)."""
+        return estimate_tokens(len(ANALYZE_PROMPT.format(**self._note_variables(content, current_tags, top_tags))))
+
+    def analyze_note(self, content: str, current_tags: Set[str], top_tags: List[str]) -> Optional[Dict]:
+        if not self.llm:
+            return None
+
         try:
-            # truncate content if too long
-            truncated_content = content[:4000] 
-            chain = prompt | self.llm
-            response = chain.invoke({
-                "top_tags": ", ".join(top_tags),
-                "current_tags": ", ".join(current_tags),
-                "content": truncated_content
-            })
+            response = self._invoke(ANALYZE_PROMPT, self._note_variables(content, current_tags, top_tags))
             
             # Robust JSON extraction
-            content = response.content.strip()
-            # Find the JSON object using regex (non-greedy match between braces)
-            match = re.search(r'\{.*\}', content, re.DOTALL)
-            if match:
-                json_str = match.group(0)
-                return json.loads(json_str)
-            else:
-                 # Fallback to naive clean if no braces found (unlikely)
-                 if content.startswith("```json"):
-                     content = content[7:-3]
-                 return json.loads(content)
+            return _extract_json(response)
             
         except Exception as e:
             print(f"LLM Error: {e}")
             return None
 
+    def analyze_batch(self, notes: List[Dict], top_tags: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Analyzes several notes in one request. `notes` are dicts with "id", "content"
+        and "current" (tag set). Returns {id: result}; notes whose part of the
+        response is missing or malformed are retried alone with analyze_note().
+        """
+        if not self.llm or not notes:
+            return {}
+        if len(notes) == 1:
+            note = notes[0]
+            with self._usage_lock:
+                self.usage["per_note_prompt_tokens"] += self.estimate_note_tokens(note["content"], note["current"], top_tags)
+            return {note["id"]: self.analyze_note(note["content"], note["current"], top_tags)}
+
+        blocks = []
+        for note in notes:
+            blocks.append(
+                f"=== NOTE {note['id']} ===\n"
+                f"Current Note Tags: {', '.join(note['current'])}\n"
+                f"{note['content'][:MAX_NOTE_CHARS]}\n"
+                f"=== END NOTE {note['id']} ==="
+            )
+        with self._usage_lock:
+            self.usage["batched_notes"] += len(notes)
+            self.usage["per_note_prompt_tokens"] += sum(
+                self.estimate_note_tokens(n["content"], n["current"], top_tags) for n in notes
+            )
+
+        parsed = {}
+        try:
+            response = self._invoke(BATCH_PROMPT, {"top_tags": ", ".join(top_tags), "notes": "\n\n".join(blocks)})
+            parsed = _extract_json(response)
+            if not isinstance(parsed, dict):
+                parsed = {}
+        except Exception as e:
+            print(f"LLM Error (batch of {len(notes)}): {e}")
+
+        results: Dict[str, Optional[Dict]] = {}
+        for note in notes:
+            result = parsed.get(str(note["id"]))
+            if not validate_result(result):
+                with self._usage_lock:
+                    self.usage["batch_retries"] += 1
+                result = self.analyze_note(note["content"], note["current"], top_tags)
+            results[note["id"]] = result
+        return results
+
+    def batch_overhead_tokens(self, top_tags: List[str]) -> int:
+        return estimate_tokens(len(BATCH_PROMPT.format(top_tags=", ".join(top_tags), notes="")))
+
+    def note_block_tokens(self, content: str, current_tags: Set[str]) -> int:
+        return estimate_tokens(len(content[:MAX_NOTE_CHARS])) + estimate_tokens(len(", ".join(current_tags))) + 20
+
+    def pack_batches(self, notes: List[Dict], top_tags: List[str], token_budget: int,
+                     max_notes: int = 10) -> List[List[Dict]]:
+        """Greedily groups notes into batches whose estimated prompt fits `token_budget`."""
+        overhead = self.batch_overhead_tokens(top_tags)
+        batches, current, used = [], [], overhead
+        for note in notes:
+            cost = self.note_block_tokens(note["content"], note["current"])
+            if current and (used + cost > token_budget or len(current) >= max_notes):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(note)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+def suggested_tag_set(result: Dict) -> Set[str]:
+    """Flattens an analyze_note() result into the full set of tags the note should have."""
+    new_tag_set = set(result.get('topic_tags') or [])
+    if result.get('maturity_tag'):
+        new_tag_set.add(result['maturity_tag'])
+    if result.get('maintenance_tag'):
+        new_tag_set.add(result['maintenance_tag'])
+    return new_tag_set
+
+def topic_tags(tags: Set[str]) -> Set[str]:
+    return {t for t in tags if t not in NON_TOPIC_TAGS}
+
 def apply_changes(file_path: Path, new_tags: Set[str], original_content: str):
     """
-    Re-writes the file. 
-    Strategy: 
-    1. Parse frontmatter.
-    2. Update 'tags' field in frontmatter.
-    3. Remove ONLY the maturity/status tags from inline content to avoid duplication, 
-       BUT keeping inline topic tags might be tricky.
-    
-    SIMPLIFIED STRATEGY for safety:
-    1. Load frontmatter.
-    2. Put ALL tags into frontmatter 'tags' list.
-    3. Write back.
-    4. (Advanced) We are NOT removing inline tags from text to avoid destroying context. 
-       We just ensure the frontmatter represents the 'truth'. 
-       Obsidian treats frontmatter + inline as the set of tags.
-       If we want to REMOVE a tag, we can only safely remove it if it's in frontmatter.
-       removing inline tags is risky without precise location.
-       
-    Refined Strategy:
-    1. We will only ADD/UPDATE tags in Frontmatter.
-    2. If we want to 'remove' a tag that is inline... we can't easily do that safely in this V1.
-    3. So we will focus on ADDING missing tags and ensuring Status tag is correct in Frontmatter.
-       If there is a conflicting inline status tag, it might be an issue, but let's assume usage of frontmatter for status.
+    Re-writes a single note: only the frontmatter 'tags' entry is replaced (see
+    src.tagging.apply.patch_frontmatter) and the file is written atomically.
+    We are NOT removing inline tags from text to avoid destroying context; the
+    frontmatter represents the 'truth'. Bulk runs use apply_batch() instead,
+    which also journals and commits the batch.
     """
+    from src.tagging.apply import atomic_write, patch_frontmatter
     try:
-        post = frontmatter.load(file_path)
-        
-        # specific logic: Ensure only ONE maturity tag is in the list
-        maturity_tags = {'seed', 'sprout', 'evergreen'}
-        
-        # Clean new tags to be purely list of strings without #
-        clean_new_tags = {t.strip('#') for t in new_tags}
-        
-        post.metadata['tags'] = list(clean_new_tags)
-        
-        with open(file_path, 'wb') as f:
-            frontmatter.dump(post, f)
-            
+        # Fresh content from the vault snapshot (cached unless the file changed since)
+        content = snapshot_for(file_path)[0].read(file_path)
+        if content is None:
+            content = original_content
+        atomic_write(file_path, patch_frontmatter(content, new_tags))
     except Exception as e:
         print(f"Error writing {file_path}: {e}")
 
@@ -217,13 +489,23 @@ def main():
     parser.add_argument("--auto", "--yes", action="store_true", help="Automatically apply changes without confirmation.")
     parser.add_argument("--force", action="store_true", help="Ignore cache and re-process all files.")
     parser.add_argument("--folder", help="Specific folder to scan (relative to Vault root).", default=None)
+    parser.add_argument("--workers", type=int, default=config.TAG_WORKERS, help="Concurrent LLM calls.")
+    parser.add_argument("--batch", action="store_true", help="Pack several notes into each LLM request (up to TAG_BATCH_TOKENS).")
+    parser.add_argument("--propagate", action="store_true", help="Tag from nearest neighbours in the vector store; use the LLM only for low-confidence notes.")
+    parser.add_argument("--no-commit", action="store_true", help="Write tag changes without committing them to the vault's git repository.")
+    parser.add_argument("--no-vocab", action="store_true", help="Offer the 50 most frequent vault tags instead of the most relevant ones (TAG_VOCAB_SIZE).")
+    parser.add_argument("--local-maturity", action="store_true", help="Assign maturity / #for-review with the local classifier; skip the LLM for notes whose topic tags are unchanged.")
+    parser.add_argument("--refit-maturity", action="store_true", help="Refit the local maturity model from the vault's tags first.")
+    tracing.add_profile_argument(parser)
     args = parser.parse_args()
+    tracing.configure(args.profile, "auto_tag")
 
     print(f"Starting Smart Auto-Tagger in {config.VAULT_ABS_PATH}...")
     if args.auto:
         print("AUTONOMOUS MODE ENABLED.")
     
-    cache = TagCache()
+    # Interactive decisions are committed one by one; --auto runs commit in batches
+    cache = TagCache(batch_size=50 if args.auto else 1)
     scanner = TagScanner(config.VAULT_ABS_PATH)
     scanner.build_index()
     top_tags = scanner.get_top_tags(50)
@@ -239,78 +521,132 @@ def main():
         if not target_dir.exists():
             print(f"Error: Folder '{args.folder}' does not exist in vault.")
             return
-        files = list(target_dir.rglob("*.md"))
+        files = scanner.snapshot.files(folder=target_dir)
         print(f"Targeting folder: {args.folder}")
     else:
         files = scanner.get_all_markdown_files()
 
     print(f"Found {len(files)} notes to process.")
     
-    lines_processed = 0
-    for i, file_path in enumerate(files):
-        if not args.force and not cache.should_process(file_path):
-            continue
-
-        lines_processed += 1
-        print(f"\n[{i+1}/{len(files)}] Processing {file_path.name}...")
-        
-        current_tags = scanner.parse_tags_from_file(file_path)
-        
-        # Load content just for analysis
+    # Reads feed a bounded pool of concurrent LLM calls. Interactive review gets results
+    # in file order; --auto gets each result as soon as it arrives, and accepted changes
+    # are written every APPLY_EVERY_NOTES notes / APPLY_EVERY_SECONDS (one commit each).
+    from src.tagging.pipeline import TagPipeline
+    from src.tagging.vocabulary import load_vocabulary
+    maturity = None
+    if args.local_maturity or args.refit_maturity:
+        from src.tagging.maturity import load_or_fit
+        maturity = load_or_fit(scanner, refit=args.refit_maturity)
+    propagator = None
+    if args.propagate:
+        from src.tagging.propagation import TagPropagator
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except:
-            continue
+            propagator = TagPropagator(maturity_classifier=maturity.classify if maturity else None)
+        except Exception as e:
+            print(f"Tag propagation disabled: {e}")
+    with tracing.span("tag.vocabulary"):
+        vocabulary = None if args.no_vocab else load_vocabulary(scanner)
+    pipeline = TagPipeline(scanner, suggester, top_tags,
+                           cache=None if args.force else cache, workers=args.workers,
+                           batch_tokens=config.TAG_BATCH_TOKENS if args.batch else None,
+                           propagator=propagator, maturity=maturity, vocabulary=vocabulary)
+    
+    # Accepted changes are written in batches: atomic per file, one journal and one git
+    # commit per batch. A crash loses at most the batch that hasn't been written yet.
+    accepted: List[Tuple[Path, Set[str]]] = []
+    last_apply = [time.monotonic()]
 
-        result = suggester.analyze_note(content, current_tags, top_tags)
-        
-        if not result:
-            continue
-            
-        suggested_topics = set(result.get('topic_tags', []))
-        maturity_tag = result.get('maturity_tag')
-        maintenance_tag = result.get('maintenance_tag')
+    def apply_accepted():
+        last_apply[0] = time.monotonic()
+        if not accepted:
+            return
+        from src.tagging.apply import apply_batch
+        tags_by_path = {str(p): tags for p, tags in accepted}
+        result = apply_batch(accepted, commit=not args.no_commit)
+        scanner.apply_tag_changes(result['tags'])
+        for path in result['written'] + result['unchanged']:
+            cache.update(Path(path), topics=topic_tags(tags_by_path[path]))
+        print(f"\nApplied tags to {len(result['written'])} notes (journal {result['journal']}"
+              + (f", commit {result['commit'][:8]})." if result['commit'] else ")."))
+        if result['commit_error']:
+            print(f"Tags were written but not committed: {result['commit_error']}")
+        if result['failed']:
+            print(f"Not applied: {result['failed']}")
+        accepted.clear()
+
+    lines_processed = 0
+    try:
+        for item in pipeline.run(files, ordered=not args.auto):
+            file_path = item['file']
+            current_tags = item['current']
+            new_tag_set = item['suggested']
+            added, removed = item['added'], item['removed']
+
+            lines_processed += 1
+            print(f"\n[{item['index']+1}/{len(files)}] {file_path.name} "
+                  f"({item['elapsed']:.1f}s, {pipeline.notes_per_minute:.1f} notes/min)")
         
-        new_tag_set = set(suggested_topics)
-        if maturity_tag:
-            new_tag_set.add(maturity_tag)
-        if maintenance_tag:
-            new_tag_set.add(maintenance_tag)
-            
-        # Diff
-        added = new_tag_set - current_tags
-        removed = current_tags - new_tag_set
+            if not item['result']:
+                continue
+            if item['result'].get('source') == 'propagation':
+                print(f"  From neighbours (no LLM call): {item['result']['confidence']}")
+            elif item['result'].get('source') == 'local':
+                print(f"  Topics unchanged; maturity from local classifier ({item['result']['maturity_confidence']}).")
         
-        # Filter removals: If a tag is inline, we probably shouldn't "remove" it locally unless we edit text.
-        # For V1, we will only prompt if there are ADDITIONS or if Maturity changes (which is an addition/removal pair)
+            # Filter removals: If a tag is inline, we probably shouldn't "remove" it locally unless we edit text.
+            # For V1, we will only prompt if there are ADDITIONS or if Maturity changes (which is an addition/removal pair)
         
-        if not added and not removed:
-            print("No changes needed.")
-            continue
+            if not added and not removed:
+                print("No changes needed.")
+                cache.update(file_path, topics=topic_tags(current_tags))
+                continue
             
-        print(f"  Current: {current_tags}")
-        print(f"  Suggested: {new_tag_set}")
-        print(f"  Changes: +{added} -{removed}")
+            print(f"  Current: {current_tags}")
+            print(f"  Suggested: {new_tag_set}")
+            print(f"  Changes: +{added} -{removed}")
         
-        if args.auto:
-            print("  Auto-applying changes...")
-            choice = 'y'
-        else:
-            choice = input("  Apply changes? [y]es / [s]kip / [q]uit: ").lower().strip()
+            if args.auto:
+                print("  Auto-applying changes...")
+                choice = 'y'
+            else:
+                choice = input("  Apply changes? [y]es / [s]kip / [q]uit: ").lower().strip()
         
-        if choice == 'y':
-            apply_changes(file_path, new_tag_set, content)
-            cache.update(file_path)
-            print("  Updated.")
-        elif choice == 's':
-            # Mark as processed even if skipped, to avoid prompting again immediately
-            cache.update(file_path) 
-            print("  Skipped (Cached).")
-        elif choice == 'q':
-            break
-        else:
-            print("  Skipped.")
+            if choice == 'y':
+                accepted.append((file_path, new_tag_set))
+                print("  Queued.")
+                if (len(accepted) >= APPLY_EVERY_NOTES
+                        or time.monotonic() - last_apply[0] >= APPLY_EVERY_SECONDS):
+                    apply_accepted()
+            elif choice == 's':
+                # Mark as processed even if skipped, to avoid prompting again immediately
+                cache.update(file_path, topics=topic_tags(current_tags))
+                print("  Skipped (Cached).")
+            elif choice == 'q':
+                pipeline.cancel()
+                break
+            else:
+                print("  Skipped.")
+    finally:
+        apply_accepted()
+
+    if pipeline.completed:
+        print(f"\nAnalyzed {pipeline.completed} notes in {pipeline.elapsed:.1f}s "
+              f"({pipeline.notes_per_minute:.1f} notes/min, {args.workers} workers).")
+        usage = suggester.usage
+        print(f"LLM calls: {usage['calls']}, prompt tokens: {usage['prompt_tokens']}, "
+              f"completion tokens: {usage['completion_tokens']}.")
+        if propagator:
+            print(f"Tag propagation: {propagator.propagated}/{propagator.attempted} notes "
+                  f"({propagator.hit_rate:.0%}) avoided the LLM.")
+        if maturity:
+            print(f"Local maturity: {pipeline.local} notes with unchanged topics skipped the LLM.")
+        if args.batch and usage['per_note_prompt_tokens']:
+            saved = 1 - usage['prompt_tokens'] / usage['per_note_prompt_tokens']
+            print(f"Batched mode: ~{usage['per_note_prompt_tokens']} prompt tokens in per-note mode "
+                  f"({saved:.0%} saved), {usage['batch_retries']} notes retried alone.")
+
+    cache.close()
+    scanner.save()
 
     if lines_processed == 0:
         print("\nAll files are up to date! Use --force to re-check.")
@@ -0,0 +1,219 @@
+"""
+Local maturity classifier (#seed / #sprout / #evergreen) and #for-review check.
+
+Maturity mostly follows a note's structure, so it is predicted from cheap features
+(length, headings, links, bullets vs prose) with a nearest-centroid model fitted
+on the notes in the vault that already carry a maturity tag. No LLM involved.
+
+    python -m src.tagging.maturity --fit
+"""
+import re
+import json
+import math
+import random
+import argparse
+import collections
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import frontmatter # type: ignore
+
+MODEL_FILE = Path(".maturity_model.json")
+LABELS = ("#seed", "#sprout", "#evergreen")
+FEATURES = (
+    "log_words", "headings", "links_per_100w", "bullet_ratio",
+    "paragraphs", "code_blocks", "avg_paragraph_words",
+)
+MIN_SAMPLES_PER_LABEL = 3
+
+HEADING_RE = re.compile(r'^#{1,6}\s+\S', re.MULTILINE)
+LINK_RE = re.compile(r'\[\[[^\]]+\]\]|\[[^\]]*\]\([^)]+\)')
+BULLET_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+')
+
+
+def note_features(content: str) -> Dict[str, float]:
+    """Structural features of a note body (frontmatter excluded)."""
+    try:
+        body = frontmatter.loads(content).content
+    except Exception:
+        body = content
+    words = len(body.split())
+    lines = [l for l in body.splitlines() if l.strip()]
+    bullets = sum(1 for l in lines if BULLET_RE.match(l))
+    headings = len(HEADING_RE.findall(body))
+    prose = max(len(lines) - bullets - headings, 0)
+    paragraphs = [p for p in re.split(r'\n\s*\n', body) if p.strip()]
+    return {
+        "words": words,
+        "log_words": math.log1p(words),
+        "headings": headings,
+        "links_per_100w": len(LINK_RE.findall(body)) * 100.0 / max(words, 1),
+        "bullet_ratio": bullets / max(bullets + prose, 1),
+        "paragraphs": len(paragraphs),
+        "code_blocks": body.count("```") // 2,
+        "avg_paragraph_words": words / max(len(paragraphs), 1),
+    }
+
+
+def needs_review(features: Dict[str, float]) -> bool:
+    """Effectively empty, or a long unstructured wall of text."""
+    if features["words"] < 5:
+        return True
+    return features["words"] > 400 and features["headings"] == 0 and features["paragraphs"] <= 1
+
+
+def rule_based_maturity(features: Dict[str, float]) -> str:
+    """Fallback when there isn't enough labelled data to fit the model."""
+    if features["words"] < 80 or (features["headings"] == 0 and features["words"] < 200):
+        return "#seed"
+    if features["words"] >= 400 and features["headings"] >= 2 and features["bullet_ratio"] < 0.8:
+        return "#evergreen"
+    return "#sprout"
+
+
+class MaturityClassifier:
+    """Nearest-centroid classifier over standardized note features."""
+
+    def __init__(self, model: Optional[Dict] = None):
+        self.model = model
+
+    @property
+    def fitted(self) -> bool:
+        return bool(self.model)
+
+    def fit(self, samples: List[Tuple[Dict[str, float], str]]) -> "MaturityClassifier":
+        counts = collections.Counter(label for _, label in samples)
+        if any(counts[l] < MIN_SAMPLES_PER_LABEL for l in LABELS):
+            print(f"Not enough labelled notes to fit maturity model ({dict(counts)}); using rules.")
+            self.model = None
+            return self
+
+        means, stds = {}, {}
+        for f in FEATURES:
+            values = [feats[f] for feats, _ in samples]
+            means[f] = sum(values) / len(values)
+            var = sum((v - means[f]) ** 2 for v in values) / len(values)
+            stds[f] = math.sqrt(var) or 1.0
+
+        centroids = {}
+        for label in LABELS:
+            rows = [self._scale(feats, means, stds) for feats, l in samples if l == label]
+            centroids[label] = [sum(col) / len(rows) for col in zip(*rows)]
+
+        self.model = {"means": means, "stds": stds, "centroids": centroids, "counts": dict(counts)}
+        return self
+
+    @staticmethod
+    def _scale(features: Dict[str, float], means: Dict, stds: Dict) -> List[float]:
+        return [(features[f] - means[f]) / stds[f] for f in FEATURES]
+
+    def predict(self, features: Dict[str, float]) -> Tuple[str, float]:
+        """Returns (label, confidence in 0..1)."""
+        if not self.model:
+            return rule_based_maturity(features), 0.5
+        x = self._scale(features, self.model["means"], self.model["stds"])
+        distances = {
+            label: math.sqrt(sum((a - b) ** 2 for a, b in zip(x, centroid)))
+            for label, centroid in self.model["centroids"].items()
+        }
+        # Softmax over negative distances
+        exps = {label: math.exp(-d) for label, d in distances.items()}
+        total = sum(exps.values())
+        label = min(distances, key=distances.get)
+        return label, exps[label] / total
+
+    def classify(self, content: str) -> str:
+        label, _ = self.predict(note_features(content))
+        return label
+
+    def analyze(self, content: str) -> Dict:
+        """Maturity and maintenance tags in the analyze_note() result shape (without topics)."""
+        features = note_features(content)
+        label, confidence = self.predict(features)
+        return {
+            "maturity_tag": label,
+            "maintenance_tag": "#for-review" if needs_review(features) else None,
+            "maturity_confidence": round(confidence, 2),
+        }
+
+    def save(self, path: Path = MODEL_FILE):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.model, f)
+
+    @classmethod
+    def load(cls, path: Path = MODEL_FILE) -> "MaturityClassifier":
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return cls(json.load(f))
+            except (OSError, ValueError):
+                pass
+        return cls()
+
+
+def labelled_samples(scanner) -> List[Tuple[Dict[str, float], str]]:
+    """Features of every indexed note carrying exactly one maturity tag."""
+    samples = []
+    for path, entry in scanner.entries.items():
+        labels = [t for t in entry["tags"] if t in LABELS]
+        if len(labels) != 1:
+            continue
+        content = scanner.snapshot.read(path)
+        if content is not None:
+            samples.append((note_features(content), labels[0]))
+    return samples
+
+
+def evaluate(samples, holdout: float = 0.2, seed: int = 0) -> Optional[float]:
+    """Accuracy on a held-out split."""
+    shuffled = list(samples)
+    random.Random(seed).shuffle(shuffled)
+    cut = int(len(shuffled) * (1 - holdout))
+    train, test = shuffled[:cut], shuffled[cut:]
+    clf = MaturityClassifier().fit(train)
+    if not test:
+        return None
+    correct = sum(1 for feats, label in test if clf.predict(feats)[0] == label)
+    return correct / len(test)
+
+
+def load_or_fit(scanner, refit: bool = False) -> MaturityClassifier:
+    """Loads the saved model, fitting (and saving) it from the vault's tags if missing."""
+    clf = MaturityClassifier.load()
+    if clf.fitted and not refit:
+        return clf
+    samples = labelled_samples(scanner)
+    clf = MaturityClassifier().fit(samples)
+    if clf.fitted:
+        clf.save()
+        print(f"Fitted maturity model on {len(samples)} notes {clf.model['counts']}.")
+    return clf
+
+
+def main():
+    from src import config
+    from src.tagging.auto_tag import TagScanner
+
+    parser = argparse.ArgumentParser(description="Fit / evaluate the local maturity classifier.")
+    parser.add_argument("--fit", action="store_true", help="Refit the model from the vault's maturity tags.")
+    parser.add_argument("--note", help="Classify a single note (path).")
+    args = parser.parse_args()
+
+    if args.note:
+        clf = MaturityClassifier.load()
+        with open(args.note, 'r', encoding='utf-8') as f:
+            print(clf.analyze(f.read()))
+        return
+
+    scanner = TagScanner(config.VAULT_ABS_PATH)
+    scanner.build_index()
+    samples = labelled_samples(scanner)
+    accuracy = evaluate(samples)
+    if accuracy is not None:
+        print(f"Held-out accuracy: {accuracy:.0%} on {len(samples)} labelled notes.")
+    if args.fit:
+        load_or_fit(scanner, refit=True)
+
+
+if __name__ == "__main__":
+    main()
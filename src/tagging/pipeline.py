@@ -0,0 +1,243 @@
+import time
+import threading
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src import tracing
+from src.tagging.auto_tag import TagCache, TagScanner, TagSuggester, suggested_tag_set, topic_tags
+
+
+class TagPipeline:
+    """
+    Pipelined tagger: the calling thread reads notes and parses their current tags,
+    and a bounded pool of workers runs the LLM analysis concurrently.
+
+    run(ordered=True) yields results in file order, which keeps interactive review
+    working while later notes are analyzed in the background; run(ordered=False)
+    yields each result as soon as it arrives (used by --auto to apply immediately).
+
+    With a propagator (TagPropagator), each note is first tagged from its nearest
+    neighbours in the vector store; only low-confidence notes go to the LLM.
+
+    With a maturity classifier (MaturityClassifier) and a cache, notes whose topic
+    tags are the same as when they were last processed skip the LLM entirely: the
+    topics are kept and maturity / #for-review come from the local classifier.
+
+    With a vocabulary (TagVocabulary), each prompt lists the vault tags most similar
+    to its notes instead of the fixed top_tags (which remain the fallback).
+
+    With batch_tokens set, prepared notes are packed into multi-note prompts of
+    roughly that many tokens (TagSuggester.analyze_batch) instead of one call each.
+
+    Each result is a dict with the same keys the GUI review list uses:
+    file, content, current, suggested, added, removed, plus index, result, elapsed.
+    """
+
+    def __init__(self, scanner: TagScanner, suggester: TagSuggester, top_tags: List[str],
+                 cache: Optional[TagCache] = None, workers: int = 4, max_pending: Optional[int] = None,
+                 batch_tokens: Optional[int] = None, batch_max_notes: int = 10, propagator=None,
+                 maturity=None, vocabulary=None):
+        self.scanner = scanner
+        self.suggester = suggester
+        self.top_tags = top_tags
+        self.cache = cache
+        self.workers = max(1, workers)
+        # Bound on notes read ahead of the consumer (queued + in flight)
+        self.max_pending = max_pending or self.workers * 2
+        self.batch_tokens = batch_tokens
+        self.batch_max_notes = batch_max_notes
+        self.propagator = propagator
+        self.maturity = maturity
+        self.vocabulary = vocabulary
+        # Counted by the workers; completed and skipped only by the calling thread
+        self.local = 0
+        self._local_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.started_at: Optional[float] = None
+        self.completed = 0
+        self.skipped = 0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at if self.started_at else 0.0
+
+    @property
+    def notes_per_minute(self) -> float:
+        return self.completed / self.elapsed * 60 if self.elapsed > 0 else 0.0
+
+    @tracing.traced("tag.prepare")
+    def _prepare(self, index: int, file_path: Path) -> Optional[Dict]:
+        # Stat, hash, tags and content all come from the vault snapshot: one read at most
+        snapshot = self.scanner.snapshot
+        entry = snapshot.entry(file_path)
+        if entry is None:
+            print(f"Error reading {file_path}: not in the vault snapshot")
+            return None
+        if self.cache is not None and not self.cache.should_process(file_path, entry["hash"]):
+            self.skipped += 1
+            return None
+        content = snapshot.read(file_path)
+        if content is None:
+            print(f"Error reading {file_path}: removed since the vault was scanned")
+            return None
+        current = set(entry["tags"])
+        return {
+            "index": index,
+            "file": file_path,
+            "content": content,
+            "current": current,
+            "topics_unchanged": (
+                self.maturity is not None and self.cache is not None
+                and self.cache.get_topics(file_path) == topic_tags(current)
+            ),
+        }
+
+    @staticmethod
+    def _finish(item: Dict, result: Optional[Dict], elapsed: float) -> Dict:
+        item["elapsed"] = elapsed
+        item["result"] = result
+        item["suggested"] = suggested_tag_set(result) if result else set()
+        item["added"] = item["suggested"] - item["current"] if result else set()
+        item["removed"] = item["current"] - item["suggested"] if result else set()
+        return item
+
+    def _analyze_local(self, item: Dict) -> Dict:
+        result = self.maturity.analyze(item["content"])
+        result["topic_tags"] = sorted(topic_tags(item["current"]))
+        result["source"] = "local"
+        return result
+
+    @tracing.traced("tag.analyze")
+    def _analyze(self, items: List[Dict]) -> List[Dict]:
+        start = time.perf_counter()
+        local = [i for i in items if i.get("topics_unchanged")]
+        if local:
+            with self._local_lock:
+                self.local += len(local)
+            done = [self._finish(i, self._analyze_local(i), time.perf_counter() - start) for i in local]
+            remaining = [i for i in items if not i.get("topics_unchanged")]
+            if not remaining:
+                return done
+            return sorted(done + self._analyze(remaining), key=lambda i: i["index"])
+        if self.propagator is not None:
+            done, remaining = [], []
+            for item in items:
+                result = self.propagator.suggest(item["file"], item["content"], item["current"])
+                if result:
+                    done.append(self._finish(item, result, time.perf_counter() - start))
+                else:
+                    remaining.append(item)
+            if not remaining:
+                return done
+            return sorted(done + self._analyze_llm(remaining), key=lambda i: i["index"])
+        return self._analyze_llm(items)
+
+    def _vault_tags(self, items: List[Dict]) -> List[str]:
+        """Tags offered to the LLM for these notes: the union of their relevant tags."""
+        if self.vocabulary is None:
+            return self.top_tags
+        try:
+            selections = self.vocabulary.select_many([i["content"] for i in items], [i["current"] for i in items])
+        except Exception as e:
+            print(f"Tag vocabulary lookup failed, using top tags: {e}")
+            return self.top_tags
+        merged = []
+        for tags in itertools.zip_longest(*selections):  # interleave so every note's best tags come first
+            merged.extend(t for t in tags if t and t not in merged)
+        # Never more than top_tags, which batch packing budgets for
+        return merged[:max(len(self.top_tags), self.vocabulary.size)]
+
+    def _analyze_llm(self, items: List[Dict]) -> List[Dict]:
+        start = time.perf_counter()
+        vault_tags = self._vault_tags(items)
+        if len(items) == 1 and not self.batch_tokens:
+            item = items[0]
+            result = self.suggester.analyze_note(item["content"], item["current"], vault_tags)
+            return [self._finish(item, result, time.perf_counter() - start)]
+
+        notes = [{"id": str(item["index"]), "content": item["content"], "current": item["current"]} for item in items]
+        results = self.suggester.analyze_batch(notes, vault_tags)
+        elapsed = time.perf_counter() - start
+        return [self._finish(item, results.get(str(item["index"])), elapsed) for item in items]
+
+    def _result(self, future, items: List[Dict]) -> List[Dict]:
+        """A batch's analyzed items; if its analysis raised, the notes come back with result=None."""
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error analyzing {', '.join(i['file'].name for i in items)}: {e}")
+            return [self._finish(item, None, 0.0) for item in items]
+
+    def run(self, files: List[Path], ordered: bool = True) -> Iterator[Dict]:
+        self._cancelled.clear()
+        self.started_at = time.perf_counter()
+        self.completed = 0
+        self.skipped = 0
+        self.local = 0
+        pending = collections.deque()  # (future -> list of items, the items) in submission order
+        source = iter(enumerate(files))
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tagger")
+        batch: List[Dict] = []
+        batch_cost = [0]
+
+        if self.batch_tokens:
+            overhead = self.suggester.batch_overhead_tokens(self.top_tags)
+
+        def submit_batch():
+            if batch:
+                items = list(batch)
+                pending.append((executor.submit(self._analyze, items), items))
+                batch.clear()
+                batch_cost[0] = 0
+
+        def fill():
+            while len(pending) < self.max_pending and not self._cancelled.is_set():
+                try:
+                    index, file_path = next(source)
+                except StopIteration:
+                    submit_batch()
+                    return
+                item = self._prepare(index, file_path)
+                if item is None:
+                    continue
+                if not self.batch_tokens or item["topics_unchanged"]:
+                    pending.append((executor.submit(self._analyze, [item]), [item]))
+                    continue
+                cost = self.suggester.note_block_tokens(item["content"], item["current"])
+                if batch and (overhead + batch_cost[0] + cost > self.batch_tokens
+                              or len(batch) >= self.batch_max_notes):
+                    submit_batch()
+                batch.append(item)
+                batch_cost[0] += cost
+
+        try:
+            fill()
+            while pending and not self._cancelled.is_set():
+                if ordered:
+                    future, items = pending.popleft()
+                else:
+                    done, _ = wait([f for f, _ in pending], return_when=FIRST_COMPLETED)
+                    future, items = next(p for p in pending if p[0] in done)
+                    pending.remove((future, items))
+                items = self._result(future, items)
+                self.completed += len(items)
+                fill()
+                yield from items
+            # Cancelled: drop queued notes, but still deliver the calls already in flight
+            for future, _ in pending:
+                future.cancel()
+            for future, items in pending:
+                if future.cancelled():
+                    continue
+                items = self._result(future, items)
+                self.completed += len(items)
+                yield from items
+        finally:
+            self._cancelled.set()
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,119 @@
+import os
+import threading
+import collections
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from src import config
+from src.ai_provider import AIProvider
+from src.tagging.auto_tag import MATURITY_TAGS, NON_TOPIC_TAGS
+
+
+def _normalize_tags(raw) -> Set[str]:
+    """Chunk metadata stores tags as a comma separated string (see rag.ingest)."""
+    if not raw:
+        return set()
+    if isinstance(raw, str):
+        raw = raw.replace(',', ' ').split()
+    return {f"#{str(t).strip().strip('#')}" for t in raw if str(t).strip().strip('#')}
+
+
+class TagPropagator:
+    """
+    Suggests topic tags from a note's nearest neighbours in the existing Chroma store
+    (built by src.rag.ingest) without an LLM call.
+
+    Neighbouring notes vote for their tags, weighted by similarity; a tag's confidence
+    is its share of the total neighbour weight. If at least `min_topics` tags reach
+    `min_confidence` and the note's maturity is known, a full result is returned in
+    the analyze_note() format; otherwise None, and the caller falls back to the LLM.
+    """
+
+    def __init__(self, k: int = None, min_confidence: float = None, min_topics: int = 2,
+                 max_topics: int = 5, maturity_classifier=None, vectorstore=None):
+        self.k = k or config.TAG_PROPAGATION_K
+        self.min_confidence = min_confidence if min_confidence is not None else config.TAG_PROPAGATION_CONFIDENCE
+        self.min_topics = min_topics
+        self.max_topics = max_topics
+        # Optional callable(content) -> "#seed" | "#sprout" | "#evergreen",
+        # e.g. MaturityClassifier.classify
+        self.maturity_classifier = maturity_classifier
+        self.vectorstore = vectorstore
+        # suggest() runs on the TagPipeline workers
+        self.attempted = 0
+        self.propagated = 0
+        self._lock = threading.Lock()
+
+        if self.vectorstore is None:
+            if not os.path.exists(config.CHROMA_DB_ABS_PATH):
+                raise FileNotFoundError(
+                    f"No vector store at {config.CHROMA_DB_ABS_PATH}. Run: python -m src.rag.ingest"
+                )
+            from langchain_chroma import Chroma
+            self.vectorstore = Chroma(
+                persist_directory=config.CHROMA_DB_ABS_PATH,
+                embedding_function=AIProvider.get_embeddings(subsystem="tagging.propagation")
+            )
+
+    @property
+    def hit_rate(self) -> float:
+        return self.propagated / self.attempted if self.attempted else 0.0
+
+    def neighbour_votes(self, file_path: Path, content: str) -> Dict[str, float]:
+        """Returns {tag: confidence} from the k nearest other notes."""
+        # Several chunks can belong to one note; over-fetch and keep the best chunk per note
+        hits = self.vectorstore.similarity_search_with_relevance_scores(content[:2000], k=self.k * 3)
+        own = os.path.abspath(str(file_path))
+        best: Dict[str, tuple] = {}
+        for doc, score in hits:
+            source = doc.metadata.get('source', '')
+            if not source or os.path.abspath(source) == own:
+                continue
+            if source not in best or score > best[source][0]:
+                best[source] = (score, doc.metadata.get('tags'))
+
+        neighbours = sorted(best.values(), key=lambda x: -x[0])[:self.k]
+        votes = collections.Counter()
+        total = 0.0
+        for score, raw_tags in neighbours:
+            weight = max(score, 0.0)
+            total += weight
+            for tag in _normalize_tags(raw_tags) - NON_TOPIC_TAGS:
+                votes[tag] += weight
+        if total <= 0:
+            return {}
+        return {tag: weight / total for tag, weight in votes.items()}
+
+    def suggest(self, file_path: Path, content: str, current_tags: Set[str]) -> Optional[Dict]:
+        with self._lock:
+            self.attempted += 1
+        try:
+            votes = self.neighbour_votes(file_path, content)
+        except Exception as e:
+            print(f"Tag propagation failed for {Path(file_path).name}: {e}")
+            return None
+
+        confident = sorted(
+            ((tag, conf) for tag, conf in votes.items() if conf >= self.min_confidence),
+            key=lambda x: -x[1]
+        )[:self.max_topics]
+        if len(confident) < self.min_topics:
+            return None
+
+        maturity = next((t for t in current_tags if t in MATURITY_TAGS), None)
+        if self.maturity_classifier is not None:
+            maturity = self.maturity_classifier(content) or maturity
+        if maturity is None:
+            return None
+
+        # Keep the note's own topic tags; propagation only adds confident ones
+        topics = {t for t in current_tags if t not in NON_TOPIC_TAGS} | {tag for tag, _ in confident}
+        with self._lock:
+            self.propagated += 1
+        return {
+            "topic_tags": sorted(topics),
+            "maturity_tag": maturity,
+            "maintenance_tag": "#for-review" if "#for-review" in current_tags else None,
+            "source": "propagation",
+            "confidence": {tag: round(conf, 2) for tag, conf in confident},
+        }
@@ -0,0 +1,153 @@
+"""
+Tag vocabulary index: picks the vault tags most relevant to a note by vector
+similarity, instead of sending the same most frequent tags with every prompt.
+
+Each topic tag is described by the notes it appears on and the tags it co-occurs
+with; the descriptions are embedded once and cached in VOCAB_FILE, and only tags
+whose description changed are re-embedded on the next build().
+"""
+import os
+import json
+import math
+import hashlib
+import operator
+import collections
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from src import config
+from src.tagging.auto_tag import NON_TOPIC_TAGS, TagScanner
+
+VOCAB_FILE = Path(".tag_vocab.json")
+VOCAB_VERSION = 1
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(map(operator.mul, a, b))
+
+
+class TagVocabulary:
+    def __init__(self, scanner: TagScanner, embeddings=None, cache_file: Path = VOCAB_FILE,
+                 size: Optional[int] = None, anchors: int = 5, max_notes: int = 8, max_cooccurring: int = 5):
+        self.scanner = scanner
+        self.cache_file = cache_file
+        self.size = size or config.TAG_VOCAB_SIZE
+        # Most frequent tags, always offered so the core vocabulary stays consistent
+        self.anchors = anchors
+        self.max_notes = max_notes
+        self.max_cooccurring = max_cooccurring
+        self.embeddings = embeddings
+        self.model = self._model_name()
+        # tag -> {"desc_hash", "vector"} (vectors normalized)
+        self.vectors: Dict[str, Dict] = {}
+
+    @staticmethod
+    def _model_name() -> str:
+        if config.EMBEDDING_PROVIDER == "ollama":
+            return f"ollama:{config.OLLAMA_EMBEDDING_MODEL}"
+        return f"gemini:{config.GEMINI_EMBEDDING_MODEL}"
+
+    def _get_embeddings(self):
+        if self.embeddings is None:
+            from src.ai_provider import AIProvider
+            self.embeddings = AIProvider.get_embeddings(subsystem="tagging.vocabulary")
+        return self.embeddings
+
+    def describe(self, tag: str) -> str:
+        """Short text for a tag: its name, co-occurring tags and the titles of notes using it."""
+        files = sorted(self.scanner.tag_files.get(tag, ()))
+        cooccurring = collections.Counter()
+        for path in files:
+            entry = self.scanner.entries.get(path)
+            if entry:
+                cooccurring.update(t for t in entry["tags"] if t != tag and t not in NON_TOPIC_TAGS)
+        titles = [Path(p).stem for p in files[:self.max_notes]]
+        related = [t for t, _ in cooccurring.most_common(self.max_cooccurring)]
+        words = tag.lstrip('#').replace('-', ' ').replace('_', ' ').replace('/', ' ')
+        return f"Tag {tag} ({words}). Related tags: {', '.join(related) or 'none'}. Notes: {'; '.join(titles)}."
+
+    def _load(self):
+        self.vectors = {}
+        if not self.cache_file.exists():
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == VOCAB_VERSION and data.get("model") == self.model:
+            self.vectors = data.get("tags", {})
+
+    def _save(self):
+        data = {"version": VOCAB_VERSION, "model": self.model, "tags": self.vectors}
+        tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self.cache_file)
+
+    def build(self) -> "TagVocabulary":
+        """Embeds new or changed tag descriptions and drops tags no longer in the vault."""
+        self._load()
+        tags = [t for t in self.scanner.tag_counts if t not in NON_TOPIC_TAGS]
+        stale, descriptions = [], []
+        for tag in tags:
+            desc = self.describe(tag)
+            desc_hash = hashlib.blake2b(desc.encode('utf-8'), digest_size=8).hexdigest()
+            if self.vectors.get(tag, {}).get("desc_hash") != desc_hash:
+                stale.append((tag, desc_hash))
+                descriptions.append(desc)
+
+        removed = [t for t in self.vectors if t not in self.scanner.tag_counts or t in NON_TOPIC_TAGS]
+        for tag in removed:
+            del self.vectors[tag]
+
+        if stale:
+            print(f"Embedding {len(stale)} tag descriptions...")
+            vectors = self._get_embeddings().embed_documents(descriptions)
+            for (tag, desc_hash), vector in zip(stale, vectors):
+                self.vectors[tag] = {"desc_hash": desc_hash, "vector": _normalize(vector)}
+        if stale or removed:
+            self._save()
+        print(f"Tag vocabulary: {len(self.vectors)} tags ({len(stale)} embedded, {len(removed)} removed).")
+        return self
+
+    def _rank(self, query_vector: List[float], current_tags: Set[str]) -> List[str]:
+        query = _normalize(query_vector)
+        scored = sorted(
+            ((tag, _dot(query, data["vector"])) for tag, data in self.vectors.items()),
+            key=lambda x: -x[1]
+        )
+        selected = [t for t in self.scanner.get_top_tags(self.anchors) if t not in NON_TOPIC_TAGS]
+        for tag, _ in scored:
+            if len(selected) >= self.size:
+                break
+            if tag not in selected and tag not in current_tags:
+                selected.append(tag)
+        return selected
+
+    def select(self, content: str, current_tags: Set[str] = frozenset()) -> List[str]:
+        """The `size` vault tags most relevant to the note (plus the anchor tags)."""
+        return self.select_many([content], [current_tags])[0]
+
+    def select_many(self, contents: List[str], current_tags: List[Set[str]]) -> List[List[str]]:
+        """select() for several notes with one embedding request."""
+        if not self.vectors:
+            return [self.scanner.get_top_tags(self.size) for _ in contents]
+        vectors = self._get_embeddings().embed_documents([c[:2000] for c in contents])
+        return [self._rank(v, tags) for v, tags in zip(vectors, current_tags)]
+
+
+def load_vocabulary(scanner: TagScanner) -> Optional[TagVocabulary]:
+    """Builds the vocabulary if TAG_VOCAB_SIZE is enabled; None (use top tags) on failure."""
+    if config.TAG_VOCAB_SIZE <= 0:
+        return None
+    try:
+        return TagVocabulary(scanner).build()
+    except Exception as e:
+        print(f"Tag vocabulary unavailable, using the most frequent tags: {e}")
+        return None
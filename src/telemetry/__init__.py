@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import math
+import atexit
+import logging
+import threading
+import collections
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src import config
+
+CALLS_FILE = "calls.jsonl"
+METRICS_FILE = "metrics.prom"
+
+# USD per 1M tokens (input, output). Override or extend with TELEMETRY_PRICES='{"model": [in, out]}'.
+DEFAULT_PRICES = {
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "models/text-embedding-004": (0.0, 0.0),
+    "models/embedding-001": (0.0, 0.0),
+}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+
+def estimate_tokens(num_bytes: int) -> int:
+    """Rough token estimate (~4 bytes per token) for APIs that don't report usage."""
+    return int(math.ceil(num_bytes / 4))
+
+
+class TelemetryRecorder:
+    """
+    Thread-safe sink for call records.
+    Appends one JSON line per call to a rotating file and keeps in-process
+    counters that are exported as a Prometheus text snapshot.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, backups: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_snapshot = 0.0
+
+        self._logger = logging.getLogger(f"obsidian_ai.telemetry.{id(self)}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        handler = RotatingFileHandler(
+            self.directory / CALLS_FILE, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+
+        # (kind, subsystem, model) -> counters
+        self.calls = collections.Counter()
+        self.errors = collections.Counter()
+        self.prompt_tokens = collections.Counter()
+        self.completion_tokens = collections.Counter()
+        self.bytes_sent = collections.Counter()
+        self.latency_sum = collections.Counter()
+        self.latency_buckets: Dict[tuple, List[int]] = collections.defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        # (cache, subsystem) -> hits / misses
+        self.cache_hits = collections.Counter()
+        self.cache_misses = collections.Counter()
+
+    def record_call(self, kind: str, subsystem: str, model: str, latency: float,
+                    prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                    bytes_in: int = 0, bytes_out: int = 0, error: Optional[str] = None,
+                    estimated: bool = False):
+        event = {
+            "ts": time.time(),
+            "kind": kind,
+            "subsystem": subsystem,
+            "model": model,
+            "latency_s": round(latency, 4),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "estimated_tokens": estimated,
+            "error": error,
+        }
+        key = (kind, subsystem, model)
+        with self._lock:
+            self.calls[key] += 1
+            if error:
+                self.errors[key] += 1
+            self.prompt_tokens[key] += prompt_tokens or 0
+            self.completion_tokens[key] += completion_tokens or 0
+            self.bytes_sent[key] += bytes_in
+            self.latency_sum[key] += latency
+            buckets = self.latency_buckets[key]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    buckets[i] += 1
+            self._logger.info(json.dumps(event))
+        self._maybe_snapshot()
+
+    def record_cache(self, cache: str, subsystem: str, hit: bool):
+        key = (cache, subsystem)
+        event = {"ts": time.time(), "kind": "cache", "cache": cache, "subsystem": subsystem, "hit": hit}
+        with self._lock:
+            if hit:
+                self.cache_hits[key] += 1
+            else:
+                self.cache_misses[key] += 1
+            self._logger.info(json.dumps(event))
+
+    def _maybe_snapshot(self):
+        now = time.time()
+        if now - self._last_snapshot >= 5:
+            self._last_snapshot = now
+            self.write_snapshot()
+
+    def render_prometheus(self) -> str:
+        lines = []
+
+        def emit(name, help_text, mtype, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {mtype}")
+            lines.extend(samples)
+
+        def labels(key, extra=""):
+            kind, subsystem, model = key
+            base = f'kind="{kind}",subsystem="{subsystem}",model="{model}"'
+            return "{" + base + (("," + extra) if extra else "") + "}"
+
+        with self._lock:
+            emit("obsidian_ai_calls_total", "Client calls.", "counter",
+                 [f"obsidian_ai_calls_total{labels(k)} {v}" for k, v in self.calls.items()])
+            emit("obsidian_ai_call_errors_total", "Client calls that raised.", "counter",
+                 [f"obsidian_ai_call_errors_total{labels(k)} {v}" for k, v in self.errors.items()])
+            emit("obsidian_ai_prompt_tokens_total", "Prompt/input tokens.", "counter",
+                 [f"obsidian_ai_prompt_tokens_total{labels(k)} {v}" for k, v in self.prompt_tokens.items()])
+            emit("obsidian_ai_completion_tokens_total", "Completion/output tokens.", "counter",
+                 [f"obsidian_ai_completion_tokens_total{labels(k)} {v}" for k, v in self.completion_tokens.items()])
+            emit("obsidian_ai_request_bytes_total", "Request payload bytes.", "counter",
+                 [f"obsidian_ai_request_bytes_total{labels(k)} {v}" for k, v in self.bytes_sent.items()])
+
+            samples = []
+            for k, buckets in self.latency_buckets.items():
+                for bound, count in zip(LATENCY_BUCKETS, buckets):
+                    le = "+Inf" if bound == float("inf") else str(bound)
+                    le_label = f'le="{le}"'
+                    samples.append(f"obsidian_ai_latency_seconds_bucket{labels(k, le_label)} {count}")
+                samples.append(f"obsidian_ai_latency_seconds_sum{labels(k)} {self.latency_sum[k]:.4f}")
+                samples.append(f"obsidian_ai_latency_seconds_count{labels(k)} {self.calls[k]}")
+            emit("obsidian_ai_latency_seconds", "Client call latency.", "histogram", samples)
+
+            cache_samples = []
+            for (cache, subsystem), v in self.cache_hits.items():
+                cache_samples.append(f'obsidian_ai_cache_lookups_total{{cache="{cache}",subsystem="{subsystem}",result="hit"}} {v}')
+            for (cache, subsystem), v in self.cache_misses.items():
+                cache_samples.append(f'obsidian_ai_cache_lookups_total{{cache="{cache}",subsystem="{subsystem}",result="miss"}} {v}')
+            emit("obsidian_ai_cache_lookups_total", "Cache lookups by result.", "counter", cache_samples)
+
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self):
+        try:
+            tmp = self.directory / (METRICS_FILE + ".tmp")
+            tmp.write_text(self.render_prometheus(), encoding="utf-8")
+            os.replace(tmp, self.directory / METRICS_FILE)
+        except OSError as e:
+            print(f"Telemetry snapshot failed: {e}")
+
+
+class _NullRecorder:
+    def record_call(self, *args, **kwargs):
+        pass
+
+    def record_cache(self, *args, **kwargs):
+        pass
+
+    def write_snapshot(self):
+        pass
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """Returns the process-wide recorder (a no-op one if telemetry is disabled)."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                if config.TELEMETRY_ENABLED:
+                    _recorder = TelemetryRecorder(
+                        config.TELEMETRY_ABS_PATH, config.TELEMETRY_MAX_BYTES, config.TELEMETRY_BACKUPS
+                    )
+                    atexit.register(_recorder.write_snapshot)
+                else:
+                    _recorder = _NullRecorder()
+    return _recorder
+
+
+def record_cache(cache: str, subsystem: str, hit: bool):
+    get_recorder().record_cache(cache, subsystem, hit)
+
+
+# --- Summary ---
+
+def _load_prices() -> Dict[str, tuple]:
+    prices = dict(DEFAULT_PRICES)
+    raw = os.getenv("TELEMETRY_PRICES")
+    if raw:
+        try:
+            prices.update({k: tuple(v) for k, v in json.loads(raw).items()})
+        except (ValueError, TypeError) as e:
+            print(f"Ignoring invalid TELEMETRY_PRICES: {e}")
+    return prices
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = max(0, int(math.ceil(pct / 100 * len(ordered))) - 1)
+    return ordered[idx]
+
+
+def load_events(directory: Optional[str] = None, since: Optional[float] = None) -> List[Dict]:
+    """Reads call records from the current and rotated JSONL files (oldest first)."""
+    directory = Path(directory or config.TELEMETRY_ABS_PATH)
+    files = sorted(directory.glob(CALLS_FILE + ".*"), key=lambda p: -int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0)
+    files.append(directory / CALLS_FILE)
+    events = []
+    for path in files:
+        if not path.exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or event.get("ts", 0) >= since:
+                    events.append(event)
+    return events
+
+
+def summarize(events: List[Dict]) -> List[Dict]:
+    """Aggregates call records per subsystem: calls, errors, tokens, cost and latency percentiles."""
+    prices = _load_prices()
+    groups: Dict[str, Dict] = {}
+    for e in events:
+        if e.get("kind") == "cache":
+            continue
+        g = groups.setdefault(e["subsystem"], {
+            "subsystem": e["subsystem"], "calls": 0, "errors": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "latencies": [],
+        })
+        g["calls"] += 1
+        g["errors"] += 1 if e.get("error") else 0
+        p, c = e.get("prompt_tokens") or 0, e.get("completion_tokens") or 0
+        g["prompt_tokens"] += p
+        g["completion_tokens"] += c
+        price_in, price_out = prices.get(e.get("model"), (0.0, 0.0))
+        g["cost_usd"] += (p * price_in + c * price_out) / 1_000_000
+        g["latencies"].append(e.get("latency_s", 0.0))
+
+    rows = []
+    for g in sorted(groups.values(), key=lambda g: -g["cost_usd"]):
+        latencies = g.pop("latencies")
+        g["p50_s"] = _percentile(latencies, 50)
+        g["p95_s"] = _percentile(latencies, 95)
+        g["total_s"] = sum(latencies)
+        rows.append(g)
+    return rows
+
+
+def summarize_cache(events: List[Dict]) -> List[Dict]:
+    """Hit/miss counts per (cache, subsystem)."""
+    counts: Dict[tuple, List[int]] = collections.defaultdict(lambda: [0, 0])
+    for e in events:
+        if e.get("kind") == "cache":
+            counts[(e["cache"], e["subsystem"])][0 if e.get("hit") else 1] += 1
+    return [
+        {"cache": cache, "subsystem": subsystem, "hits": hits, "misses": misses,
+         "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+        for (cache, subsystem), (hits, misses) in sorted(counts.items())
+    ]
+
+
+def print_summary(rows: List[Dict], cache_rows: Optional[List[Dict]] = None):
+    if not rows:
+        print("No telemetry recorded yet.")
+        return
+    header = f"{'Subsystem':<20} {'Calls':>6} {'Errors':>6} {'Prompt tok':>11} {'Compl tok':>10} {'Cost $':>9} {'p50 s':>7} {'p95 s':>7} {'Total s':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['subsystem']:<20} {r['calls']:>6} {r['errors']:>6} {r['prompt_tokens']:>11} "
+              f"{r['completion_tokens']:>10} {r['cost_usd']:>9.4f} {r['p50_s']:>7.2f} {r['p95_s']:>7.2f} {r['total_s']:>8.1f}")
+
+    if cache_rows:
+        print()
+        for r in cache_rows:
+            print(f"Cache {r['cache']} ({r['subsystem']}): {r['hits']} hits / {r['misses']} misses ({r['hit_rate']:.0%})")
@@ -0,0 +1,26 @@
+import sys
+import json
+import time
+import argparse
+from src.telemetry import load_events, summarize, summarize_cache, print_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize recorded LLM/embedding calls.")
+    parser.add_argument("--days", type=float, default=None, help="Only include calls from the last N days.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    args = parser.parse_args()
+
+    since = time.time() - args.days * 86400 if args.days else None
+    events = load_events(since=since)
+    rows = summarize(events)
+    cache_rows = summarize_cache(events)
+    if args.json:
+        json.dump({"calls": rows, "caches": cache_rows}, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary(rows, cache_rows)
+
+
+if __name__ == "__main__":
+    main()
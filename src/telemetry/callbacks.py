@@ -0,0 +1,108 @@
+import time
+from typing import Any, Dict, List
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from src import tracing
+from src.telemetry import get_recorder, estimate_tokens
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that records latency, token usage and errors of chat model calls."""
+
+    raise_error = False
+
+    def __init__(self, subsystem: str, model: str):
+        self.subsystem = subsystem
+        self.model = model
+        self._runs: Dict[UUID, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any):
+        bytes_in = sum(len(str(m.content).encode("utf-8")) for batch in messages for m in batch)
+        model = (metadata or {}).get("ls_model_name") or self.model
+        self._runs[run_id] = (time.perf_counter(), bytes_in, model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, metadata=None, **kwargs: Any):
+        bytes_in = sum(len(p.encode("utf-8")) for p in prompts)
+        model = (metadata or {}).get("ls_model_name") or self.model
+        self._runs[run_id] = (time.perf_counter(), bytes_in, model)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any):
+        start, bytes_in, model = self._runs.pop(run_id, (time.perf_counter(), 0, self.model))
+        end = time.perf_counter()
+        latency = end - start
+
+        prompt_tokens = completion_tokens = None
+        bytes_out = 0
+        for generations in response.generations:
+            for gen in generations:
+                bytes_out += len(gen.text.encode("utf-8"))
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens = (prompt_tokens or 0) + usage.get("input_tokens", 0)
+                    completion_tokens = (completion_tokens or 0) + usage.get("output_tokens", 0)
+
+        if prompt_tokens is None and response.llm_output:
+            usage = response.llm_output.get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens")
+            completion_tokens = usage.get("completion_tokens")
+
+        estimated = prompt_tokens is None
+        if estimated:
+            prompt_tokens = estimate_tokens(bytes_in)
+            completion_tokens = estimate_tokens(bytes_out)
+
+        get_recorder().record_call(
+            "llm", self.subsystem, model, latency,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            bytes_in=bytes_in, bytes_out=bytes_out, estimated=estimated,
+        )
+        tracing.add_span("llm", start, end, subsystem=self.subsystem, model=model,
+                         prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        start, bytes_in, model = self._runs.pop(run_id, (time.perf_counter(), 0, self.model))
+        end = time.perf_counter()
+        get_recorder().record_call(
+            "llm", self.subsystem, model, end - start,
+            bytes_in=bytes_in, error=f"{type(error).__name__}: {error}",
+        )
+        tracing.add_span("llm", start, end, subsystem=self.subsystem, model=model, error=type(error).__name__)
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Wraps an Embeddings client and records latency and payload size of every call."""
+
+    def __init__(self, inner: Embeddings, subsystem: str, model: str):
+        self.inner = inner
+        self.subsystem = subsystem
+        self.model = model
+
+    def _timed(self, fn, texts: List[str]):
+        bytes_in = sum(len(t.encode("utf-8")) for t in texts)
+        start = time.perf_counter()
+        error = None
+        try:
+            with tracing.span("embed", subsystem=self.subsystem, texts=len(texts)):
+                return fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            get_recorder().record_call(
+                "embedding", self.subsystem, self.model, time.perf_counter() - start,
+                prompt_tokens=estimate_tokens(bytes_in), completion_tokens=0,
+                bytes_in=bytes_in, error=error, estimated=True,
+            )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._timed(lambda: self.inner.embed_documents(texts), texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._timed(lambda: self.inner.embed_query(text), [text])
+
+    def __getattr__(self, name):
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
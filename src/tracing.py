@@ -0,0 +1,246 @@
+"""
+Lightweight span tracing for profiling a run end to end.
+
+Code marks its stages with spans:
+
+    with tracing.span("ingest.split", docs=len(documents)):
+        ...
+
+    @tracing.traced("git.status")
+    def get_status(...): ...
+
+Tracing is off unless an entry point is started with --profile (or PROFILE is
+set): then every span is recorded with its thread, a Chrome trace-event JSON is
+written (open it in chrome://tracing or https://ui.perfetto.dev) and a per-stage
+summary table (calls, total and self time) is printed when the run ends. When
+disabled, span() returns a shared no-op context manager, so instrumented code
+pays one global lookup per span.
+
+LLM and embedding calls are recorded as "llm" / "embed" spans by the telemetry
+wrappers in src.telemetry.callbacks.
+"""
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TRACES_DIR = Path(".data/traces")
+# Spans kept for the trace file; beyond this only the summary is updated
+MAX_EVENTS = 500_000
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start", "child")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.child = 0.0
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.start, end, self.args, self.child)
+        return False
+
+    def set(self, **args):
+        """Adds arguments (counts, sizes) known only once the span has run."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects spans from all threads; thread-safe."""
+
+    def __init__(self, path: Path, name: str = "run"):
+        self.path = Path(path)
+        self.name = name
+        self.pid = os.getpid()
+        self.started = time.perf_counter()
+        self.events: List[Dict] = []
+        self.dropped = 0
+        # name -> [calls, total, self, max]
+        self.stats: Dict[str, List[float]] = {}
+        self.threads: Dict[int, str] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name: str, start: float, end: float, args: Dict, child: float = 0.0):
+        duration = end - start
+        stack = self._stack()
+        if stack:
+            stack[-1].child += duration
+        thread = threading.current_thread()
+        with self._lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = [0, 0.0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += duration
+            stat[2] += max(0.0, duration - child)
+            stat[3] = max(stat[3], duration)
+            if len(self.events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            self.threads.setdefault(thread.ident, thread.name)
+            event = {"name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": self.pid, "tid": thread.ident,
+                     "ts": round((start - self.started) * 1e6, 1), "dur": round(duration * 1e6, 1)}
+            if args:
+                event["args"] = {k: v if isinstance(v, (int, float, bool)) or v is None else str(v)
+                                 for k, v in args.items()}
+            self.events.append(event)
+
+    def write(self) -> Path:
+        """Writes the Chrome trace-event JSON (atomically)."""
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        meta = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": self.name}}]
+        meta += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": tname}}
+                 for tid, tname in threads.items()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+        os.replace(tmp, self.path)
+        return self.path
+
+    def summary(self) -> str:
+        """Per-stage table sorted by self time (time not spent in nested spans)."""
+        wall = time.perf_counter() - self.started
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda kv: kv[1][2], reverse=True)
+        width = max([len("Stage")] + [len(name) for name, _ in rows])
+        lines = [f"{'Stage':<{width}} {'Calls':>7} {'Total s':>9} {'Self s':>9} {'Mean ms':>9} {'Max ms':>9} {'Self %':>7}"]
+        for name, (calls, total, own, longest) in rows:
+            lines.append(f"{name:<{width}} {int(calls):>7} {total:>9.3f} {own:>9.3f} {total / calls * 1000:>9.1f} "
+                         f"{longest * 1000:>9.1f} {own / wall if wall else 0:>7.1%}")
+        lines.append(f"Wall time {wall:.3f}s; totals include time in concurrent threads.")
+        if self.dropped:
+            lines.append(f"{self.dropped} spans not written to the trace (MAX_EVENTS={MAX_EVENTS}).")
+        return "\n".join(lines)
+
+
+_tracer: Optional[Tracer] = None
+_setup_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def span(name: str, **args):
+    """Context manager timing a stage; a shared no-op when tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP
+    return _Span(tracer, name, args)
+
+
+def add_span(name: str, start: float, end: float, **args):
+    """Records a span measured elsewhere (time.perf_counter() start/end), e.g. in a callback."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer._record(name, start, end, args)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: runs the function inside span(name or module.qualname)."""
+    def decorate(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with _Span(tracer, label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def trace_path(value: str, name: str) -> Path:
+    """--profile / PROFILE value -> trace file: a *.json path, or a default one for 1/true/yes."""
+    if value.lower() in ("1", "true", "yes", ""):
+        return TRACES_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    return Path(value)
+
+
+def enable(path: Optional[str] = None, name: str = "run", report_at_exit: bool = True) -> Tracer:
+    """Starts tracing (once per process); the trace and summary are written at exit."""
+    global _tracer
+    with _setup_lock:
+        if _tracer is None:
+            _tracer = Tracer(trace_path(path or "", name), name)
+            if report_at_exit:
+                atexit.register(finish)
+        return _tracer
+
+
+def configure(profile: Optional[str], name: str) -> bool:
+    """Enables tracing for an entry point if --profile was given or PROFILE is set."""
+    if profile is None:
+        from src import config
+        profile = config.PROFILE
+        if profile.lower() in ("", "0", "false", "no"):
+            return False
+    enable(profile, name)
+    return True
+
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", nargs="?", const="1", default=None, metavar="TRACE.json",
+                        help=f"Record spans; write a Chrome trace (default {TRACES_DIR}/<entry>-<time>.json) "
+                             "and print a per-stage summary.")
+
+
+def flush() -> Optional[Path]:
+    """Writes the trace so far (long-running processes such as the GUI)."""
+    return _tracer.write() if _tracer is not None else None
+
+
+def finish():
+    """Writes the trace and prints the summary table."""
+    tracer = _tracer
+    if tracer is None or not tracer.stats:
+        return
+    path = tracer.write()
+    print(f"\nProfile ({tracer.name}):")
+    print(tracer.summary())
+    print(f"Chrome trace written to {path}")
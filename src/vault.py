@@ -0,0 +1,277 @@
+"""
+Vault snapshot shared by the tagger, RAG ingest, the daily formatter and the GUI.
+
+The vault is walked once with os.scandir; every Markdown file's stat, content hash,
+parsed frontmatter, body and tags are kept in a SQLite cache (VAULT_DB) and only
+files whose size/mtime changed are read again. Subsystems ask the snapshot for
+file lists and note contents instead of globbing and re-reading the vault.
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import frontmatter # type: ignore
+
+from src import tracing
+
+VAULT_DB = Path(".vault_snapshot.db")
+# Bump when the parsed fields change so cached rows are re-parsed.
+SNAPSHOT_VERSION = "1"
+# files() walks the tree again (a stat pass) when the last walk is older than this,
+# so long-lived processes (GUI, repeated formatter runs) see added and deleted notes.
+WALK_TTL = 2.0
+
+# Regex for inline tags: #tag (alphanumeric, -, _, /)
+# Excludes #1 (headers) or # (empty)
+TAG_REGEX = re.compile(r'(?:^|[\s])#([a-zA-Z0-9_\-/]+)(?=[\s.,!?)]|$)')
+
+
+def parse_tags(metadata: Dict, body: str) -> Set[str]:
+    """Frontmatter `tags` plus inline #tags, normalized to '#tag'."""
+    tags = set()
+    fm_tags = metadata.get('tags')
+    if fm_tags is None:
+        fm_tags = []
+    if isinstance(fm_tags, str):
+        # Handle comma separated or space separated string
+        fm_tags = [t.strip() for t in fm_tags.replace(',', ' ').split()]
+    for t in fm_tags:
+        tags.add(f"#{str(t).strip('#')}")
+    for t in TAG_REGEX.findall(body):
+        tags.add(f"#{t}")
+    return tags
+
+
+def parse_note(content: str) -> Tuple[Dict, str]:
+    """(frontmatter metadata, body). Metadata is made JSON-safe (dates become strings)."""
+    post = frontmatter.loads(content)
+    metadata = json.loads(json.dumps(post.metadata, default=str))
+    return metadata, post.content
+
+
+class VaultSnapshot:
+    """
+    In-memory view of one folder tree (entries: path -> size, mtime_ns, hash, tags,
+    metadata), backed by the persistent cache. Bodies and raw contents stay in the
+    database and are loaded on demand. Thread-safe.
+    """
+
+    def __init__(self, root: str, db_path: Path = VAULT_DB):
+        self.root = os.path.abspath(str(root))
+        self.db_path = Path(db_path)
+        self.entries: Dict[str, Dict] = {}
+        self._loaded = False
+        self._pending = 0
+        self._batching = False
+        self._walked_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            " path TEXT PRIMARY KEY,"
+            " version TEXT NOT NULL,"
+            " size INTEGER, mtime_ns INTEGER,"
+            " hash TEXT NOT NULL,"
+            " metadata TEXT, tags TEXT,"
+            " body TEXT, content TEXT)"
+        )
+        self.conn.commit()
+
+    def _under_root(self, path: str) -> bool:
+        return path == self.root or path.startswith(os.path.join(self.root, ""))
+
+    def _load(self):
+        rows = self.conn.execute(
+            "SELECT path, size, mtime_ns, hash, metadata, tags FROM notes WHERE version = ? AND path LIKE ?",
+            (SNAPSHOT_VERSION, os.path.join(self.root, "") + "%")
+        ).fetchall()
+        self.entries = {
+            path: {"size": size, "mtime_ns": mtime_ns, "hash": digest,
+                   "metadata": json.loads(metadata or "{}"), "tags": json.loads(tags or "[]")}
+            for path, size, mtime_ns, digest, metadata, tags in rows
+            if self._under_root(path)
+        }
+        self._loaded = True
+
+    def walk(self):
+        """Yields (path, stat) for every .md file, skipping hidden folders (.git, .obsidian, .trash)."""
+        stack = [self.root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith('.'):
+                                stack.append(entry.path)
+                        elif entry.name.endswith('.md') and entry.is_file():
+                            yield entry.path, entry.stat()
+            except OSError as e:
+                print(f"Error scanning {current}: {e}")
+
+    def refresh(self) -> Tuple[List[str], List[str]]:
+        """Walks the tree and re-reads changed files. Returns (changed paths, removed paths)."""
+        with self._lock, tracing.span("vault.refresh", root=self.root) as refresh_span:
+            if not self._loaded:
+                self._load()
+            seen = set()
+            changed = []
+            # One transaction for the whole walk
+            self._batching = True
+            try:
+                for path, stat in self.walk():
+                    seen.add(path)
+                    if self.refresh_file(path, stat):
+                        changed.append(path)
+                removed = [p for p in self.entries if p not in seen]
+                for path in removed:
+                    self.forget(path)
+            finally:
+                self._batching = False
+                self.flush()
+            self._walked_at = time.monotonic()
+            refresh_span.set(files=len(seen), changed=len(changed), removed=len(removed))
+            return changed, removed
+
+    def ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    def refresh_file(self, file_path, stat=None) -> bool:
+        """Re-reads one file if its size/mtime changed. Returns True if its entry changed."""
+        path = os.path.abspath(str(file_path))
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            try:
+                stat = stat or os.stat(path)
+            except FileNotFoundError:
+                return self.forget(path)
+            entry = self.entries.get(path)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                return False
+
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+            except OSError as e:
+                print(f"Error reading {path}: {e}")
+                return False
+            digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+            if entry and entry["hash"] == digest:
+                # Touched but unchanged (sync tools, git checkout): keep the parsed fields
+                entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+                self.conn.execute("UPDATE notes SET size = ?, mtime_ns = ? WHERE path = ?",
+                                  (stat.st_size, stat.st_mtime_ns, path))
+                self._written()
+                return True
+
+            content = raw.decode('utf-8', errors='replace')
+            with tracing.span("vault.parse"):
+                try:
+                    metadata, body = parse_note(content)
+                except Exception as e:
+                    print(f"Error parsing {path}: {e}")
+                    metadata, body = {}, content
+                tags = sorted(parse_tags(metadata, body))
+            self.entries[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest,
+                                  "metadata": metadata, "tags": tags}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO notes (path, version, size, mtime_ns, hash, metadata, tags, body, content)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, SNAPSHOT_VERSION, stat.st_size, stat.st_mtime_ns, digest,
+                 json.dumps(metadata), json.dumps(tags), body, content)
+            )
+            self._written()
+            return True
+
+    def forget(self, file_path) -> bool:
+        path = os.path.abspath(str(file_path))
+        with self._lock:
+            if self.entries.pop(path, None) is None:
+                return False
+            self.conn.execute("DELETE FROM notes WHERE path = ?", (path,))
+            self._written()
+            return True
+
+    def _written(self):
+        # Single-file updates commit right away so other connections (CLI, GUI,
+        # other snapshots) are never blocked by an open write transaction.
+        self._pending += 1
+        if not self._batching:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._pending:
+                self.conn.commit()
+                self._pending = 0
+
+    def files(self, folder: Optional[str] = None, recursive: bool = True) -> List[Path]:
+        """Sorted Markdown files of the snapshot, optionally limited to a folder (re-walked after WALK_TTL)."""
+        if self._walked_at is None or time.monotonic() - self._walked_at > WALK_TTL:
+            self.refresh()
+        paths = list(self.entries)
+        if folder is not None:
+            prefix = os.path.join(os.path.abspath(str(folder)), "")
+            paths = [p for p in paths if p.startswith(prefix)
+                     and (recursive or os.sep not in p[len(prefix):])]
+        return [Path(p) for p in sorted(paths)]
+
+    def entry(self, file_path) -> Optional[Dict]:
+        """Up-to-date entry for a file (re-read first if it changed on disk)."""
+        path = os.path.abspath(str(file_path))
+        self.refresh_file(path)
+        return self.entries.get(path)
+
+    def _column(self, file_path, column: str) -> Optional[str]:
+        path = os.path.abspath(str(file_path))
+        self.refresh_file(path)
+        with self._lock:
+            row = self.conn.execute(f"SELECT {column} FROM notes WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def read(self, file_path) -> Optional[str]:
+        """Raw file content, served from the cache when the file is unchanged."""
+        return self._column(file_path, "content")
+
+    def body(self, file_path) -> Optional[str]:
+        """Note content without the frontmatter block."""
+        return self._column(file_path, "body")
+
+
+_snapshots: Dict[str, VaultSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(root: Optional[str] = None) -> VaultSnapshot:
+    """Process-wide snapshot for `root` (default: the configured vault)."""
+    if root is None:
+        from src import config
+        root = config.VAULT_ABS_PATH
+    key = os.path.abspath(str(root))
+    with _snapshots_lock:
+        if key not in _snapshots:
+            _snapshots[key] = VaultSnapshot(key)
+        return _snapshots[key]
+
+
+def snapshot_for(folder: str) -> Tuple[VaultSnapshot, Optional[str]]:
+    """(snapshot, folder filter): folders inside the vault share the vault's snapshot."""
+    from src import config
+    vault = os.path.abspath(config.VAULT_ABS_PATH)
+    folder = os.path.abspath(str(folder))
+    if folder == vault or folder.startswith(os.path.join(vault, "")):
+        return get_snapshot(vault), folder
+    if not os.path.isdir(folder):
+        return get_snapshot(os.path.dirname(folder)), folder
+    return get_snapshot(folder), None